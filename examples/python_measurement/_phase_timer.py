@@ -0,0 +1,161 @@
+"""A lightweight profiler that times the phases of each measurement."""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# 1-2-5 steps from 1 us to 50 s.
+_BUCKET_BOUNDS: Tuple[float, ...] = tuple(
+    mantissa * 10.0**exponent for exponent in range(-6, 2) for mantissa in (1, 2, 5)
+)
+
+
+class PhaseTimer:
+    """Aggregates how long each phase of a measurement takes across calls.
+
+    Time each call with :meth:`time_call`, mark the start of each phase with
+    :meth:`CallTimer.mark` and stop the call timer when the call ends. Calls that fail before
+    the call timer is stopped are left out. If the phase timer is disabled, time_call returns a
+    call timer that does nothing, so the instrumentation can stay in place.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Initialize the phase timer.
+
+        Args:
+            enabled: Whether to time the phases.
+        """
+        self.enabled = enabled
+        self._histograms: Dict[str, _PhaseHistogram] = {}
+        self._lock = threading.Lock()
+
+    def time_call(self) -> CallTimer:
+        """Start timing the phases of one call.
+
+        Returns:
+            A call timer, which adds its durations to the phase timer when it is stopped.
+        """
+        return CallTimer(self) if self.enabled else _DISABLED_CALL_TIMER
+
+    def format_summary(self) -> str:
+        """Format the distribution of the duration of each phase as a table.
+
+        The percentiles are the upper bounds of the histogram buckets that they fall in.
+
+        Returns:
+            One line per phase in the order in which the phases first occurred, or an empty
+            string if no call was timed.
+        """
+        with self._lock:
+            histograms = list(self._histograms.items())
+        if not histograms:
+            return ""
+        width = max(len("Phase"), *(len(phase) for phase, _ in histograms))
+        lines = [
+            f"{'Phase':<{width}} {'Count':>8} {'Mean':>10} {'p50':>10} {'p99':>10} {'Max':>10}"
+        ]
+        for phase, histogram in histograms:
+            durations = [
+                histogram.sum / histogram.count,
+                histogram.percentile(0.5),
+                histogram.percentile(0.99),
+                histogram.max,
+            ]
+            lines.append(
+                f"{phase:<{width}} {histogram.count:>8} "
+                + " ".join(f"{duration * 1e3:>7.3f} ms" for duration in durations)
+            )
+        return "\n".join(lines)
+
+    def _add(self, durations: Dict[str, float]) -> None:
+        with self._lock:
+            for phase, duration in durations.items():
+                histogram = self._histograms.get(phase)
+                if histogram is None:
+                    histogram = self._histograms[phase] = _PhaseHistogram()
+                histogram.observe(duration)
+
+
+class CallTimer:
+    """Records the monotonic time at which each phase of one call starts.
+
+    Each phase lasts until the next phase starts or the call ends. A phase that is marked more
+    than once in a call, such as a phase in a loop, adds up its durations.
+    """
+
+    def __init__(self, phase_timer: Optional[PhaseTimer]) -> None:
+        """Initialize the call timer.
+
+        Args:
+            phase_timer: The phase timer to add the durations to when the call ends.
+        """
+        self._phase_timer = phase_timer
+        self._durations: Dict[str, float] = {}
+        self._phase = ""
+        self._phase_start_time = 0.0
+
+    @property
+    def durations(self) -> Dict[str, float]:
+        """The time in seconds that each finished phase took."""
+        return dict(self._durations)
+
+    def mark(self, phase: str) -> None:
+        """End the current phase and start the next one.
+
+        Args:
+            phase: The name of the next phase. If this is empty, no phase is started.
+        """
+        now = time.perf_counter()
+        if self._phase:
+            self._durations[self._phase] = (
+                self._durations.get(self._phase, 0.0) + now - self._phase_start_time
+            )
+        self._phase = phase
+        self._phase_start_time = now
+
+    def stop(self) -> None:
+        """End the current phase and add the durations of the call to the phase timer."""
+        self.mark("")
+        if self._phase_timer is not None:
+            self._phase_timer._add(self._durations)
+
+
+class _DisabledCallTimer(CallTimer):
+    @property
+    def durations(self) -> Dict[str, float]:
+        return {}
+
+    def mark(self, phase: str) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+_DISABLED_CALL_TIMER = _DisabledCallTimer(None)
+
+
+class _PhaseHistogram:
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, duration: float) -> None:
+        self.counts[bisect.bisect_left(_BUCKET_BOUNDS, duration)] += 1
+        self.count += 1
+        self.sum += duration
+        self.max = max(self.max, duration)
+
+    def percentile(self, fraction: float) -> float:
+        rank = fraction * self.count
+        cumulative_count = 0
+        for bound, count in zip(_BUCKET_BOUNDS, self.counts):
+            cumulative_count += count
+            if cumulative_count >= rank:
+                return min(bound, self.max)
+        return self.max
@@ -0,0 +1,260 @@
+"""A pool that keeps instrument sessions open between measurements."""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from ni_measurement_plugin_sdk_service.session_management import (
+    SessionInformation,
+    TypedSessionInformation,
+)
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IDLE_TIME = 300.0
+
+_TSession = TypeVar("_TSession")
+
+_PoolKey = Tuple[Tuple[str, str, str], ...]
+
+
+class PooledSessions(Generic[_TSession]):
+    """Initialized sessions that were acquired from a session pool."""
+
+    def __init__(
+        self,
+        session_infos: Sequence[TypedSessionInformation[_TSession]],
+        *,
+        pooled: bool,
+        properties: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """Initialize the pooled sessions. Use :meth:`SessionPool.acquire` instead."""
+        self.session_infos = session_infos
+        self.pooled = pooled
+        self._properties = properties if properties is not None else {}
+
+    def changed_properties(self, session_name: str, properties: Mapping[str, Any]) -> List[str]:
+        """Get the properties that differ from the values applied by a previous measurement.
+
+        The properties are recorded as applied, so apply every returned property before
+        releasing the sessions.
+
+        Args:
+            session_name: The session that the properties apply to.
+            properties: The property names and values that the measurement needs.
+
+        Returns:
+            The names of the properties to apply, in the order of ``properties``. If the
+            sessions are not pooled, this is every property.
+        """
+        applied = self._properties.setdefault(session_name, {})
+        changed = [
+            name
+            for name, value in properties.items()
+            if name not in applied or applied[name] != value
+        ]
+        applied.update((name, properties[name]) for name in changed)
+        return changed
+
+
+class _PoolEntry(Generic[_TSession]):
+    def __init__(self, stack: contextlib.ExitStack, sessions: Dict[str, _TSession]) -> None:
+        self.stack = stack
+        self.sessions = sessions
+        self.properties: Dict[str, Dict[str, Any]] = {}
+        self.in_use = False
+        self.last_used = 0.0
+
+
+class SessionPool(Generic[_TSession]):
+    """Keeps initialized instrument sessions open between measurements.
+
+    Outside of TestStand, every measurement would otherwise initialize and close its sessions.
+    The pool keys the sessions by pin map ID and by the session names, resource names and channel
+    lists of the reservation. It closes every session when the pin map changes and closes
+    sessions that have been idle for longer than max_idle_time.
+
+    Sessions that TestStand registered with the session management service are shared with
+    other measurements, so they are never pooled.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_idle_time: float = DEFAULT_MAX_IDLE_TIME,
+        reset_session: Callable[[_TSession], None] = lambda session: None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the session pool.
+
+        Args:
+            max_idle_time: The time in seconds after which an unused session is closed.
+            reset_session: Returns a session to a safe state before it is closed.
+            clock: The monotonic clock to measure idle time with.
+        """
+        self._max_idle_time = max_idle_time
+        self._reset_session = reset_session
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[_PoolKey, _PoolEntry[_TSession]] = {}
+        self._pin_map_id = ""
+        self._timer: Optional[threading.Timer] = None
+
+    @contextlib.contextmanager
+    def acquire(
+        self,
+        pin_map_id: str,
+        session_infos: Sequence[SessionInformation],
+        initialize_sessions: Callable[
+            [], ContextManager[Sequence[TypedSessionInformation[_TSession]]]
+        ],
+    ) -> Iterator[PooledSessions[_TSession]]:
+        """Acquire initialized sessions for a reservation.
+
+        Args:
+            pin_map_id: The ID of the pin map that the sessions were reserved with.
+            session_infos: The reserved sessions, without driver sessions.
+            initialize_sessions: Initializes the driver sessions of the reservation, such as
+                reservation.initialize_nidcpower_sessions.
+
+        Returns:
+            A context manager that yields the sessions. If the body raises an exception, the
+            sessions are closed, because their state is unknown.
+        """
+        if any(session_info.session_exists for session_info in session_infos):
+            with initialize_sessions() as initialized_session_infos:
+                yield PooledSessions(initialized_session_infos, pooled=False)
+            return
+
+        key = tuple(
+            (session_info.session_name, session_info.resource_name, session_info.channel_list)
+            for session_info in session_infos
+        )
+        entry = self._take_entry(pin_map_id, key, initialize_sessions)
+        try:
+            yield PooledSessions(
+                [
+                    cast(
+                        TypedSessionInformation[_TSession],
+                        session_info._replace(session=entry.sessions[session_info.session_name]),
+                    )
+                    for session_info in session_infos
+                ],
+                pooled=True,
+                properties=entry.properties,
+            )
+        except BaseException:
+            self._close_entry(entry)
+            with self._lock:
+                self._entries.pop(key, None)
+            raise
+        with self._lock:
+            entry.in_use = False
+            entry.last_used = self._clock()
+            self._schedule_eviction()
+
+    def close(self) -> None:
+        """Close every session in the pool."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for entry in entries:
+            self._close_entry(entry)
+
+    def evict_idle(self) -> None:
+        """Close the sessions that have been idle for longer than max_idle_time."""
+        with self._lock:
+            self._timer = None
+            evicted = self._pop_idle_entries()
+            self._schedule_eviction()
+        for entry in evicted:
+            self._close_entry(entry)
+
+    def _take_entry(
+        self,
+        pin_map_id: str,
+        key: _PoolKey,
+        initialize_sessions: Callable[
+            [], ContextManager[Sequence[TypedSessionInformation[_TSession]]]
+        ],
+    ) -> _PoolEntry[_TSession]:
+        with self._lock:
+            evicted = self._pop_idle_entries()
+            if pin_map_id != self._pin_map_id:
+                # The instruments and channels of the pins may have changed.
+                evicted.extend(entry for entry in self._entries.values() if not entry.in_use)
+                self._entries = {k: v for k, v in self._entries.items() if v.in_use}
+                self._pin_map_id = pin_map_id
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.in_use:
+                    raise RuntimeError("The pooled sessions are already in use.")
+                entry.in_use = True
+        for evicted_entry in evicted:
+            self._close_entry(evicted_entry)
+        if entry is not None:
+            return entry
+
+        stack = contextlib.ExitStack()
+        try:
+            initialized_session_infos = stack.enter_context(initialize_sessions())
+        except BaseException:
+            stack.close()
+            raise
+        entry = _PoolEntry(
+            stack,
+            {
+                session_info.session_name: session_info.session
+                for session_info in initialized_session_infos
+            },
+        )
+        entry.in_use = True
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _pop_idle_entries(self) -> List[_PoolEntry[_TSession]]:
+        now = self._clock()
+        idle_keys = [
+            key
+            for key, entry in self._entries.items()
+            if not entry.in_use and now - entry.last_used >= self._max_idle_time
+        ]
+        return [self._entries.pop(key) for key in idle_keys]
+
+    def _schedule_eviction(self) -> None:
+        if self._timer is not None or not self._entries:
+            return
+        self._timer = threading.Timer(self._max_idle_time, self.evict_idle)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _close_entry(self, entry: _PoolEntry[_TSession]) -> None:
+        try:
+            for session in entry.sessions.values():
+                self._reset_session(session)
+        except Exception:
+            _logger.exception("Failed to reset a pooled session.")
+        finally:
+            entry.stack.close()
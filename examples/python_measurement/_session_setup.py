@@ -0,0 +1,233 @@
+"""Initialize and close the sessions of independent instruments concurrently."""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple, TypeVar
+
+from ni_measurement_plugin_sdk_service.session_management import SessionInformation
+
+_logger = logging.getLogger(__name__)
+
+_TSession = TypeVar("_TSession")
+
+
+class SessionTiming(NamedTuple):
+    """The time that it took to initialize or close a session."""
+
+    session_name: str
+    resource_name: str
+    duration: float
+    """The time in seconds."""
+
+
+def group_by_instrument(
+    session_infos: Sequence[SessionInformation],
+) -> List[List[SessionInformation]]:
+    """Group the sessions that share an instrument.
+
+    The sessions of different groups use different instruments, so they can be initialized
+    and closed concurrently. The sessions of a group are handled one after another.
+
+    Args:
+        session_infos: The sessions. The instruments of a session are the parts before the
+            first slash of the comma-separated names in its resource name, such as PXI1Slot2
+            in PXI1Slot2/0.
+
+    Returns:
+        The groups, in the order of their first session.
+    """
+    # Union-find over the sessions, whose root is the first session of each group.
+    parents = list(range(len(session_infos)))
+
+    def find_root(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    first_session_of_instrument: Dict[str, int] = {}
+    for index, session_info in enumerate(session_infos):
+        for instrument in _get_instruments(session_info.resource_name):
+            root = find_root(first_session_of_instrument.setdefault(instrument, index))
+            other_root = find_root(index)
+            parents[max(root, other_root)] = min(root, other_root)
+
+    groups: Dict[int, List[SessionInformation]] = {}
+    for index, session_info in enumerate(session_infos):
+        groups.setdefault(find_root(index), []).append(session_info)
+    return list(groups.values())
+
+
+def initialize_sessions(
+    session_infos: Sequence[SessionInformation],
+    session_constructor: Callable[[SessionInformation], _TSession],
+    close_session: Callable[[_TSession], None],
+    max_workers: int = 1,
+) -> Tuple[List[_TSession], List[SessionTiming]]:
+    """Initialize the sessions of independent instruments on a thread pool.
+
+    If a session fails to initialize, the sessions that haven't started initializing are
+    skipped, and the sessions that were initialized are closed, so none are left behind on the
+    instruments or the NI gRPC Device Server.
+
+    Args:
+        session_infos: The sessions to initialize.
+        session_constructor: Initializes the driver session of a session, such as the NI-DCPower
+            session constructor of the session management client.
+        close_session: Closes a driver session after a failure.
+        max_workers: The maximum number of instruments to initialize at once. With 1, the
+            sessions are initialized one after another.
+
+    Returns:
+        The driver sessions, in the order of session_infos, and the time that each took.
+
+    Raises:
+        Exception: The first exception raised by session_constructor.
+    """
+    sessions: Dict[str, _TSession] = {}
+    timings: List[SessionTiming] = []
+    lock = threading.Lock()
+    failed = threading.Event()
+
+    def initialize_group(group: Sequence[SessionInformation]) -> None:
+        for session_info in group:
+            if failed.is_set():
+                return
+            start_time = time.perf_counter()
+            try:
+                session = session_constructor(session_info)
+            except BaseException:
+                # Stop the other groups after their current session.
+                failed.set()
+                raise
+            timing = _get_timing(session_info, start_time)
+            with lock:
+                sessions[session_info.session_name] = session
+                timings.append(timing)
+
+    try:
+        _run_groups(group_by_instrument(session_infos), initialize_group, max_workers)
+    except BaseException:
+        for session_name, session in sessions.items():
+            try:
+                close_session(session)
+            except Exception:
+                _logger.exception("Failed to close the session %s.", session_name)
+        raise
+    return (
+        [sessions[session_info.session_name] for session_info in session_infos],
+        _sort_timings(timings, session_infos),
+    )
+
+
+def close_sessions(
+    session_infos: Sequence[SessionInformation],
+    close_session: Callable[[SessionInformation], None],
+    max_workers: int = 1,
+) -> List[SessionTiming]:
+    """Close the sessions of independent instruments on a thread pool.
+
+    If a session fails to close, the other sessions are still closed.
+
+    Args:
+        session_infos: The sessions to close.
+        close_session: Closes a session, for example by attaching to it and closing it.
+        max_workers: The maximum number of instruments to close at once. With 1, the sessions
+            are closed one after another.
+
+    Returns:
+        The time that each session took to close, in the order of session_infos.
+
+    Raises:
+        Exception: The first exception raised by close_session, after the other sessions are
+            closed.
+    """
+    timings: List[SessionTiming] = []
+    errors: List[BaseException] = []
+    lock = threading.Lock()
+
+    def close_group(group: Sequence[SessionInformation]) -> None:
+        for session_info in group:
+            start_time = time.perf_counter()
+            try:
+                close_session(session_info)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            timing = _get_timing(session_info, start_time)
+            with lock:
+                timings.append(timing)
+
+    _run_groups(group_by_instrument(session_infos), close_group, max_workers)
+    if errors:
+        for error in errors[1:]:
+            _logger.error("Failed to close a session.", exc_info=error)
+        raise errors[0]
+    return _sort_timings(timings, session_infos)
+
+
+def format_timings(timings: Sequence[SessionTiming]) -> str:
+    """Format the time that each session took, one session per line.
+
+    Args:
+        timings: The timings, such as returned by initialize_sessions.
+
+    Returns:
+        The formatted timings.
+    """
+    return "\n".join(
+        f"{timing.session_name} ({timing.resource_name}): {timing.duration * 1e3:.1f} ms"
+        for timing in timings
+    )
+
+
+def _run_groups(
+    groups: Sequence[Sequence[SessionInformation]],
+    run_group: Callable[[Sequence[SessionInformation]], None],
+    max_workers: int,
+) -> None:
+    if max_workers <= 1 or len(groups) <= 1:
+        for group in groups:
+            run_group(group)
+        return
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(max_workers, len(groups)), thread_name_prefix="SessionSetup"
+    ) as executor:
+        futures = [executor.submit(run_group, group) for group in groups]
+        done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+        for future in futures:
+            error = future.exception() if future in done else None
+            if error is not None:
+                # Skip the groups that haven't started. Leaving the with statement waits for
+                # the groups that have.
+                for other in futures:
+                    other.cancel()
+                raise error
+
+
+def _get_instruments(resource_name: str) -> List[str]:
+    return [
+        resource.strip().split("/", 1)[0]
+        for resource in resource_name.split(",")
+        if resource.strip()
+    ]
+
+
+def _get_timing(session_info: SessionInformation, start_time: float) -> SessionTiming:
+    return SessionTiming(
+        session_info.session_name,
+        session_info.resource_name,
+        time.perf_counter() - start_time,
+    )
+
+
+def _sort_timings(
+    timings: List[SessionTiming], session_infos: Sequence[SessionInformation]
+) -> List[SessionTiming]:
+    order = {session_info.session_name: i for i, session_info in enumerate(session_infos)}
+    return sorted(timings, key=lambda timing: order[timing.session_name])
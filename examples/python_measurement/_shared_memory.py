@@ -0,0 +1,170 @@
+"""The client side of a ring buffer in shared memory that the Logger service drains.
+
+The Logger service creates the ring buffer when the client calls OpenSharedMemory. Its layout
+and the protocol for closing it are described in json_logger/shared_memory.py.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+_MAGIC = int.from_bytes(b"LOGSHM01", "little")
+_HEADER_SIZE = 128
+_TOKEN_OFFSET = 56
+_TOKEN_SIZE = 16
+
+_MAGIC_WORD = 0
+_CAPACITY_WORD = 1
+_HEAD_WORD = 2
+_TAIL_WORD = 3
+_CLIENT_STATE_WORD = 4
+_SERVER_STATE_WORD = 5
+_HEARTBEAT_WORD = 6
+
+_CLIENT_CLOSED = 1
+_SERVER_OPEN = 0
+_SERVER_CLOSED = 2
+
+_RECORD_HEADER = struct.Struct("=I4x")
+
+# The Logger service updates the heartbeat at least every 20 ms while it drains the ring.
+_HEARTBEAT_TIMEOUT_NS = 5 * 1000 * 1000 * 1000
+
+_POLL_INTERVAL = 0.0005
+
+
+class SharedMemoryWriter:
+    """Writes serialized log requests into a ring buffer that the Logger service drains.
+
+    The writer is not thread-safe.
+    """
+
+    def __init__(self, name: str, capacity: int, token: bytes) -> None:
+        """Open the ring buffer.
+
+        Args:
+            name: The name of the shared memory block, from the OpenSharedMemory response.
+            capacity: The capacity of the ring buffer, from the OpenSharedMemory response.
+            token: The token of the ring buffer, from the OpenSharedMemory response.
+
+        Raises:
+            OSError: If the shared memory block can't be opened, for example because the Logger
+                service runs on another host.
+            ValueError: If the shared memory block is not the ring buffer that the Logger service
+                described.
+        """
+        self._memory = _open_shared_memory(name)
+        try:
+            buffer = self._memory.buf
+            assert buffer is not None
+            if self._memory.size < _HEADER_SIZE + capacity:
+                raise ValueError(f"The shared memory block {name} is too small.")
+            self._header = buffer[:_HEADER_SIZE].cast("Q")
+            self._data = buffer[_HEADER_SIZE : _HEADER_SIZE + capacity]
+            if (
+                self._header[_MAGIC_WORD] != _MAGIC
+                or self._header[_CAPACITY_WORD] != capacity
+                or bytes(buffer[_TOKEN_OFFSET : _TOKEN_OFFSET + _TOKEN_SIZE]) != token
+            ):
+                self._release()
+                raise ValueError(f"The shared memory block {name} is not the expected ring.")
+        except BaseException:
+            self._memory.close()
+            raise
+        self._capacity = capacity
+        self._tail = self._header[_TAIL_WORD]
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """Whether the Logger service closed the ring or stopped draining it."""
+        return self._closed
+
+    def write(self, payload: bytes, timeout: float) -> bool:
+        """Write a serialized log request, waiting while the ring is full.
+
+        Args:
+            payload: The serialized log request.
+            timeout: The maximum time in seconds to wait for room in the ring.
+
+        Returns:
+            False if the request was not delivered, because it doesn't fit in the ring, the ring
+            stayed full for longer than the timeout, or the ring is closed. Send the request
+            another way. If the ring is closed, open a new one.
+        """
+        size = (_RECORD_HEADER.size + len(payload) + 7) & ~7
+        if size > self._capacity or not self._is_server_open():
+            return False
+        deadline = None
+        while self._tail + size - self._header[_HEAD_WORD] > self._capacity:
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() >= deadline:
+                return False
+            time.sleep(_POLL_INTERVAL)
+            if not self._is_server_open():
+                return False
+
+        start = self._tail % self._capacity
+        _RECORD_HEADER.pack_into(self._data, start, len(payload))
+        self._copy(start + _RECORD_HEADER.size, payload)
+        end = self._tail + size
+        # Publish the record only after it is written.
+        self._header[_TAIL_WORD] = end
+        self._tail = end
+
+        if self._header[_SERVER_STATE_WORD] != _SERVER_OPEN:
+            # The Logger service is closing the ring and may have stopped reading before this
+            # record, which it tells by the head once the ring is closed.
+            self._closed = True
+            while self._header[_SERVER_STATE_WORD] != _SERVER_CLOSED:
+                if self._is_server_gone():
+                    return False
+                time.sleep(_POLL_INTERVAL)
+            return self._header[_HEAD_WORD] >= end
+        return True
+
+    def close(self) -> None:
+        """Tell the Logger service that no more requests will be written and detach."""
+        if self._header[_SERVER_STATE_WORD] == _SERVER_OPEN:
+            self._header[_CLIENT_STATE_WORD] = _CLIENT_CLOSED
+        self._closed = True
+        self._release()
+        self._memory.close()
+
+    def _is_server_open(self) -> bool:
+        if self._header[_SERVER_STATE_WORD] != _SERVER_OPEN or self._is_server_gone():
+            self._closed = True
+        return not self._closed
+
+    def _is_server_gone(self) -> bool:
+        return time.time_ns() - self._header[_HEARTBEAT_WORD] > _HEARTBEAT_TIMEOUT_NS
+
+    def _copy(self, start: int, data: bytes) -> None:
+        # The data wraps around from the end of the ring to its start.
+        start %= self._capacity
+        first = min(len(data), self._capacity - start)
+        self._data[start : start + first] = data[:first]
+        if first < len(data):
+            self._data[: len(data) - first] = data[first:]
+
+    def _release(self) -> None:
+        self._header.release()
+        self._data.release()
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    memory = shared_memory.SharedMemory(name)
+    if os.name == "posix":
+        # Before Python 3.13, opening a shared memory block registers it with the resource
+        # tracker, which unlinks it when this process exits. The Logger service owns it.
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister("/" + memory.name, "shared_memory")
+    return memory
@@ -0,0 +1,266 @@
+"""A memory-mapped ring file that holds log requests until they are sent."""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import pathlib
+import struct
+import uuid
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_CAPACITY = 64 * 1024 * 1024
+
+_MAGIC = b"LSPL"
+_VERSION = 1
+# magic, version, capacity, head, tail, next sequence number, producer ID
+_HEADER = struct.Struct("<4sIQQQQ16s")
+_HEADER_SIZE = 64
+_HEAD_OFFSET = 16
+_TAIL_OFFSET = 24
+_NEXT_SEQUENCE_NUMBER_OFFSET = 32
+# payload length, sequence number
+_RECORD_HEADER = struct.Struct("<IQ")
+
+PathType = Union[str, "os.PathLike[str]"]
+
+
+class SpoolRecord(NamedTuple):
+    """A record read from a spool."""
+
+    sequence_number: int
+    payload: bytes
+
+
+class Spool:
+    """A fixed-size ring file of records, each numbered with the next sequence number.
+
+    The records are appended at the tail and removed from the head once they are acknowledged,
+    so the spool never uses more disk space than its capacity. The head, tail and next sequence
+    number are stored in the file header, so the records that were not acknowledged survive a
+    restart of the process. They are not synced to disk, so a power failure may lose the most
+    recent records.
+
+    The sequence numbers continue across restarts and, together with the producer ID, identify
+    each record. If the file is corrupt, it is reset with a new producer ID.
+
+    The spool is not thread-safe, and only one spool may be open on a file at a time.
+    """
+
+    def __init__(self, path: PathType, capacity: int = DEFAULT_SPOOL_CAPACITY) -> None:
+        """Open the spool file, creating it if it doesn't exist.
+
+        Args:
+            path: The spool file.
+            capacity: The number of bytes available for records. If the file already holds
+                records, its capacity is kept until it is empty.
+
+        Raises:
+            ValueError: If the capacity is too small for any record.
+        """
+        if capacity <= _RECORD_HEADER.size:
+            raise ValueError(f"The spool capacity must be more than {_RECORD_HEADER.size} bytes.")
+        self._path = pathlib.Path(path)
+        self._file = open(self._path, "r+b" if self._path.exists() else "w+b")
+        try:
+            header = self._read_header()
+            if header is None:
+                self._reset(capacity)
+            else:
+                self._capacity, self._head, self._tail, self._next_sequence_number = header[:4]
+                self._producer_id = header[4]
+                if self._capacity != capacity and self._head == self._tail:
+                    self._reset(capacity)
+                else:
+                    self._map()
+                    self._recover()
+        except BaseException:
+            self._file.close()
+            raise
+
+    @property
+    def producer_id(self) -> str:
+        """The ID of this spool file, which qualifies the sequence numbers of its records."""
+        return self._producer_id.hex()
+
+    @property
+    def capacity(self) -> int:
+        """The number of bytes available for records."""
+        return self._capacity
+
+    @property
+    def used_bytes(self) -> int:
+        """The number of bytes used by the records that were not acknowledged."""
+        return self._tail - self._head
+
+    @property
+    def empty(self) -> bool:
+        """Whether every record was acknowledged or dropped."""
+        return self._head == self._tail
+
+    def append(self, payload: bytes) -> bool:
+        """Append a record with the next sequence number.
+
+        Args:
+            payload: The record.
+
+        Returns:
+            False if the spool doesn't have room for the record.
+
+        Raises:
+            ValueError: If the record is larger than the spool.
+        """
+        size = _RECORD_HEADER.size + len(payload)
+        if size > self._capacity:
+            raise ValueError(
+                f"The record of {len(payload)} bytes doesn't fit in the spool of "
+                f"{self._capacity} bytes."
+            )
+        if size > self._capacity - (self._tail - self._head):
+            return False
+        sequence_number = self._next_sequence_number
+        self._write(self._tail, _RECORD_HEADER.pack(len(payload), sequence_number))
+        self._write(self._tail + _RECORD_HEADER.size, payload)
+        # Publish the record only after it is written, so that a crash never exposes a partial
+        # record.
+        self._tail += size
+        self._next_sequence_number += 1
+        self._write_position(_NEXT_SEQUENCE_NUMBER_OFFSET, self._next_sequence_number)
+        self._write_position(_TAIL_OFFSET, self._tail)
+        return True
+
+    def read(self, max_records: int) -> Tuple[List[SpoolRecord], int]:
+        """Read the oldest records without removing them.
+
+        Args:
+            max_records: The maximum number of records to read.
+
+        Returns:
+            The records and the position to pass to acknowledge() once they are sent.
+        """
+        records: List[SpoolRecord] = []
+        position = self._head
+        while position < self._tail and len(records) < max_records:
+            length, sequence_number = _RECORD_HEADER.unpack(
+                self._read(position, _RECORD_HEADER.size)
+            )
+            payload = self._read(position + _RECORD_HEADER.size, length)
+            records.append(SpoolRecord(sequence_number, payload))
+            position += _RECORD_HEADER.size + length
+        return records, position
+
+    def acknowledge(self, position: int) -> None:
+        """Remove the records before a position returned by read().
+
+        Args:
+            position: The position after the last record to remove.
+        """
+        if position > self._head:
+            self._head = position
+            self._write_position(_HEAD_OFFSET, self._head)
+
+    def drop_oldest(self) -> bool:
+        """Remove the oldest record without sending it.
+
+        Returns:
+            False if the spool is empty.
+        """
+        if self._head == self._tail:
+            return False
+        (length,) = struct.unpack("<I", self._read(self._head, 4))
+        self.acknowledge(self._head + _RECORD_HEADER.size + length)
+        return True
+
+    def close(self) -> None:
+        """Flush the spool file and close it."""
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
+
+    def _read_header(self) -> Optional[Tuple[int, int, int, int, bytes]]:
+        data = self._file.read(_HEADER.size)
+        if not data:
+            return None
+        if len(data) < _HEADER.size:
+            _logger.warning("The spool file %s is truncated. Resetting it.", self._path)
+            return None
+        magic, version, capacity, head, tail, next_sequence_number, producer_id = _HEADER.unpack(
+            data
+        )
+        file_size = os.fstat(self._file.fileno()).st_size
+        if (
+            magic != _MAGIC
+            or version != _VERSION
+            or file_size != _HEADER_SIZE + capacity
+            or not 0 <= tail - head <= capacity
+        ):
+            _logger.warning("The spool file %s is corrupt. Resetting it.", self._path)
+            return None
+        return capacity, head, tail, next_sequence_number, producer_id
+
+    def _reset(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._head = self._tail = 0
+        self._next_sequence_number = 1
+        # The sequence numbers start over, so the server must not confuse them with the
+        # sequence numbers of the previous producer.
+        self._producer_id = uuid.uuid4().bytes
+        self._file.seek(0)
+        self._file.truncate(_HEADER_SIZE + capacity)
+        self._map()
+        self._mmap[: _HEADER.size] = _HEADER.pack(
+            _MAGIC, _VERSION, capacity, 0, 0, self._next_sequence_number, self._producer_id
+        )
+
+    def _map(self) -> None:
+        self._mmap = mmap.mmap(self._file.fileno(), _HEADER_SIZE + self._capacity)
+
+    def _recover(self) -> None:
+        # Drop the records after the first invalid one, such as a record that was being written
+        # when the spool file was last closed without updating the tail.
+        position = self._head
+        previous_sequence_number = 0
+        while position < self._tail:
+            remaining = self._tail - position
+            length, sequence_number = (
+                _RECORD_HEADER.unpack(self._read(position, _RECORD_HEADER.size))
+                if remaining >= _RECORD_HEADER.size
+                else (remaining, 0)
+            )
+            if (
+                _RECORD_HEADER.size + length > remaining
+                or sequence_number <= previous_sequence_number
+                or sequence_number >= self._next_sequence_number
+            ):
+                _logger.warning(
+                    "Dropped %d corrupt bytes at the end of the spool file %s.",
+                    remaining,
+                    self._path,
+                )
+                self._tail = position
+                self._write_position(_TAIL_OFFSET, self._tail)
+                break
+            previous_sequence_number = sequence_number
+            position += _RECORD_HEADER.size + length
+
+    def _write_position(self, offset: int, value: int) -> None:
+        struct.pack_into("<Q", self._mmap, offset, value)
+
+    def _write(self, position: int, data: bytes) -> None:
+        # The data wraps around from the end of the ring to its start.
+        start = position % self._capacity
+        first = min(len(data), self._capacity - start)
+        self._mmap[_HEADER_SIZE + start : _HEADER_SIZE + start + first] = data[:first]
+        if first < len(data):
+            self._mmap[_HEADER_SIZE : _HEADER_SIZE + len(data) - first] = data[first:]
+
+    def _read(self, position: int, length: int) -> bytes:
+        start = position % self._capacity
+        first = min(length, self._capacity - start)
+        data = self._mmap[_HEADER_SIZE + start : _HEADER_SIZE + start + first]
+        if first < length:
+            data += self._mmap[_HEADER_SIZE : _HEADER_SIZE + length - first]
+        return data
@@ -0,0 +1,113 @@
+"""Run a voltage sweep as a hardware-timed sequence and fetch its records as they arrive."""
+
+from __future__ import annotations
+
+from typing import Any, Iterator, List, NamedTuple, Protocol, Sequence
+
+from _wait import EventWaiter
+
+
+class SweepChannel(Protocol):
+    """One channel of an instrument session that fetches the records of a sequence."""
+
+    @property
+    def fetch_backlog(self) -> int:
+        """The number of records that are ready to fetch."""
+
+    def fetch_multiple(self, count: int, timeout: float) -> List[Any]:
+        """Fetch records, which have voltage, current and in_compliance fields."""
+
+
+class ChannelRecord(NamedTuple):
+    """A record that a channel of a site and pin measured at one point of the sweep."""
+
+    site: int
+    pin: str
+    voltage: float
+    current: float
+    in_compliance: bool
+
+
+class SweepPoint(NamedTuple):
+    """The records of every site and pin at one point of the sweep."""
+
+    point_index: int
+    voltage_level: float
+    records: List[ChannelRecord]
+
+
+class SweepChannelMapping(NamedTuple):
+    """The site and pin of a sweep channel."""
+
+    site: int
+    pin: str
+    channel: SweepChannel
+
+
+def fetch_sweep(
+    channel_mappings: Sequence[SweepChannelMapping],
+    voltage_levels: Sequence[float],
+    waiter: EventWaiter,
+    *,
+    source_delay: float,
+    timeout: float,
+) -> Iterator[SweepPoint]:
+    """Fetch the records of a running sweep and yield each point once every channel measured it.
+
+    Each channel fetches all of the records that are ready with one fetch_multiple call, so a
+    sweep that finishes before the first fetch takes one call per channel, and a slow sweep
+    yields its points as they are measured.
+
+    Args:
+        channel_mappings: The channel of each site and pin, which must be initiated with a
+            sequence of voltage_levels that measures after each step.
+        voltage_levels: The voltage levels of the sequence.
+        waiter: Waits for records and stops early if the measurement is canceled.
+        source_delay: The source delay of each step in seconds, which is how long a record is
+            expected to take.
+        timeout: The time in seconds to wait for a channel to measure each point.
+
+    Returns:
+        An iterator of the points in the order of voltage_levels.
+
+    Raises:
+        TimeoutError: If a channel doesn't measure a point within the timeout.
+    """
+    if not channel_mappings:
+        return
+    point_count = len(voltage_levels)
+    records: List[List[Any]] = [[] for _ in channel_mappings]
+    yielded_count = 0
+    while yielded_count < point_count:
+        for mapping, channel_records in zip(channel_mappings, records):
+            remaining = point_count - len(channel_records)
+            if remaining == 0:
+                continue
+            if len(channel_records) == yielded_count:
+                # This channel holds back the next point, so wait until it has measured it.
+                waiter.wait_until(
+                    lambda: mapping.channel.fetch_backlog > 0,
+                    timeout,
+                    expected_duration=source_delay,
+                )
+            count = min(mapping.channel.fetch_backlog, remaining)
+            if count:
+                channel_records.extend(mapping.channel.fetch_multiple(count, timeout=timeout))
+
+        ready_count = min(len(channel_records) for channel_records in records)
+        for index in range(yielded_count, ready_count):
+            yield SweepPoint(
+                index,
+                voltage_levels[index],
+                [
+                    ChannelRecord(
+                        mapping.site,
+                        mapping.pin,
+                        channel_records[index].voltage,
+                        channel_records[index].current,
+                        channel_records[index].in_compliance,
+                    )
+                    for mapping, channel_records in zip(channel_mappings, records)
+                ],
+            )
+        yielded_count = ready_count
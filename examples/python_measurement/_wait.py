@@ -0,0 +1,168 @@
+"""An event-driven wait for instrument events that watches cancellation and deadlines."""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Callable, NamedTuple, NoReturn, Protocol
+
+import grpc
+
+DEFAULT_SLICE_MARGIN = 2e-3
+DEFAULT_MAX_SLICE = 20e-3
+
+
+class EventChannels(Protocol):
+    """The channels of an instrument session that can wait for an event."""
+
+    def wait_for_event(self, event_id: Any, timeout: float) -> None:
+        """Wait until the event occurs or raise an exception if the timeout expires."""
+
+
+class WaitResult(NamedTuple):
+    """How long a wait took compared to how long it was expected to take."""
+
+    elapsed: float
+    """The time in seconds from the start of the wait until the event occurred."""
+
+    expected: float
+    """The time in seconds that the event was expected to take, such as the source delay."""
+
+    @property
+    def overshoot(self) -> float:
+        """The time in seconds that the wait took beyond the expected time."""
+        return self.elapsed - self.expected
+
+
+class EventWaiter:
+    """Waits for instrument events in slices so that it can stop waiting early.
+
+    Instrument drivers can't cancel a call to wait_for_event(), so the wait is split into slices.
+    wait_for_event() returns as soon as the event occurs, so the slice length only bounds how
+    late cancellation is noticed. Each slice lasts at most max_slice. Near the expected
+    completion time, the slice ends slice_margin after it, so a short wait that finishes on time
+    takes one slice. No slice extends past the gRPC deadline or the user timeout, which are both
+    measured with one monotonic clock.
+    """
+
+    def __init__(
+        self,
+        cancellation_event: threading.Event,
+        abort: Callable[[grpc.StatusCode, str], None],
+        *,
+        time_remaining: float = math.inf,
+        is_timeout_error: Callable[[Exception], bool],
+        slice_margin: float = DEFAULT_SLICE_MARGIN,
+        max_slice: float = DEFAULT_MAX_SLICE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the event waiter.
+
+        Args:
+            cancellation_event: Set when the client cancels the measurement.
+            abort: Aborts the RPC with a status code and details, such as
+                MeasurementContext.abort.
+            time_remaining: The time in seconds until the gRPC deadline of the measurement.
+            is_timeout_error: Whether an exception raised by wait_for_event() means that the
+                slice expired before the event occurred.
+            slice_margin: The margin in seconds to wait beyond the expected completion time.
+            max_slice: The longest time in seconds to wait for the event at once. This bounds
+                how long it takes to notice cancellation.
+            clock: The monotonic clock to measure time with.
+        """
+        self._cancellation_event = cancellation_event
+        self._abort = abort
+        self._is_timeout_error = is_timeout_error
+        self._slice_margin = slice_margin
+        self._max_slice = max_slice
+        self._clock = clock
+        self._grpc_deadline = clock() + time_remaining
+
+    def wait(
+        self,
+        channels: EventChannels,
+        event_id: Any,
+        timeout: float,
+        expected_duration: float = 0.0,
+    ) -> WaitResult:
+        """Wait for an instrument event.
+
+        Args:
+            channels: The channels to wait on.
+            event_id: The event to wait for.
+            timeout: The time in seconds after which to give up.
+            expected_duration: The time in seconds that the event is expected to take, such as
+                the source delay.
+
+        Returns:
+            How long the wait took compared to expected_duration.
+
+        Raises:
+            TimeoutError: If the event doesn't occur within the timeout.
+        """
+        start_time = self._clock()
+        user_deadline = start_time + timeout
+        expected_time = start_time + expected_duration
+
+        while True:
+            slice_length = self._get_slice_length(user_deadline, expected_time)
+            try:
+                channels.wait_for_event(event_id, timeout=slice_length)
+            except Exception as e:
+                if self._is_timeout_error(e):
+                    continue
+                raise
+            return WaitResult(self._clock() - start_time, expected_duration)
+
+    def wait_until(
+        self,
+        condition: Callable[[], bool],
+        timeout: float,
+        expected_duration: float = 0.0,
+    ) -> WaitResult:
+        """Poll a condition that no instrument event signals, such as a fetch backlog.
+
+        The condition is checked at the start of each slice, so a slice bounds how late the
+        condition is noticed as well as cancellation.
+
+        Args:
+            condition: Returns whether to stop waiting.
+            timeout: The time in seconds after which to give up.
+            expected_duration: The time in seconds that the condition is expected to take to
+                become true.
+
+        Returns:
+            How long the wait took compared to expected_duration.
+
+        Raises:
+            TimeoutError: If the condition doesn't become true within the timeout.
+        """
+        start_time = self._clock()
+        user_deadline = start_time + timeout
+        expected_time = start_time + expected_duration
+
+        while not condition():
+            slice_length = self._get_slice_length(user_deadline, expected_time)
+            self._cancellation_event.wait(slice_length)
+        return WaitResult(self._clock() - start_time, expected_duration)
+
+    def _get_slice_length(self, user_deadline: float, expected_time: float) -> float:
+        now = self._clock()
+        if self._cancellation_event.is_set():
+            self._abort_rpc(grpc.StatusCode.CANCELLED, "Client requested cancellation.")
+        if now >= self._grpc_deadline:
+            self._abort_rpc(grpc.StatusCode.DEADLINE_EXCEEDED, "Deadline exceeded.")
+        if now >= user_deadline:
+            raise TimeoutError("User timeout expired.")
+
+        slice_length = self._max_slice
+        if now < expected_time:
+            slice_length = min(slice_length, expected_time - now + self._slice_margin)
+        return min(slice_length, self._grpc_deadline - now, user_deadline - now)
+
+    def _abort_rpc(self, code: grpc.StatusCode, details: str) -> NoReturn:
+        self._abort(code, details)
+        # abort() raises an exception, so this is only reached if it was replaced by one that
+        # returns.
+        raise RuntimeError(details)
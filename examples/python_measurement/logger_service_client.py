@@ -1,44 +1,911 @@
 """gRPC client for interacting with the Logger service."""
 
-from typing import List, Optional
+from __future__ import annotations
+
+import collections
+import enum
+import ipaddress
+import logging
+import os
+import queue
+import threading
+import time
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import grpc
+from _shared_memory import SharedMemoryWriter
+from _spool import DEFAULT_SPOOL_CAPACITY, Spool
+from google.protobuf.message import DecodeError
 from ni_measurement_plugin_sdk_service.discovery._client import DiscoveryClient
-from stubs.log_measurement_pb2 import LogRequest
+from ni_measurement_plugin_sdk_service.grpc.channelpool import GrpcChannelPool
+from ni_measurement_plugin_sdk_service.grpc.loggers import ClientLogger
+from stubs.log_measurement_pb2 import (
+    ComplianceFilter,
+    GetStatsRequest,
+    GetStatsResponse,
+    GetSummaryRequest,
+    GetSummaryResponse,
+    LogBatchRequest,
+    LogBatchResponse,
+    LogRequest,
+    LogStreamResponse,
+    OpenSharedMemoryRequest,
+    QueryRequest,
+    QueryResponse,
+    SubscribeRequest,
+    SubscribeResponse,
+    Waveform,
+    WaveformDataType,
+)
 from stubs.log_measurement_pb2_grpc import LogMeasurementStub
 
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
 GRPC_LOGGER_SERVICE_INTERFACE_NAME = "user.defined.logger.v1.LogService"
 
 GRPC_LOGGER_SERVICE_CLASS = "user.defined.jsonlogger.v1.LogService"
 
+CLIENT_NAME_METADATA_KEY = "logger-client-name"
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_RESOLVE_TTL = 60.0
+
+# Ping idle connections so that they stay open between sparse calls and a dead connection is
+# detected before the next call. The logger service allows pings at this rate.
+_KEEPALIVE_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+# How long to log through gRPC calls before asking the Logger service for shared memory again,
+# after it refused or the shared memory could not be opened.
+_SHARED_MEMORY_RETRY_INTERVAL = 60.0
+
+_TResponse = TypeVar("_TResponse")
+
+
+class _KeepaliveChannelCache:
+    """Creates one channel per Logger service address, which keeps its idle connection alive.
+
+    The channels to the Logger service are kept apart from the GrpcChannelPool of the discovery
+    client, so that only the Logger service is pinged.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._channels: Dict[str, grpc.Channel] = {}
+
+    def get_channel(self, target: str) -> grpc.Channel:
+        with self._lock:
+            channel = self._channels.get(target)
+            if channel is None:
+                channel = self._channels[target] = _create_keepalive_channel(target)
+            return channel
+
+
+def _create_keepalive_channel(target: str) -> grpc.Channel:
+    # Use the options of the SDK's channels, plus keepalive.
+    options = [
+        ("grpc.max_receive_message_length", -1),
+        ("grpc.max_send_message_length", -1),
+        *_KEEPALIVE_CHANNEL_OPTIONS,
+    ]
+    if _is_local_target(target):
+        options.append(("grpc.enable_http_proxy", 0))
+    channel = grpc.insecure_channel(target, options)
+    if ClientLogger.is_enabled():
+        channel = grpc.intercept_channel(channel, ClientLogger())
+    return channel
+
+
+def _is_local_target(target: str) -> bool:
+    # Such as localhost:50000 or [::1]:50000.
+    host = target.rpartition(":")[0].strip("[]")
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+# Logger service clients in one process share the channel to the Logger service, and the
+# channels to the discovery service.
+_default_channel_pool = GrpcChannelPool()
+_keepalive_channels = _KeepaliveChannelCache()
+
+
+class OverflowPolicy(enum.Enum):
+    """What log_measurement does when the asynchronous queue or the spool is full."""
+
+    BLOCK = 0
+    """Wait until the sender thread makes room in the queue."""
+
+    DROP_OLDEST = 1
+    """Discard the oldest queued measurement to make room."""
+
+    ERROR = 2
+    """Raise queue.Full."""
+
+
+def create_log_request(
+    measured_sites: List[int],
+    measured_pins: List[str],
+    current_measurements: List[float],
+    voltage_measurements: List[float],
+    in_compliance: List[bool],
+    waveforms: Sequence[Waveform] = (),
+    phase_durations: Optional[Mapping[str, float]] = None,
+) -> LogRequest:
+    """Create a LogMeasurement request from the measurement data."""
+    return LogRequest(
+        measured_sites=measured_sites,
+        measured_pins=measured_pins,
+        current_measurements=current_measurements,
+        voltage_measurements=voltage_measurements,
+        in_compliance=in_compliance,
+        waveforms=waveforms,
+        phase_durations=phase_durations,
+    )
+
+
+def create_waveform(
+    site: int, pin: str, samples: npt.ArrayLike, *, t0: float = 0.0, dt: float = 0.0
+) -> Waveform:
+    """Create a waveform whose samples are packed into bytes instead of repeated doubles.
+
+    Packed samples are copied into the request with one memcpy and decoded by the Logger service
+    without a copy, so large waveforms cost far less than repeated fields.
+
+    Args:
+        site: The site that the waveform was measured on.
+        pin: The pin that the waveform was measured on.
+        samples: The samples. float32 arrays are sent as 32-bit floats and anything else as
+            64-bit floats.
+        t0: The time in seconds of the first sample.
+        dt: The time in seconds between samples.
+
+    Returns:
+        The waveform to pass to log_measurement().
+    """
+    # Import NumPy on demand, because it takes a while to import and only waveforms need it.
+    import numpy as np
+
+    array = np.asarray(samples)
+    if array.dtype == np.float32:
+        data_type, dtype = WaveformDataType.WAVEFORM_DATA_TYPE_FLOAT32, "<f4"
+    else:
+        data_type, dtype = WaveformDataType.WAVEFORM_DATA_TYPE_FLOAT64, "<f8"
+    return Waveform(
+        site=site,
+        pin=pin,
+        data_type=data_type,
+        t0=t0,
+        dt=dt,
+        samples=np.ascontiguousarray(array, dtype=dtype).tobytes(),
+    )
+
 
 class LoggerServiceClient:
-    """Client for the Logger gRPC service."""
+    """Client for the Logger gRPC service.
+
+    In asynchronous mode, log_measurement only queues the measurement. A background sender
+    thread sends the queued measurements to the Logger service in batches, so the caller does
+    not wait for the Logger service. Call close() before exiting to send the measurements that
+    are still queued.
+
+    The resolved location of the Logger service is cached for resolve_ttl seconds. If a call
+    fails with UNAVAILABLE, the client resolves the Logger service again and retries the call
+    once, so it recovers when the Logger service restarts on a different port.
+
+    With a spool file, log_measurement appends the measurement to a memory-mapped ring file
+    instead of an in-memory queue, and a background thread sends the spooled measurements in
+    batches until the Logger service acknowledges them. If a batch fails, for example because
+    the Logger service is restarting, it is sent again after a back-off, and measurements that
+    are still spooled when the process exits are sent by the next client that opens the spool.
+    Each spooled measurement carries the spool's producer ID and a sequence number, so the
+    Logger service drops the measurements that it receives more than once. Use a separate
+    spool file for each measurement service.
+
+    With shared memory, log_measurement writes the measurement into a ring buffer in shared
+    memory that the Logger service drains, instead of calling Log. The client asks the Logger
+    service for the ring buffer on first use. If the Logger service runs on another host, is too
+    old or has shared memory disabled, or the ring buffer stays full, the measurement is sent
+    with a Log call instead. Like in asynchronous mode, log_measurement returns before the
+    measurement is logged, and the Logger service logs invalid measurements as errors instead
+    of returning them.
+    """
 
     def __init__(
         self,
         *,
-        discovery_client: DiscoveryClient = DiscoveryClient(),
+        discovery_client: Optional[DiscoveryClient] = None,
+        grpc_channel_pool: Optional[GrpcChannelPool] = None,
+        resolve_ttl: float = DEFAULT_RESOLVE_TTL,
+        client_name: str = "",
+        asynchronous: bool = False,
+        max_queue_size: int = 10000,
+        max_batch_size: int = 500,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        spool_path: Optional[Union[str, os.PathLike[str]]] = None,
+        spool_capacity: int = DEFAULT_SPOOL_CAPACITY,
+        shared_memory: bool = False,
+        shared_memory_capacity: int = 0,
     ) -> None:
-        """Initialize the Logger Service client."""
+        """Initialize the Logger Service client.
+
+        Args:
+            discovery_client: The client used to resolve the Logger service. By default, a
+                discovery client is created on first use.
+            grpc_channel_pool: The pool that provides the channels of the discovery client
+                that is created by default. By default, the channels are shared with other Logger
+                service clients. The channel to the Logger service itself is always shared with
+                other Logger service clients, because it keeps its connection alive.
+            resolve_ttl: The time in seconds after which the Logger service is resolved again.
+            client_name: The name that identifies the calling measurement service to the Logger
+                service, for example to log each measurement service to a separate file.
+            asynchronous: Whether to queue measurements and send them from a background thread.
+            max_queue_size: The maximum number of measurements queued in asynchronous mode.
+            max_batch_size: The maximum number of queued measurements sent in one LogBatch call.
+            overflow_policy: What log_measurement does when the queue or the spool is full.
+            spool_path: The spool file to send measurements through. If this is given,
+                measurements are spooled whether or not asynchronous is set.
+            spool_capacity: The maximum number of bytes of measurements in the spool file.
+            shared_memory: Whether to send measurements through shared memory when the Logger
+                service runs on the same host. It is ignored in asynchronous mode or with a
+                spool.
+            shared_memory_capacity: The number of bytes of the shared memory ring buffer. If
+                this is 0, the Logger service chooses.
+        """
         self._discovery_client = discovery_client
+        self._grpc_channel_pool = (
+            grpc_channel_pool if grpc_channel_pool is not None else _default_channel_pool
+        )
+        self._resolve_ttl = resolve_ttl
+        self._stub_lock = threading.Lock()
         self._stub: Optional[LogMeasurementStub] = None
+        self._resolved_time = 0.0
+        self._metadata = ((CLIENT_NAME_METADATA_KEY, client_name),) if client_name else None
+        self._shared_memory = shared_memory
+        self._shared_memory_capacity = shared_memory_capacity
+        self._shared_memory_lock = threading.Lock()
+        self._shared_memory_writer: Optional[SharedMemoryWriter] = None
+        self._shared_memory_retry_time = 0.0
+        self._sender: Optional[Union[_AsyncSender, _SpoolSender]] = None
+        if spool_path is not None:
+            self._sender = _SpoolSender(
+                Spool(spool_path, spool_capacity),
+                self.log_measurements,
+                max_batch_size,
+                overflow_policy,
+            )
+        elif asynchronous:
+            self._sender = _AsyncSender(
+                self.log_measurements, max_queue_size, max_batch_size, overflow_policy
+            )
 
     def _get_stub(self) -> LogMeasurementStub:
-        """Create a gRPC stub for the Logger service."""
-        if self._stub is None:
-            # Resolve the service location using the discovery client.
-            logger_service_location = self._discovery_client.resolve_service(
-                provided_interface=str(GRPC_LOGGER_SERVICE_INTERFACE_NAME),
-                service_class=str(GRPC_LOGGER_SERVICE_CLASS),
+        """Get a gRPC stub for the Logger service, resolving the service if necessary."""
+        with self._stub_lock:
+            if self._stub is None or time.monotonic() - self._resolved_time >= self._resolve_ttl:
+                if self._discovery_client is None:
+                    self._discovery_client = DiscoveryClient(
+                        grpc_channel_pool=self._grpc_channel_pool
+                    )
+
+                # Resolve the service location using the discovery client.
+                logger_service_location = self._discovery_client.resolve_service(
+                    provided_interface=str(GRPC_LOGGER_SERVICE_INTERFACE_NAME),
+                    service_class=str(GRPC_LOGGER_SERVICE_CLASS),
+                )
+
+                # Get a shared gRPC channel to the resolved service location.
+                channel = _keepalive_channels.get_channel(logger_service_location.insecure_address)
+
+                # Create a gRPC stub for the Logger service.
+                self._stub = LogMeasurementStub(channel)
+                self._resolved_time = time.monotonic()
+            return self._stub
+
+    def _invalidate_stub(self, stub: LogMeasurementStub) -> None:
+        with self._stub_lock:
+            if self._stub is stub:
+                self._stub = None
+
+    def _call_with_retry(self, call: Callable[[LogMeasurementStub], _TResponse]) -> _TResponse:
+        # If the Logger service is unavailable, it may have restarted on a different port, so
+        # resolve it again and retry once.
+        stub = self._get_stub()
+        try:
+            return call(stub)
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.UNAVAILABLE:
+                raise
+            _logger.debug("The Logger service is unavailable. Resolving it again.")
+            self._invalidate_stub(stub)
+            return call(self._get_stub())
+
+    def log_measurement(
+        self,
+        measured_sites: List[int],
+        measured_pins: List[str],
+        current_measurements: List[float],
+        voltage_measurements: List[float],
+        in_compliance: List[bool],
+        waveforms: Sequence[Waveform] = (),
+        phase_durations: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        """Create and send a LogMeasurement request calling the server method.
+
+        In asynchronous mode or with a spool, the request is queued and sent later by the sender
+        thread. With shared memory, it is written into the ring buffer if possible.
+        """
+        request = create_log_request(
+            measured_sites,
+            measured_pins,
+            current_measurements,
+            voltage_measurements,
+            in_compliance,
+            waveforms,
+            phase_durations,
+        )
+        if self._sender is not None:
+            self._sender.put(request)
+        elif not (self._shared_memory and self._write_shared_memory(request)):
+            self._call_with_retry(lambda stub: stub.Log(request, metadata=self._metadata))
+
+    def _write_shared_memory(self, request: LogRequest) -> bool:
+        payload = request.SerializeToString()
+        with self._shared_memory_lock:
+            # If the Logger service closed the ring, for example because it was idle, open a
+            # new one once.
+            for _ in range(2):
+                writer = self._get_shared_memory_writer()
+                if writer is None:
+                    return False
+                if writer.write(payload, timeout=1.0):
+                    return True
+                if not writer.closed:
+                    return False
+                writer.close()
+                self._shared_memory_writer = None
+            return False
+
+    def _get_shared_memory_writer(self) -> Optional[SharedMemoryWriter]:
+        if self._shared_memory_writer is not None:
+            return self._shared_memory_writer
+        if time.monotonic() < self._shared_memory_retry_time:
+            return None
+        request = OpenSharedMemoryRequest(capacity=self._shared_memory_capacity)
+        try:
+            response = self._call_with_retry(
+                lambda stub: stub.OpenSharedMemory(request, metadata=self._metadata)
+            )
+            self._shared_memory_writer = SharedMemoryWriter(
+                response.name, response.capacity, response.token
+            )
+        except (grpc.RpcError, OSError, ValueError) as e:
+            # The Logger service may run on another host or not support shared memory.
+            _logger.debug("Logging through gRPC calls instead of shared memory: %s", e)
+            self._shared_memory_retry_time = time.monotonic() + _SHARED_MEMORY_RETRY_INTERVAL
+        return self._shared_memory_writer
+
+    def log_measurements(self, batch: Iterable[LogRequest]) -> LogBatchResponse:
+        """Send a batch of LogMeasurement requests that the server logs with one write.
+
+        Args:
+            batch: The requests to log, for example created with create_log_request().
+
+        Returns:
+            The number of records and bytes that the server logged.
+        """
+        request = LogBatchRequest(requests=batch)
+        return self._call_with_retry(lambda stub: stub.LogBatch(request, metadata=self._metadata))
+
+    def query_measurements(
+        self,
+        *,
+        sites: Iterable[int] = (),
+        pins: Iterable[str] = (),
+        start_time: float = 0.0,
+        end_time: float = 0.0,
+        compliance: ComplianceFilter.ValueType = ComplianceFilter.COMPLIANCE_FILTER_ANY,
+        max_chunk_size: int = 0,
+    ) -> Iterator[QueryResponse]:
+        """Query the measurements that the server indexed.
+
+        The server must be started with an index. Empty filters match every measurement.
+
+        Args:
+            sites: Only return measurements of these sites.
+            pins: Only return measurements of these pins.
+            start_time: Only return measurements logged at or after this POSIX timestamp.
+            end_time: Only return measurements logged before this POSIX timestamp.
+            compliance: Whether to return only measurements in or out of compliance.
+            max_chunk_size: The maximum number of measurements per response. If this is 0, the
+                server chooses.
+
+        Returns:
+            An iterator of responses, each holding a chunk of measurements ordered by time.
+        """
+        request = QueryRequest(
+            sites=sites,
+            pins=pins,
+            start_time=start_time,
+            end_time=end_time,
+            compliance=compliance,
+            max_chunk_size=max_chunk_size,
+        )
+        yield from self._get_stub().Query(request, metadata=self._metadata)
+
+    def subscribe(
+        self,
+        *,
+        sites: Iterable[int] = (),
+        pins: Iterable[str] = (),
+        max_rate: float = 0.0,
+        max_points_per_pin: int = 0,
+    ) -> Iterator[SubscribeResponse]:
+        """Stream the measurements as the server logs them, such as to plot them live.
+
+        The server must be started with subscribers. Empty filters match every measurement. If
+        this client reads more slowly than the server logs, the server drops the oldest
+        measurements for this client and counts them in the dropped_count of the next response.
+
+        Args:
+            sites: Only stream measurements of these sites.
+            pins: Only stream measurements of these pins.
+            max_rate: The maximum number of responses per second. If this is 0, the server
+                chooses.
+            max_points_per_pin: The maximum number of measurements of each site and pin per
+                response, beyond which the server keeps the minimum and maximum voltages of
+                equal slices of them. If this is 0, the server chooses.
+
+        Returns:
+            An iterator of responses, each holding the measurements logged since the previous
+            response. Stop iterating to end the subscription.
+        """
+        request = SubscribeRequest(
+            sites=sites, pins=pins, max_rate=max_rate, max_points_per_pin=max_points_per_pin
+        )
+        responses = self._get_stub().Subscribe(request, metadata=self._metadata)
+        try:
+            yield from responses
+        finally:
+            # Free the server's subscription as soon as the caller stops iterating.
+            responses.cancel()
+
+    def get_stats(self) -> GetStatsResponse:
+        """Get the request counts, latencies, queue depth and write throughput of the service.
+
+        Returns:
+            A snapshot of the Logger service's metrics.
+        """
+        return self._call_with_retry(lambda stub: stub.GetStats(GetStatsRequest()))
+
+    def get_summary(
+        self, *, sites: Iterable[int] = (), pins: Iterable[str] = (), max_windows: int = 0
+    ) -> GetSummaryResponse:
+        """Get the running statistics of each site and pin that the server logged.
+
+        The server must be started with a summary. Empty filters match every site and pin.
+
+        Args:
+            sites: Only summarize these sites.
+            pins: Only summarize these pins.
+            max_windows: The maximum number of the most recent time windows to return, if the
+                server keeps time windows.
+
+        Returns:
+            The statistics since the server started and in the most recent time windows.
+        """
+        request = GetSummaryRequest(sites=sites, pins=pins, max_windows=max_windows)
+        return self._call_with_retry(lambda stub: stub.GetSummary(request))
+
+    def open_log_stream(self, max_pending_requests: int = 1000) -> LogStreamSession:
+        """Open a long-lived stream for logging many measurements over one call.
+
+        Args:
+            max_pending_requests: The maximum number of measurements waiting to be sent.
+                When this many are pending, log_measurement blocks until the stream catches up.
+
+        Returns:
+            A stream session. Close it to get the number of records and bytes logged.
+        """
+        return LogStreamSession(self._get_stub(), max_pending_requests, self._metadata)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the measurements queued in asynchronous mode or spooled have been sent.
+
+        Args:
+            timeout: The maximum time in seconds to wait.
+
+        Returns:
+            False if the timeout expired before the queued measurements were sent.
+        """
+        if self._sender is None:
+            return True
+        return self._sender.flush(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Send the measurements queued in asynchronous mode and stop the sender thread.
+
+        Spooled measurements that could not be sent within the timeout are left in the spool
+        file.
+
+        Args:
+            timeout: The maximum time in seconds to wait for the queued measurements.
+        """
+        if self._sender is not None:
+            self._sender.close(timeout)
+        with self._shared_memory_lock:
+            if self._shared_memory_writer is not None:
+                self._shared_memory_writer.close()
+                self._shared_memory_writer = None
+
+
+class _AsyncSender:
+    """Sends queued requests in batches from a background thread."""
+
+    def __init__(
+        self,
+        send_batch: Callable[[List[LogRequest]], object],
+        max_queue_size: int,
+        max_batch_size: int,
+        overflow_policy: OverflowPolicy,
+    ) -> None:
+        self._send_batch = send_batch
+        self._max_queue_size = max_queue_size
+        self._max_batch_size = max_batch_size
+        self._overflow_policy = overflow_policy
+        self._condition = threading.Condition()
+        self._pending: Deque[LogRequest] = collections.deque()
+        # Requests that have been queued, and requests that have been sent or discarded.
+        self._queued_count = 0
+        self._finished_count = 0
+        self._dropped_count = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._thread_stopped = False
+
+    def put(self, request: LogRequest) -> None:
+        with self._condition:
+            self._check_open()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="LoggerServiceClient", daemon=True
+                )
+                self._thread.start()
+            while len(self._pending) >= self._max_queue_size:
+                if self._overflow_policy == OverflowPolicy.BLOCK:
+                    self._condition.wait()
+                    self._check_open()
+                elif self._overflow_policy == OverflowPolicy.DROP_OLDEST:
+                    self._pending.popleft()
+                    self._finished_count += 1
+                    self._dropped_count += 1
+                else:
+                    raise queue.Full("The logger service client queue is full.")
+            self._pending.append(request)
+            self._queued_count += 1
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float]) -> bool:
+        with self._condition:
+            queued_count = self._queued_count
+            self._condition.wait_for(
+                lambda: self._finished_count >= queued_count or self._thread_stopped, timeout
+            )
+            return self._finished_count >= queued_count
+
+    def close(self, timeout: Optional[float]) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._dropped_count:
+            _logger.warning(
+                "Dropped %d measurements because the logger queue was full.", self._dropped_count
             )
 
-            #  Create a gRPC channel to the resolved service location.
-            channel = grpc.insecure_channel(logger_service_location.insecure_address)
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("The logger service client is closed.")
+        if self._thread_stopped:
+            raise RuntimeError("The logger service client's sender thread stopped unexpectedly.")
+
+    def _run(self) -> None:
+        try:
+            self._send_pending()
+        finally:
+            with self._condition:
+                # Wake up the callers that wait for room in the queue or for a flush, so that they
+                # don't wait forever for a thread that is gone.
+                self._thread_stopped = True
+                self._condition.notify_all()
+
+    def _send_pending(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                batch_size = min(len(self._pending), self._max_batch_size)
+                batch = [self._pending.popleft() for _ in range(batch_size)]
+                self._condition.notify_all()
+
+            try:
+                self._send_batch(batch)
+            except Exception:
+                # Drop the batch and keep sending, whatever the failure, for example if the
+                # discovery service doesn't respond.
+                _logger.exception("Failed to send %d measurements to the logger.", len(batch))
+            finally:
+                with self._condition:
+                    self._finished_count += len(batch)
+                    self._condition.notify_all()
+
+
+class _SpoolSender:
+    """Sends the requests in a spool in batches from a background thread."""
+
+    _MIN_RETRY_DELAY = 0.1
+    _MAX_RETRY_DELAY = 10.0
+
+    def __init__(
+        self,
+        spool: Spool,
+        send_batch: Callable[[List[LogRequest]], object],
+        max_batch_size: int,
+        overflow_policy: OverflowPolicy,
+    ) -> None:
+        self._spool = spool
+        self._send_batch = send_batch
+        self._max_batch_size = max_batch_size
+        self._overflow_policy = overflow_policy
+        self._condition = threading.Condition()
+        self._dropped_count = 0
+        self._closed = False
+        # Start sending right away, in case the spool holds requests from a previous process.
+        self._thread = threading.Thread(
+            target=self._run, name="LoggerServiceClientSpool", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, request: LogRequest) -> None:
+        payload = request.SerializeToString()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The logger service client is closed.")
+            while not self._spool.append(payload):
+                if self._overflow_policy == OverflowPolicy.BLOCK:
+                    self._condition.wait()
+                elif self._overflow_policy == OverflowPolicy.DROP_OLDEST:
+                    self._spool.drop_oldest()
+                    self._dropped_count += 1
+                else:
+                    raise queue.Full("The logger service client spool is full.")
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float]) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self._spool.empty, timeout)
+
+    def close(self, timeout: Optional[float]) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        # The sender thread closes the spool once it stops, so that it never reads a closed
+        # spool. If it is still waiting for the Logger service, its requests stay spooled.
+        self._thread.join(timeout)
+        if self._dropped_count:
+            _logger.warning(
+                "Dropped %d measurements because the logger spool was full.", self._dropped_count
+            )
+
+    def _run(self) -> None:
+        retry_delay = self._MIN_RETRY_DELAY
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: not self._spool.empty or self._closed)
+                    if self._spool.empty:
+                        return
+                    records, position = self._spool.read(self._max_batch_size)
+                    producer_id = self._spool.producer_id
+
+                batch = []
+                for record in records:
+                    try:
+                        request = LogRequest.FromString(record.payload)
+                    except DecodeError:
+                        _logger.exception("Dropped a corrupt measurement from the logger spool.")
+                        continue
+                    request.producer_id = producer_id
+                    request.sequence_number = record.sequence_number
+                    batch.append(request)
+
+                try:
+                    if batch:
+                        self._send_batch(batch)
+                except Exception:
+                    # Keep the requests spooled and send them again, whatever the failure, for
+                    # example if the Logger service isn't registered yet.
+                    _logger.warning(
+                        "Failed to send %d spooled measurements to the logger. Retrying in %g s.",
+                        len(batch),
+                        retry_delay,
+                        exc_info=True,
+                    )
+                    with self._condition:
+                        if self._closed:
+                            return
+                        self._condition.wait(retry_delay)
+                    retry_delay = min(retry_delay * 2, self._MAX_RETRY_DELAY)
+                    continue
+
+                retry_delay = self._MIN_RETRY_DELAY
+                with self._condition:
+                    self._spool.acknowledge(position)
+                    self._condition.notify_all()
+        finally:
+            with self._condition:
+                if not self._spool.empty:
+                    _logger.warning(
+                        "%d bytes of measurements are left in the logger spool.",
+                        self._spool.used_bytes,
+                    )
+                self._spool.close()
+
 
-            # Create a gRPC stub for the Logger service.
-            self._stub = LogMeasurementStub(channel)
-        return self._stub
+class LogStreamSession:
+    """A client-streaming LogStream call that sends measurements as they are logged."""
+
+    _POLL_INTERVAL = 100e-3
+
+    def __init__(
+        self,
+        stub: LogMeasurementStub,
+        max_pending_requests: int,
+        metadata: Optional[Tuple[Tuple[str, str], ...]] = None,
+    ) -> None:
+        """Initialize the stream session and start the LogStream call."""
+        # None tells the request iterator to end the stream.
+        self._requests: queue.Queue[Optional[LogRequest]] = queue.Queue(max_pending_requests)
+        self._closed = False
+        self._future = stub.LogStream.future(self._iter_requests(), metadata=metadata)
+
+    def __enter__(self) -> LogStreamSession:
+        """Enter the runtime context of the stream session."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Exit the runtime context of the stream session."""
+        if exc_type is None:
+            self.close()
+        else:
+            self._future.cancel()
+
+    def log_measurement(
+        self,
+        measured_sites: List[int],
+        measured_pins: List[str],
+        current_measurements: List[float],
+        voltage_measurements: List[float],
+        in_compliance: List[bool],
+        waveforms: Sequence[Waveform] = (),
+        phase_durations: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        """Queue a measurement to be sent on the stream."""
+        if self._closed:
+            raise RuntimeError("The log stream is closed.")
+        request = create_log_request(
+            measured_sites,
+            measured_pins,
+            current_measurements,
+            voltage_measurements,
+            in_compliance,
+            waveforms,
+            phase_durations,
+        )
+        self._put(request)
+
+    def close(self, timeout: Optional[float] = None) -> LogStreamResponse:
+        """End the stream and wait for the server to acknowledge it.
+
+        Args:
+            timeout: The maximum time in seconds to wait for the server's response.
+
+        Returns:
+            The number of records and bytes that the server logged from the stream.
+        """
+        if not self._closed:
+            self._closed = True
+            self._put(None)
+        return self._future.result(timeout)
+
+    def _put(self, request: Optional[LogRequest]) -> None:
+        # If the call fails, nothing drains the queue anymore, so don't block forever.
+        while True:
+            if self._future.done():
+                self._future.result()
+                raise RuntimeError("The log stream ended unexpectedly.")
+            try:
+                self._requests.put(request, timeout=self._POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def _iter_requests(self) -> Iterator[LogRequest]:
+        return iter(self._requests.get, None)
+
+
+class LogBatchAccumulator:
+    """Accumulates measurements and sends them to the Logger service in batches.
+
+    The batch is sent once it holds max_batch_size measurements or its oldest measurement is
+    older than max_batch_age seconds. The age is checked when a measurement is added, so call
+    flush() or close() to send the measurements that are left over.
+    """
+
+    def __init__(
+        self,
+        client: LoggerServiceClient,
+        *,
+        max_batch_size: int = 100,
+        max_batch_age: float = 1.0,
+    ) -> None:
+        """Initialize the batch accumulator.
+
+        Args:
+            client: The client to send the batches with.
+            max_batch_size: The number of measurements after which the batch is sent.
+            max_batch_age: The time in seconds after which the batch is sent.
+        """
+        self._client = client
+        self._max_batch_size = max_batch_size
+        self._max_batch_age = max_batch_age
+        self._batch: List[LogRequest] = []
+        self._batch_start_time = 0.0
+
+    def __enter__(self) -> LogBatchAccumulator:
+        """Enter the runtime context of the batch accumulator."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Exit the runtime context of the batch accumulator."""
+        self.close()
 
     def log_measurement(
         self,
@@ -47,13 +914,35 @@ class LoggerServiceClient:
         current_measurements: List[float],
         voltage_measurements: List[float],
         in_compliance: List[bool],
+        waveforms: Sequence[Waveform] = (),
+        phase_durations: Optional[Mapping[str, float]] = None,
     ) -> None:
-        """Create and send a LogMeasurement request calling the server method."""
-        request = LogRequest(
-            measured_sites=measured_sites,
-            measured_pins=measured_pins,
-            current_measurements=current_measurements,
-            voltage_measurements=voltage_measurements,
-            in_compliance=in_compliance,
+        """Add a measurement to the batch and send the batch if it is full or too old."""
+        if not self._batch:
+            self._batch_start_time = time.monotonic()
+        self._batch.append(
+            create_log_request(
+                measured_sites,
+                measured_pins,
+                current_measurements,
+                voltage_measurements,
+                in_compliance,
+                waveforms,
+                phase_durations,
+            )
         )
-        self._get_stub().Log(request)
+        if (
+            len(self._batch) >= self._max_batch_size
+            or time.monotonic() - self._batch_start_time >= self._max_batch_age
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Send the accumulated measurements, if any."""
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self._client.log_measurements(batch)
+
+    def close(self) -> None:
+        """Send the accumulated measurements."""
+        self.flush()
@@ -2,19 +2,22 @@
 
 from __future__ import annotations
 
+import contextlib
+import functools
+import importlib
+import logging
 import pathlib
 import sys
 import threading
-import time
-from typing import TYPE_CHECKING, NamedTuple, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Generator, Iterator, List, NamedTuple, Tuple
 
 import click
-import grpc
-import hightime
 import ni_measurement_plugin_sdk_service as nims
-import nidcpower
-import nidcpower.session as session
 from _helpers import configure_logging, verbosity_option
+from _phase_timer import CallTimer, PhaseTimer
+from _session_pool import PooledSessions, SessionPool
+from _sweep import SweepChannelMapping, fetch_sweep
+from _wait import EventWaiter
 from logger_service_client import LoggerServiceClient
 
 _NIDCPOWER_WAIT_FOR_EVENT_TIMEOUT_ERROR_CODE = -1074116059
@@ -24,16 +27,38 @@ _NIDCPOWER_TIMEOUT_ERROR_CODES = [
     _NIDCPOWER_TIMEOUT_EXCEEDED_ERROR_CODE,
 ]
 
+_logger = logging.getLogger(__name__)
+
 script_or_exe = sys.executable if getattr(sys, "frozen", False) else __file__
 service_directory = pathlib.Path(script_or_exe).resolve().parent
 measurement_service = nims.MeasurementService(
     service_config_path=service_directory / "NIDCPowerSourceDCVoltage.serviceconfig",
     ui_file_paths=[service_directory / "NIDCPowerSourceDCVoltage.measui"],
 )
+# The sweep is a second measurement of the same .serviceconfig, hosted by the same process.
+sweep_service = nims.MeasurementService(
+    service_config_path=service_directory / "NIDCPowerSourceDCVoltage.serviceconfig",
+    service_class="ni.examples.NIDCPowerVoltageSweepWithLogger_Python",
+)
+
+# Queue the measurement data and send it from a background thread so that the logger service
+# doesn't add to the measurement time.
+logger_service_client = LoggerServiceClient(
+    client_name=measurement_service.service_info.service_class, asynchronous=True
+)
+
+# Outside of TestStand, keep the NI-DCPower sessions open between measurements.
+session_pool: SessionPool[nidcpower.Session] = SessionPool(
+    reset_session=lambda session: session.reset()
+)
 
-logger_service_client = LoggerServiceClient()
+# Time the phases of each measurement if enabled on the command line.
+phase_timer = PhaseTimer()
+_log_phase_durations = False
 
 if TYPE_CHECKING:
+    import nidcpower
+
     # The nidcpower Measurement named tuple doesn't support type annotations:
     # https://github.com/ni/nimi-python/issues/1885
     class _Measurement(NamedTuple):
@@ -57,6 +82,11 @@ if TYPE_CHECKING:
 @measurement_service.configuration("source_delay", nims.DataType.Double, 0.0)
 @measurement_service.output("voltage_measurement", nims.DataType.Double)
 @measurement_service.output("current_measurement", nims.DataType.Double)
+@measurement_service.output("measured_sites", nims.DataType.Int32Array1D)
+@measurement_service.output("measured_pins", nims.DataType.StringArray1D)
+@measurement_service.output("voltage_measurements", nims.DataType.DoubleArray1D)
+@measurement_service.output("current_measurements", nims.DataType.DoubleArray1D)
+@measurement_service.output("in_compliance", nims.DataType.BooleanArray1D)
 def measure(
     pin_name: str,
     voltage_level: float,
@@ -64,94 +94,337 @@ def measure(
     current_limit: float,
     current_limit_range: float,
     source_delay: float,
-) -> Tuple[float, float]:
-    """Source and measure a DC voltage with an NI SMU."""
+) -> Tuple[float, float, List[int], List[str], List[float], List[float], List[bool]]:
+    """Source and measure a DC voltage with an NI SMU.
+
+    The pin, or every pin of a pin group, is measured on all sites of the pin map context. All
+    of the channels source at the same time and each session measures its channels with one
+    call. voltage_measurement and current_measurement hold the first measurement and the
+    array outputs hold the measurements of every site and pin.
+    """
+    # The instrument driver is imported on demand so that it doesn't delay the startup of the
+    # service. main() imports it in the background.
+    import hightime
+    import nidcpower
+
     cancellation_event = threading.Event()
     measurement_service.context.add_cancel_callback(cancellation_event.set)
 
-    with measurement_service.context.reserve_session(pin_name) as reservation:
-        with reservation.initialize_nidcpower_session() as session_info:
-            channels = session_info.session.channels[session_info.channel_list]
-            channels.source_mode = nidcpower.SourceMode.SINGLE_POINT
-            channels.output_function = nidcpower.OutputFunction.DC_VOLTAGE
-            channels.current_limit = current_limit
-            channels.voltage_level_range = voltage_level_range
-            channels.current_limit_range = current_limit_range
-            channels.source_delay = hightime.timedelta(seconds=source_delay)
-            channels.voltage_level = voltage_level
-
-            with channels.initiate():
-                # Wait for the outputs to settle.
-                timeout = source_delay + 10.0
-                _wait_for_event(
+    properties = {
+        "source_mode": nidcpower.SourceMode.SINGLE_POINT,
+        "measure_when": nidcpower.MeasureWhen.ON_DEMAND,
+        "output_function": nidcpower.OutputFunction.DC_VOLTAGE,
+        "current_limit": current_limit,
+        "voltage_level_range": voltage_level_range,
+        "current_limit_range": current_limit_range,
+        "source_delay": hightime.timedelta(seconds=source_delay),
+        "voltage_level": voltage_level,
+    }
+
+    call_timer = phase_timer.time_call()
+    with _configure_sessions(measurement_service, pin_name, properties, call_timer) as (
+        sessions,
+        sessions_channels,
+    ):
+        session_infos = sessions.session_infos
+        call_timer.mark("initiate")
+        with contextlib.ExitStack() as stack:
+            # Initiate every session before waiting so that all of the outputs settle in
+            # parallel.
+            for channels in sessions_channels:
+                stack.enter_context(channels.initiate())
+
+            # Wait for the outputs to settle.
+            call_timer.mark("wait_for_event")
+            waiter = _create_waiter(measurement_service, cancellation_event)
+            timeout = source_delay + 10.0
+            for channels in sessions_channels:
+                wait_result = waiter.wait(
                     channels,
-                    cancellation_event,
                     nidcpower.Event.SOURCE_COMPLETE,
                     timeout,
+                    expected_duration=source_delay,
+                )
+                _logger.debug(
+                    "Outputs settled in %.6f s (source delay %.6f s).",
+                    wait_result.elapsed,
+                    wait_result.expected,
+                )
+
+            # measure_multiple() returns the measurements in the order of the channel list,
+            # which is also the order of the channel mappings. It doesn't report
+            # compliance, so query it for each channel.
+            measured_sites: List[int] = []
+            measured_pins: List[str] = []
+            voltage_measurements: List[float] = []
+            current_measurements: List[float] = []
+            in_compliance: List[bool] = []
+            for session_info, channels in zip(session_infos, sessions_channels):
+                call_timer.mark("measure_multiple")
+                measurements: List[_Measurement] = channels.measure_multiple()
+                call_timer.mark("query_in_compliance")
+                for channel_mapping, measurement in zip(
+                    session_info.channel_mappings, measurements
+                ):
+                    measured_sites.append(channel_mapping.site)
+                    measured_pins.append(channel_mapping.pin_or_relay_name)
+                    voltage_measurements.append(measurement.voltage)
+                    current_measurements.append(measurement.current)
+                    channel = session_info.session.channels[channel_mapping.channel]
+                    in_compliance.append(channel.query_in_compliance())
+
+            # Leaving the exit stack aborts the sessions.
+            call_timer.mark("abort")
+
+    # The duration of the logger call can't be logged with the measurement, so it only shows up
+    # in the summary.
+    call_timer.mark("log")
+    logger_service_client.log_measurement(
+        measured_sites=measured_sites,
+        measured_pins=measured_pins,
+        voltage_measurements=voltage_measurements,
+        current_measurements=current_measurements,
+        in_compliance=in_compliance,
+        phase_durations=call_timer.durations if _log_phase_durations else None,
+    )
+    call_timer.stop()
+
+    return (
+        voltage_measurements[0],
+        current_measurements[0],
+        measured_sites,
+        measured_pins,
+        voltage_measurements,
+        current_measurements,
+        in_compliance,
+    )
+
+
+@sweep_service.register_measurement
+@sweep_service.configuration(
+    "pin_name",
+    nims.DataType.IOResource,
+    "Pin1",
+    instrument_type=nims.session_management.INSTRUMENT_TYPE_NI_DCPOWER,
+)
+@sweep_service.configuration("voltage_levels", nims.DataType.DoubleArray1D, [0.0, 1.0, 2.0])
+@sweep_service.configuration("voltage_level_range", nims.DataType.Double, 6.0)
+@sweep_service.configuration("current_limit", nims.DataType.Double, 0.01)
+@sweep_service.configuration("current_limit_range", nims.DataType.Double, 0.01)
+@sweep_service.configuration("source_delay", nims.DataType.Double, 0.0)
+@sweep_service.output("point_index", nims.DataType.Int32)
+@sweep_service.output("voltage_level", nims.DataType.Double)
+@sweep_service.output("measured_sites", nims.DataType.Int32Array1D)
+@sweep_service.output("measured_pins", nims.DataType.StringArray1D)
+@sweep_service.output("voltage_measurements", nims.DataType.DoubleArray1D)
+@sweep_service.output("current_measurements", nims.DataType.DoubleArray1D)
+@sweep_service.output("in_compliance", nims.DataType.BooleanArray1D)
+def measure_sweep(
+    pin_name: str,
+    voltage_levels: List[float],
+    voltage_level_range: float,
+    current_limit: float,
+    current_limit_range: float,
+    source_delay: float,
+) -> Generator[
+    Tuple[int, float, List[int], List[str], List[float], List[float], List[bool]], None, None
+]:
+    """Sweep a DC voltage with an NI SMU as a hardware-timed sequence.
+
+    The instrument steps through the voltage levels and measures after each step without
+    waiting for the service, so an N-point sweep takes one measurement call instead of N. The
+    outputs stream back once for each point, as soon as every site and pin measured it, and
+    the whole sweep is logged as one request when it finishes.
+    """
+    import nidcpower
+
+    cancellation_event = threading.Event()
+    sweep_service.context.add_cancel_callback(cancellation_event.set)
+
+    properties = {
+        "source_mode": nidcpower.SourceMode.SEQUENCE,
+        "measure_when": nidcpower.MeasureWhen.AUTOMATICALLY_AFTER_SOURCE_COMPLETE,
+        "output_function": nidcpower.OutputFunction.DC_VOLTAGE,
+        "current_limit": current_limit,
+        "voltage_level_range": voltage_level_range,
+        "current_limit_range": current_limit_range,
+    }
+
+    measured_sites: List[int] = []
+    measured_pins: List[str] = []
+    voltage_measurements: List[float] = []
+    current_measurements: List[float] = []
+    in_compliance: List[bool] = []
+
+    call_timer = phase_timer.time_call()
+    with _configure_sessions(sweep_service, pin_name, properties, call_timer) as (
+        sessions,
+        sessions_channels,
+    ):
+        # The sequence isn't a property, so set it on every sweep.
+        for channels in sessions_channels:
+            channels.set_sequence(voltage_levels, [source_delay] * len(voltage_levels))
+
+        call_timer.mark("initiate")
+        with contextlib.ExitStack() as stack:
+            for channels in sessions_channels:
+                stack.enter_context(channels.initiate())
+
+            # Each channel fetches its own records, in the order of the channel mappings.
+            call_timer.mark("fetch_multiple")
+            channel_mappings = [
+                SweepChannelMapping(
+                    channel_mapping.site,
+                    channel_mapping.pin_or_relay_name,
+                    session_info.session.channels[channel_mapping.channel],
+                )
+                for session_info in sessions.session_infos
+                for channel_mapping in session_info.channel_mappings
+            ]
+            for point in fetch_sweep(
+                channel_mappings,
+                voltage_levels,
+                _create_waiter(sweep_service, cancellation_event),
+                source_delay=source_delay,
+                timeout=source_delay + 10.0,
+            ):
+                point_sites = [record.site for record in point.records]
+                point_pins = [record.pin for record in point.records]
+                point_voltages = [record.voltage for record in point.records]
+                point_currents = [record.current for record in point.records]
+                point_in_compliance = [record.in_compliance for record in point.records]
+                measured_sites.extend(point_sites)
+                measured_pins.extend(point_pins)
+                voltage_measurements.extend(point_voltages)
+                current_measurements.extend(point_currents)
+                in_compliance.extend(point_in_compliance)
+                yield (
+                    point.point_index,
+                    point.voltage_level,
+                    point_sites,
+                    point_pins,
+                    point_voltages,
+                    point_currents,
+                    point_in_compliance,
                 )
 
-                channel_mappings = list(session_info.channel_mappings)
-                measured_site = channel_mappings[0].site
-                measured_pin = channel_mappings[0].pin_or_relay_name
-                in_compliance = session_info.session.channels[
-                    channel_mappings[0].channel
-                ].query_in_compliance()
-                measurement: _Measurement = channels.measure_multiple()[0]
-            channels.reset()
+            # Leaving the exit stack aborts the sessions.
+            call_timer.mark("abort")
 
+    call_timer.mark("log")
     logger_service_client.log_measurement(
-        measured_sites=[measured_site],
-        measured_pins=[measured_pin],
-        voltage_measurements=[measurement.voltage],
-        current_measurements=[measurement.current],
-        in_compliance=[in_compliance],
+        measured_sites=measured_sites,
+        measured_pins=measured_pins,
+        voltage_measurements=voltage_measurements,
+        current_measurements=current_measurements,
+        in_compliance=in_compliance,
+        phase_durations=call_timer.durations if _log_phase_durations else None,
     )
+    call_timer.stop()
 
-    return (measurement.voltage, measurement.current)
-
-
-def _wait_for_event(
-    channels: session._SessionBase,
-    cancellation_event: threading.Event,
-    event_id: nidcpower.Event,
-    timeout: float,
-) -> None:
-    """Wait for a NI-DCPower event or until error/cancellation occurs."""
-    grpc_deadline = time.time() + measurement_service.context.time_remaining
-    user_deadline = time.time() + timeout
-
-    while True:
-        if time.time() > user_deadline:
-            raise TimeoutError("User timeout expired.")
-        if time.time() > grpc_deadline:
-            measurement_service.context.abort(
-                grpc.StatusCode.DEADLINE_EXCEEDED, "Deadline exceeded."
-            )
-        if cancellation_event.is_set():
-            measurement_service.context.abort(
-                grpc.StatusCode.CANCELLED, "Client requested cancellation."
-            )
-
-        # Wait for the NI-DCPower event. If this takes more than 100 ms, check
-        # whether the measurement was canceled and try again. NI-DCPower does
-        # not support canceling a call to wait_for_event().
-        try:
-            channels.wait_for_event(event_id, timeout=100e-3)
-            break
-        except nidcpower.errors.DriverError as e:
-            if e.code in _NIDCPOWER_TIMEOUT_ERROR_CODES:
-                pass
-            raise
+
+@contextlib.contextmanager
+def _configure_sessions(
+    service: nims.MeasurementService,
+    pin_name: str,
+    properties: Dict[str, Any],
+    call_timer: CallTimer,
+) -> Iterator[Tuple[PooledSessions[nidcpower.Session], List[Any]]]:
+    """Reserve and initialize the sessions of the pin and configure their channels.
+
+    Returns:
+        A context manager that yields the sessions and the channels of each session. Leaving
+        it resets unpooled sessions and releases the sessions.
+    """
+    call_timer.mark("reserve_sessions")
+    with service.context.reserve_sessions(pin_name) as reservation:
+        call_timer.mark("initialize_sessions")
+        with session_pool.acquire(
+            service.context.pin_map_context.pin_map_id,
+            [
+                session_info
+                for session_info in reservation.session_info
+                if session_info.instrument_type_id
+                == nims.session_management.INSTRUMENT_TYPE_NI_DCPOWER
+            ],
+            functools.partial(reservation.initialize_nidcpower_sessions),
+        ) as sessions:
+            call_timer.mark("configure")
+            # Configure the same settings for all of the sessions corresponding to the selected
+            # pins and sites. Pooled sessions keep the settings of the previous measurement, so
+            # only write the properties that changed.
+            sessions_channels = [
+                session_info.session.channels[session_info.channel_list]
+                for session_info in sessions.session_infos
+            ]
+            for session_info, channels in zip(sessions.session_infos, sessions_channels):
+                for name in sessions.changed_properties(session_info.session_name, properties):
+                    setattr(channels, name, properties[name])
+
+            yield sessions, sessions_channels
+
+            # Pooled sessions are reset when the pool closes them.
+            call_timer.mark("reset")
+            if not sessions.pooled:
+                for channels in sessions_channels:
+                    channels.reset()
+
+            # Leaving the session pool and the reservation releases the sessions.
+            call_timer.mark("release_sessions")
+
+
+def _create_waiter(
+    service: nims.MeasurementService, cancellation_event: threading.Event
+) -> EventWaiter:
+    return EventWaiter(
+        cancellation_event,
+        service.context.abort,
+        time_remaining=service.context.time_remaining,
+        is_timeout_error=_is_timeout_error,
+    )
+
+
+def _is_timeout_error(error: Exception) -> bool:
+    import nidcpower
+
+    return (
+        isinstance(error, nidcpower.errors.DriverError)
+        and error.code in _NIDCPOWER_TIMEOUT_ERROR_CODES
+    )
 
 
 @click.command
 @verbosity_option
-def main(verbosity: int) -> None:
+@click.option(
+    "--phase-timing",
+    is_flag=True,
+    help="Time the phases of each measurement and print a summary on shutdown.",
+)
+@click.option(
+    "--log-phase-timing",
+    is_flag=True,
+    help="Also log the phase durations of each measurement with its data. Implies --phase-timing.",
+)
+def main(verbosity: int, phase_timing: bool, log_phase_timing: bool) -> None:
     """Source and measure a DC voltage with an NI SMU."""
+    global _log_phase_durations
     configure_logging(verbosity)
+    phase_timer.enabled = phase_timing or log_phase_timing
+    _log_phase_durations = log_phase_timing
 
-    with measurement_service.host_service():
-        input("Press enter to close the measurement service.\n")
+    try:
+        with measurement_service.host_service(), sweep_service.host_service():
+            # Import the instrument driver while the service waits for its first measurement.
+            threading.Thread(
+                target=importlib.import_module, args=("nidcpower",), daemon=True
+            ).start()
+            input("Press enter to close the measurement service.\n")
+    finally:
+        session_pool.close()
+        logger_service_client.close(timeout=10.0)
+        summary = phase_timer.format_summary()
+        if summary:
+            click.echo(summary)
 
 
 if __name__ == "__main__":
@@ -13,17 +13,63 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x15log_measurement.proto\x12\x0flogging_service\"\x8e\x01\n\nLogRequest\x12\x16\n\x0emeasured_sites\x18\x01 \x03(\x05\x12\x15\n\rmeasured_pins\x18\x02 \x03(\t\x12\x1c\n\x14voltage_measurements\x18\x03 \x03(\x02\x12\x1c\n\x14\x63urrent_measurements\x18\x04 \x03(\x02\x12\x15\n\rin_compliance\x18\x05 \x03(\x08\"\r\n\x0bLogResponse2R\n\x0eLogMeasurement\x12@\n\x03Log\x12\x1b.logging_service.LogRequest\x1a\x1c.logging_service.LogResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x15log_measurement.proto\x12\x0flogging_service\"\xeb\x02\n\nLogRequest\x12\x16\n\x0emeasured_sites\x18\x01 \x03(\x05\x12\x15\n\rmeasured_pins\x18\x02 \x03(\t\x12\x1c\n\x14voltage_measurements\x18\x03 \x03(\x02\x12\x1c\n\x14\x63urrent_measurements\x18\x04 \x03(\x02\x12\x15\n\rin_compliance\x18\x05 \x03(\x08\x12,\n\twaveforms\x18\x06 \x03(\x0b\x32\x19.logging_service.Waveform\x12\x13\n\x0bproducer_id\x18\x07 \x01(\t\x12\x17\n\x0fsequence_number\x18\x08 \x01(\x04\x12H\n\x0fphase_durations\x18\t \x03(\x0b\x32/.logging_service.LogRequest.PhaseDurationsEntry\x1a\x35\n\x13PhaseDurationsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"\x84\x01\n\x08Waveform\x12\x0c\n\x04site\x18\x01 \x01(\x05\x12\x0b\n\x03pin\x18\x02 \x01(\t\x12\x34\n\tdata_type\x18\x03 \x01(\x0e\x32!.logging_service.WaveformDataType\x12\n\n\x02t0\x18\x04 \x01(\x01\x12\n\n\x02\x64t\x18\x05 \x01(\x01\x12\x0f\n\x07samples\x18\x06 \x01(\x0c\"\r\n\x0bLogResponse\"@\n\x11LogStreamResponse\x12\x14\n\x0crecord_count\x18\x01 \x01(\x04\x12\x15\n\rbytes_written\x18\x02 \x01(\x04\"@\n\x0fLogBatchRequest\x12-\n\x08requests\x18\x01 \x03(\x0b\x32\x1b.logging_service.LogRequest\"?\n\x10LogBatchResponse\x12\x14\n\x0crecord_count\x18\x01 \x01(\x04\x12\x15\n\rbytes_written\x18\x02 \x01(\x04\"\xa0\x01\n\x0cQueryRequest\x12\r\n\x05sites\x18\x01 \x03(\x05\x12\x0c\n\x04pins\x18\x02 \x03(\t\x12\x12\n\nstart_time\x18\x03 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\x04 \x01(\x01\x12\x35\n\ncompliance\x18\x05 \x01(\x0e\x32!.logging_service.ComplianceFilter\x12\x16\n\x0emax_chunk_size\x18\x06 \x01(\r\"\xa5\x01\n\rQueryResponse\x12\x12\n\ntimestamps\x18\x01 \x03(\x01\x12\x16\n\x0emeasured_sites\x18\x02 \x03(\x05\x12\x15\n\rmeasured_pins\x18\x03 \x03(\t\x12\x1c\n\x14voltage_measurements\x18\x04 \x03(\x02\x12\x1c\n\x14\x63urrent_measurements\x18\x05 \x03(\x02\x12\x15\n\rin_compliance\x18\x06 \x03(\x08\"\x11\n\x0fGetStatsRequest\"U\n\tHistogram\x12\x15\n\rbucket_bounds\x18\x01 \x03(\x01\x12\x15\n\rbucket_counts\x18\x02 \x03(\x04\x12\r\n\x05\x63ount\x18\x03 \x01(\x04\x12\x0b\n\x03sum\x18\x04 \x01(\x01\"]\n\x08RpcStats\x12\x0e\n\x06method\x18\x01 \x01(\t\x12,\n\x08\x64uration\x18\x02 \x01(\x0b\x32\x1a.logging_service.Histogram\x12\x13\n\x0b\x65rror_count\x18\x03 \x01(\x04\"\xea\x02\n\x10GetStatsResponse\x12\x0e\n\x06uptime\x18\x01 \x01(\x01\x12\x1a\n\x12in_flight_requests\x18\x02 \x01(\x03\x12\x16\n\x0equeued_records\x18\x03 \x01(\x04\x12\x17\n\x0frecords_written\x18\x04 \x01(\x04\x12\x15\n\rbytes_written\x18\x05 \x01(\x04\x12\x14\n\x0cwrite_errors\x18\x06 \x01(\x04\x12\'\n\x04rpcs\x18\x07 \x03(\x0b\x32\x19.logging_service.RpcStats\x12\x33\n\x0f\x65ncode_duration\x18\x08 \x01(\x0b\x32\x1a.logging_service.Histogram\x12\x32\n\x0ewrite_duration\x18\t \x01(\x0b\x32\x1a.logging_service.Histogram\x12\x1a\n\x12\x64uplicate_requests\x18\n \x01(\x04\x12\x1e\n\x16shared_memory_requests\x18\x0b \x01(\x04\"E\n\x11GetSummaryRequest\x12\r\n\x05sites\x18\x01 \x03(\x05\x12\x0c\n\x04pins\x18\x02 \x03(\t\x12\x13\n\x0bmax_windows\x18\x03 \x01(\r\"\x89\x01\n\x11RunningStatistics\x12\r\n\x05\x63ount\x18\x01 \x01(\x04\x12\x0c\n\x04mean\x18\x02 \x01(\x01\x12!\n\x19sum_of_squared_deviations\x18\x03 \x01(\x01\x12\x1a\n\x12standard_deviation\x18\x04 \x01(\x01\x12\x0b\n\x03min\x18\x05 \x01(\x01\x12\x0b\n\x03max\x18\x06 \x01(\x01\"\xe1\x01\n\nPinSummary\x12\x0c\n\x04site\x18\x01 \x01(\x05\x12\x0b\n\x03pin\x18\x02 \x01(\t\x12\x33\n\x07voltage\x18\x03 \x01(\x0b\x32\".logging_service.RunningStatistics\x12\x33\n\x07\x63urrent\x18\x04 \x01(\x0b\x32\".logging_service.RunningStatistics\x12\x18\n\x10\x63ompliance_count\x18\x05 \x01(\x04\x12\x1b\n\x13in_compliance_count\x18\x06 \x01(\x04\x12\x17\n\x0f\x63ompliance_rate\x18\x07 \x01(\x01\"`\n\rSummaryWindow\x12\x12\n\nstart_time\x18\x01 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\x02 \x01(\x01\x12)\n\x04pins\x18\x03 \x03(\x0b\x32\x1b.logging_service.PinSummary\"p\n\x12GetSummaryResponse\x12)\n\x04pins\x18\x01 \x03(\x0b\x32\x1b.logging_service.PinSummary\x12/\n\x07windows\x18\x02 \x03(\x0b\x32\x1e.logging_service.SummaryWindow\"+\n\x17OpenSharedMemoryRequest\x12\x10\n\x08\x63\x61pacity\x18\x01 \x01(\x04\"I\n\x18OpenSharedMemoryResponse\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x02 \x01(\x04\x12\r\n\x05token\x18\x03 \x01(\x0c\"]\n\x10SubscribeRequest\x12\r\n\x05sites\x18\x01 \x03(\x05\x12\x0c\n\x04pins\x18\x02 \x03(\t\x12\x10\n\x08max_rate\x18\x03 \x01(\x01\x12\x1a\n\x12max_points_per_pin\x18\x04 \x01(\r\"\xd9\x01\n\x11SubscribeResponse\x12\x12\n\ntimestamps\x18\x01 \x03(\x01\x12\x16\n\x0emeasured_sites\x18\x02 \x03(\x05\x12\x15\n\rmeasured_pins\x18\x03 \x03(\t\x12\x1c\n\x14voltage_measurements\x18\x04 \x03(\x02\x12\x1c\n\x14\x63urrent_measurements\x18\x05 \x03(\x02\x12\x15\n\rin_compliance\x18\x06 \x03(\x08\x12\x17\n\x0f\x64\x65\x63imated_count\x18\x07 \x01(\x04\x12\x15\n\rdropped_count\x18\x08 \x01(\x04*R\n\x10WaveformDataType\x12\x1e\n\x1aWAVEFORM_DATA_TYPE_FLOAT64\x10\x00\x12\x1e\n\x1aWAVEFORM_DATA_TYPE_FLOAT32\x10\x01*{\n\x10\x43omplianceFilter\x12\x19\n\x15\x43OMPLIANCE_FILTER_ANY\x10\x00\x12#\n\x1f\x43OMPLIANCE_FILTER_IN_COMPLIANCE\x10\x01\x12\'\n#COMPLIANCE_FILTER_OUT_OF_COMPLIANCE\x10\x02\x32\xa4\x05\n\x0eLogMeasurement\x12@\n\x03Log\x12\x1b.logging_service.LogRequest\x1a\x1c.logging_service.LogResponse\x12N\n\tLogStream\x12\x1b.logging_service.LogRequest\x1a\".logging_service.LogStreamResponse(\x01\x12O\n\x08LogBatch\x12 .logging_service.LogBatchRequest\x1a!.logging_service.LogBatchResponse\x12H\n\x05Query\x12\x1d.logging_service.QueryRequest\x1a\x1e.logging_service.QueryResponse0\x01\x12O\n\x08GetStats\x12 .logging_service.GetStatsRequest\x1a!.logging_service.GetStatsResponse\x12U\n\nGetSummary\x12\".logging_service.GetSummaryRequest\x1a#.logging_service.GetSummaryResponse\x12g\n\x10OpenSharedMemory\x12(.logging_service.OpenSharedMemoryRequest\x1a).logging_service.OpenSharedMemoryResponse\x12T\n\tSubscribe\x12!.logging_service.SubscribeRequest\x1a\".logging_service.SubscribeResponse0\x01\x62\x06proto3')
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'log_measurement_pb2', globals())
 if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
+  _LOGREQUEST_PHASEDURATIONSENTRY._options = None
+  _LOGREQUEST_PHASEDURATIONSENTRY._serialized_options = b'8\001'
+  _WAVEFORMDATATYPE._serialized_start=2738
+  _WAVEFORMDATATYPE._serialized_end=2820
+  _COMPLIANCEFILTER._serialized_start=2822
+  _COMPLIANCEFILTER._serialized_end=2945
   _LOGREQUEST._serialized_start=43
-  _LOGREQUEST._serialized_end=185
-  _LOGRESPONSE._serialized_start=187
-  _LOGRESPONSE._serialized_end=200
-  _LOGMEASUREMENT._serialized_start=202
-  _LOGMEASUREMENT._serialized_end=284
+  _LOGREQUEST._serialized_end=406
+  _LOGREQUEST_PHASEDURATIONSENTRY._serialized_start=353
+  _LOGREQUEST_PHASEDURATIONSENTRY._serialized_end=406
+  _WAVEFORM._serialized_start=409
+  _WAVEFORM._serialized_end=541
+  _LOGRESPONSE._serialized_start=543
+  _LOGRESPONSE._serialized_end=556
+  _LOGSTREAMRESPONSE._serialized_start=558
+  _LOGSTREAMRESPONSE._serialized_end=622
+  _LOGBATCHREQUEST._serialized_start=624
+  _LOGBATCHREQUEST._serialized_end=688
+  _LOGBATCHRESPONSE._serialized_start=690
+  _LOGBATCHRESPONSE._serialized_end=753
+  _QUERYREQUEST._serialized_start=756
+  _QUERYREQUEST._serialized_end=916
+  _QUERYRESPONSE._serialized_start=919
+  _QUERYRESPONSE._serialized_end=1084
+  _GETSTATSREQUEST._serialized_start=1086
+  _GETSTATSREQUEST._serialized_end=1103
+  _HISTOGRAM._serialized_start=1105
+  _HISTOGRAM._serialized_end=1190
+  _RPCSTATS._serialized_start=1192
+  _RPCSTATS._serialized_end=1285
+  _GETSTATSRESPONSE._serialized_start=1288
+  _GETSTATSRESPONSE._serialized_end=1650
+  _GETSUMMARYREQUEST._serialized_start=1652
+  _GETSUMMARYREQUEST._serialized_end=1721
+  _RUNNINGSTATISTICS._serialized_start=1724
+  _RUNNINGSTATISTICS._serialized_end=1861
+  _PINSUMMARY._serialized_start=1864
+  _PINSUMMARY._serialized_end=2089
+  _SUMMARYWINDOW._serialized_start=2091
+  _SUMMARYWINDOW._serialized_end=2187
+  _GETSUMMARYRESPONSE._serialized_start=2189
+  _GETSUMMARYRESPONSE._serialized_end=2301
+  _OPENSHAREDMEMORYREQUEST._serialized_start=2303
+  _OPENSHAREDMEMORYREQUEST._serialized_end=2346
+  _OPENSHAREDMEMORYRESPONSE._serialized_start=2348
+  _OPENSHAREDMEMORYRESPONSE._serialized_end=2421
+  _SUBSCRIBEREQUEST._serialized_start=2423
+  _SUBSCRIBEREQUEST._serialized_end=2516
+  _SUBSCRIBERESPONSE._serialized_start=2519
+  _SUBSCRIBERESPONSE._serialized_end=2736
+  _LOGMEASUREMENT._serialized_start=2948
+  _LOGMEASUREMENT._serialized_end=3624
 # @@protoc_insertion_point(module_scope)
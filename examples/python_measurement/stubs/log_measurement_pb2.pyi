@@ -7,20 +7,85 @@ import builtins
 import collections.abc
 import google.protobuf.descriptor
 import google.protobuf.internal.containers
+import google.protobuf.internal.enum_type_wrapper
 import google.protobuf.message
+import sys
 import typing
 
+if sys.version_info >= (3, 10):
+    import typing as typing_extensions
+else:
+    import typing_extensions
+
 DESCRIPTOR: google.protobuf.descriptor.FileDescriptor
 
+class _WaveformDataType:
+    ValueType = typing.NewType("ValueType", builtins.int)
+    V: typing_extensions.TypeAlias = ValueType
+
+class _WaveformDataTypeEnumTypeWrapper(google.protobuf.internal.enum_type_wrapper._EnumTypeWrapper[_WaveformDataType.ValueType], builtins.type):
+    DESCRIPTOR: google.protobuf.descriptor.EnumDescriptor
+    WAVEFORM_DATA_TYPE_FLOAT64: _WaveformDataType.ValueType  # 0
+    WAVEFORM_DATA_TYPE_FLOAT32: _WaveformDataType.ValueType  # 1
+
+class WaveformDataType(_WaveformDataType, metaclass=_WaveformDataTypeEnumTypeWrapper): ...
+
+WAVEFORM_DATA_TYPE_FLOAT64: WaveformDataType.ValueType  # 0
+WAVEFORM_DATA_TYPE_FLOAT32: WaveformDataType.ValueType  # 1
+global___WaveformDataType = WaveformDataType
+
+class _ComplianceFilter:
+    ValueType = typing.NewType("ValueType", builtins.int)
+    V: typing_extensions.TypeAlias = ValueType
+
+class _ComplianceFilterEnumTypeWrapper(google.protobuf.internal.enum_type_wrapper._EnumTypeWrapper[_ComplianceFilter.ValueType], builtins.type):
+    DESCRIPTOR: google.protobuf.descriptor.EnumDescriptor
+    COMPLIANCE_FILTER_ANY: _ComplianceFilter.ValueType  # 0
+    COMPLIANCE_FILTER_IN_COMPLIANCE: _ComplianceFilter.ValueType  # 1
+    COMPLIANCE_FILTER_OUT_OF_COMPLIANCE: _ComplianceFilter.ValueType  # 2
+
+class ComplianceFilter(_ComplianceFilter, metaclass=_ComplianceFilterEnumTypeWrapper): ...
+
+COMPLIANCE_FILTER_ANY: ComplianceFilter.ValueType  # 0
+COMPLIANCE_FILTER_IN_COMPLIANCE: ComplianceFilter.ValueType  # 1
+COMPLIANCE_FILTER_OUT_OF_COMPLIANCE: ComplianceFilter.ValueType  # 2
+global___ComplianceFilter = ComplianceFilter
+
 @typing.final
 class LogRequest(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
 
+    @typing.final
+    class PhaseDurationsEntry(google.protobuf.message.Message):
+        DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+        KEY_FIELD_NUMBER: builtins.int
+        VALUE_FIELD_NUMBER: builtins.int
+        key: builtins.str
+        value: builtins.float
+        def __init__(
+            self,
+            *,
+            key: builtins.str = ...,
+            value: builtins.float = ...,
+        ) -> None: ...
+        def ClearField(self, field_name: typing.Literal["key", b"key", "value", b"value"]) -> None: ...
+
     MEASURED_SITES_FIELD_NUMBER: builtins.int
     MEASURED_PINS_FIELD_NUMBER: builtins.int
     VOLTAGE_MEASUREMENTS_FIELD_NUMBER: builtins.int
     CURRENT_MEASUREMENTS_FIELD_NUMBER: builtins.int
     IN_COMPLIANCE_FIELD_NUMBER: builtins.int
+    WAVEFORMS_FIELD_NUMBER: builtins.int
+    PRODUCER_ID_FIELD_NUMBER: builtins.int
+    SEQUENCE_NUMBER_FIELD_NUMBER: builtins.int
+    PHASE_DURATIONS_FIELD_NUMBER: builtins.int
+    producer_id: builtins.str
+    """Identifies the client spool that numbered this request. Empty if the request isn't numbered."""
+    sequence_number: builtins.int
+    """Increases with each request of a producer, so that the server can drop requests that the
+    producer delivers again.
+    """
     @property
     def measured_sites(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
     @property
@@ -31,6 +96,14 @@ class LogRequest(google.protobuf.message.Message):
     def current_measurements(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]: ...
     @property
     def in_compliance(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.bool]: ...
+    @property
+    def waveforms(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___Waveform]: ...
+    @property
+    def phase_durations(self) -> google.protobuf.internal.containers.ScalarMap[builtins.str, builtins.float]:
+        """The time in seconds that each phase of the measurement took, such as waiting for the
+        outputs to settle.
+        """
+
     def __init__(
         self,
         *,
@@ -39,11 +112,50 @@ class LogRequest(google.protobuf.message.Message):
         voltage_measurements: collections.abc.Iterable[builtins.float] | None = ...,
         current_measurements: collections.abc.Iterable[builtins.float] | None = ...,
         in_compliance: collections.abc.Iterable[builtins.bool] | None = ...,
+        waveforms: collections.abc.Iterable[global___Waveform] | None = ...,
+        producer_id: builtins.str = ...,
+        sequence_number: builtins.int = ...,
+        phase_durations: collections.abc.Mapping[builtins.str, builtins.float] | None = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["current_measurements", b"current_measurements", "in_compliance", b"in_compliance", "measured_pins", b"measured_pins", "measured_sites", b"measured_sites", "voltage_measurements", b"voltage_measurements"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["current_measurements", b"current_measurements", "in_compliance", b"in_compliance", "measured_pins", b"measured_pins", "measured_sites", b"measured_sites", "phase_durations", b"phase_durations", "producer_id", b"producer_id", "sequence_number", b"sequence_number", "voltage_measurements", b"voltage_measurements", "waveforms", b"waveforms"]) -> None: ...
 
 global___LogRequest = LogRequest
 
+@typing.final
+class Waveform(google.protobuf.message.Message):
+    """Equally spaced samples of one pin, such as a fetched waveform or a burst of measurements."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    SITE_FIELD_NUMBER: builtins.int
+    PIN_FIELD_NUMBER: builtins.int
+    DATA_TYPE_FIELD_NUMBER: builtins.int
+    T0_FIELD_NUMBER: builtins.int
+    DT_FIELD_NUMBER: builtins.int
+    SAMPLES_FIELD_NUMBER: builtins.int
+    site: builtins.int
+    pin: builtins.str
+    data_type: global___WaveformDataType.ValueType
+    t0: builtins.float
+    """The time of the first sample, in seconds since the epoch."""
+    dt: builtins.float
+    """The time between samples, in seconds."""
+    samples: builtins.bytes
+    """The samples as packed little-endian values of data_type."""
+    def __init__(
+        self,
+        *,
+        site: builtins.int = ...,
+        pin: builtins.str = ...,
+        data_type: global___WaveformDataType.ValueType = ...,
+        t0: builtins.float = ...,
+        dt: builtins.float = ...,
+        samples: builtins.bytes = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["data_type", b"data_type", "dt", b"dt", "pin", b"pin", "samples", b"samples", "site", b"site", "t0", b"t0"]) -> None: ...
+
+global___Waveform = Waveform
+
 @typing.final
 class LogResponse(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
@@ -53,3 +165,560 @@ class LogResponse(google.protobuf.message.Message):
     ) -> None: ...
 
 global___LogResponse = LogResponse
+
+@typing.final
+class LogStreamResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    RECORD_COUNT_FIELD_NUMBER: builtins.int
+    BYTES_WRITTEN_FIELD_NUMBER: builtins.int
+    record_count: builtins.int
+    """The number of requests logged. Requests that their producer had already delivered are
+    dropped and not counted.
+    """
+    bytes_written: builtins.int
+    def __init__(
+        self,
+        *,
+        record_count: builtins.int = ...,
+        bytes_written: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["bytes_written", b"bytes_written", "record_count", b"record_count"]) -> None: ...
+
+global___LogStreamResponse = LogStreamResponse
+
+@typing.final
+class LogBatchRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    REQUESTS_FIELD_NUMBER: builtins.int
+    @property
+    def requests(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___LogRequest]: ...
+    def __init__(
+        self,
+        *,
+        requests: collections.abc.Iterable[global___LogRequest] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["requests", b"requests"]) -> None: ...
+
+global___LogBatchRequest = LogBatchRequest
+
+@typing.final
+class LogBatchResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    RECORD_COUNT_FIELD_NUMBER: builtins.int
+    BYTES_WRITTEN_FIELD_NUMBER: builtins.int
+    record_count: builtins.int
+    """The number of requests logged. Requests that their producer had already delivered are
+    dropped and not counted.
+    """
+    bytes_written: builtins.int
+    def __init__(
+        self,
+        *,
+        record_count: builtins.int = ...,
+        bytes_written: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["bytes_written", b"bytes_written", "record_count", b"record_count"]) -> None: ...
+
+global___LogBatchResponse = LogBatchResponse
+
+@typing.final
+class QueryRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    SITES_FIELD_NUMBER: builtins.int
+    PINS_FIELD_NUMBER: builtins.int
+    START_TIME_FIELD_NUMBER: builtins.int
+    END_TIME_FIELD_NUMBER: builtins.int
+    COMPLIANCE_FIELD_NUMBER: builtins.int
+    MAX_CHUNK_SIZE_FIELD_NUMBER: builtins.int
+    start_time: builtins.float
+    """Only return measurements logged at or after this time, in seconds since the epoch.
+    If zero, there is no lower bound.
+    """
+    end_time: builtins.float
+    """Only return measurements logged before this time, in seconds since the epoch.
+    If zero, there is no upper bound.
+    """
+    compliance: global___ComplianceFilter.ValueType
+    max_chunk_size: builtins.int
+    """The maximum number of measurements per response. If zero, the server chooses."""
+    @property
+    def sites(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]:
+        """Only return measurements of these sites. If empty, return measurements of all sites."""
+
+    @property
+    def pins(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """Only return measurements of these pins. If empty, return measurements of all pins."""
+
+    def __init__(
+        self,
+        *,
+        sites: collections.abc.Iterable[builtins.int] | None = ...,
+        pins: collections.abc.Iterable[builtins.str] | None = ...,
+        start_time: builtins.float = ...,
+        end_time: builtins.float = ...,
+        compliance: global___ComplianceFilter.ValueType = ...,
+        max_chunk_size: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["compliance", b"compliance", "end_time", b"end_time", "max_chunk_size", b"max_chunk_size", "pins", b"pins", "sites", b"sites", "start_time", b"start_time"]) -> None: ...
+
+global___QueryRequest = QueryRequest
+
+@typing.final
+class QueryResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    TIMESTAMPS_FIELD_NUMBER: builtins.int
+    MEASURED_SITES_FIELD_NUMBER: builtins.int
+    MEASURED_PINS_FIELD_NUMBER: builtins.int
+    VOLTAGE_MEASUREMENTS_FIELD_NUMBER: builtins.int
+    CURRENT_MEASUREMENTS_FIELD_NUMBER: builtins.int
+    IN_COMPLIANCE_FIELD_NUMBER: builtins.int
+    @property
+    def timestamps(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]:
+        """The time at which each measurement was logged, in seconds since the epoch."""
+
+    @property
+    def measured_sites(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+    @property
+    def measured_pins(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]: ...
+    @property
+    def voltage_measurements(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]: ...
+    @property
+    def current_measurements(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]: ...
+    @property
+    def in_compliance(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.bool]: ...
+    def __init__(
+        self,
+        *,
+        timestamps: collections.abc.Iterable[builtins.float] | None = ...,
+        measured_sites: collections.abc.Iterable[builtins.int] | None = ...,
+        measured_pins: collections.abc.Iterable[builtins.str] | None = ...,
+        voltage_measurements: collections.abc.Iterable[builtins.float] | None = ...,
+        current_measurements: collections.abc.Iterable[builtins.float] | None = ...,
+        in_compliance: collections.abc.Iterable[builtins.bool] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["current_measurements", b"current_measurements", "in_compliance", b"in_compliance", "measured_pins", b"measured_pins", "measured_sites", b"measured_sites", "timestamps", b"timestamps", "voltage_measurements", b"voltage_measurements"]) -> None: ...
+
+global___QueryResponse = QueryResponse
+
+@typing.final
+class GetStatsRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    def __init__(
+        self,
+    ) -> None: ...
+
+global___GetStatsRequest = GetStatsRequest
+
+@typing.final
+class Histogram(google.protobuf.message.Message):
+    """Counts of observations in buckets, such as the durations of calls in seconds."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    BUCKET_BOUNDS_FIELD_NUMBER: builtins.int
+    BUCKET_COUNTS_FIELD_NUMBER: builtins.int
+    COUNT_FIELD_NUMBER: builtins.int
+    SUM_FIELD_NUMBER: builtins.int
+    count: builtins.int
+    sum: builtins.float
+    @property
+    def bucket_bounds(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]:
+        """The ascending upper bounds of the buckets. The last bucket has no upper bound."""
+
+    @property
+    def bucket_counts(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]:
+        """The number of observations in each bucket, with one more entry than bucket_bounds."""
+
+    def __init__(
+        self,
+        *,
+        bucket_bounds: collections.abc.Iterable[builtins.float] | None = ...,
+        bucket_counts: collections.abc.Iterable[builtins.int] | None = ...,
+        count: builtins.int = ...,
+        sum: builtins.float = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["bucket_bounds", b"bucket_bounds", "bucket_counts", b"bucket_counts", "count", b"count", "sum", b"sum"]) -> None: ...
+
+global___Histogram = Histogram
+
+@typing.final
+class RpcStats(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    METHOD_FIELD_NUMBER: builtins.int
+    DURATION_FIELD_NUMBER: builtins.int
+    ERROR_COUNT_FIELD_NUMBER: builtins.int
+    method: builtins.str
+    error_count: builtins.int
+    """The number of calls that failed."""
+    @property
+    def duration(self) -> global___Histogram:
+        """The time in seconds from the start of each call until its handler returned."""
+
+    def __init__(
+        self,
+        *,
+        method: builtins.str = ...,
+        duration: global___Histogram | None = ...,
+        error_count: builtins.int = ...,
+    ) -> None: ...
+    def HasField(self, field_name: typing.Literal["duration", b"duration"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["duration", b"duration", "error_count", b"error_count", "method", b"method"]) -> None: ...
+
+global___RpcStats = RpcStats
+
+@typing.final
+class GetStatsResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    UPTIME_FIELD_NUMBER: builtins.int
+    IN_FLIGHT_REQUESTS_FIELD_NUMBER: builtins.int
+    QUEUED_RECORDS_FIELD_NUMBER: builtins.int
+    RECORDS_WRITTEN_FIELD_NUMBER: builtins.int
+    BYTES_WRITTEN_FIELD_NUMBER: builtins.int
+    WRITE_ERRORS_FIELD_NUMBER: builtins.int
+    RPCS_FIELD_NUMBER: builtins.int
+    ENCODE_DURATION_FIELD_NUMBER: builtins.int
+    WRITE_DURATION_FIELD_NUMBER: builtins.int
+    DUPLICATE_REQUESTS_FIELD_NUMBER: builtins.int
+    SHARED_MEMORY_REQUESTS_FIELD_NUMBER: builtins.int
+    uptime: builtins.float
+    """The time in seconds since the logger service started."""
+    in_flight_requests: builtins.int
+    """The number of calls being handled."""
+    queued_records: builtins.int
+    """The number of records waiting to be written to the log files."""
+    records_written: builtins.int
+    bytes_written: builtins.int
+    write_errors: builtins.int
+    """The number of batches of records that failed to be written."""
+    duplicate_requests: builtins.int
+    """The number of requests that were dropped because their producer had already delivered them."""
+    shared_memory_requests: builtins.int
+    """The number of requests received through shared memory instead of gRPC calls."""
+    @property
+    def rpcs(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___RpcStats]: ...
+    @property
+    def encode_duration(self) -> global___Histogram:
+        """The time in seconds to encode the requests of each call into records."""
+
+    @property
+    def write_duration(self) -> global___Histogram:
+        """The time in seconds to write, flush and sync each batch of records."""
+
+    def __init__(
+        self,
+        *,
+        uptime: builtins.float = ...,
+        in_flight_requests: builtins.int = ...,
+        queued_records: builtins.int = ...,
+        records_written: builtins.int = ...,
+        bytes_written: builtins.int = ...,
+        write_errors: builtins.int = ...,
+        rpcs: collections.abc.Iterable[global___RpcStats] | None = ...,
+        encode_duration: global___Histogram | None = ...,
+        write_duration: global___Histogram | None = ...,
+        duplicate_requests: builtins.int = ...,
+        shared_memory_requests: builtins.int = ...,
+    ) -> None: ...
+    def HasField(self, field_name: typing.Literal["encode_duration", b"encode_duration", "write_duration", b"write_duration"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["bytes_written", b"bytes_written", "duplicate_requests", b"duplicate_requests", "encode_duration", b"encode_duration", "in_flight_requests", b"in_flight_requests", "queued_records", b"queued_records", "records_written", b"records_written", "rpcs", b"rpcs", "shared_memory_requests", b"shared_memory_requests", "uptime", b"uptime", "write_duration", b"write_duration", "write_errors", b"write_errors"]) -> None: ...
+
+global___GetStatsResponse = GetStatsResponse
+
+@typing.final
+class GetSummaryRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    SITES_FIELD_NUMBER: builtins.int
+    PINS_FIELD_NUMBER: builtins.int
+    MAX_WINDOWS_FIELD_NUMBER: builtins.int
+    max_windows: builtins.int
+    """The maximum number of time windows to return, most recent first. If zero, no time windows
+    are returned.
+    """
+    @property
+    def sites(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]:
+        """Only summarize the measurements of these sites. If empty, summarize all sites."""
+
+    @property
+    def pins(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """Only summarize the measurements of these pins. If empty, summarize all pins."""
+
+    def __init__(
+        self,
+        *,
+        sites: collections.abc.Iterable[builtins.int] | None = ...,
+        pins: collections.abc.Iterable[builtins.str] | None = ...,
+        max_windows: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["max_windows", b"max_windows", "pins", b"pins", "sites", b"sites"]) -> None: ...
+
+global___GetSummaryRequest = GetSummaryRequest
+
+@typing.final
+class RunningStatistics(google.protobuf.message.Message):
+    """The running statistics of a measured quantity. NaN and infinite values are left out."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    COUNT_FIELD_NUMBER: builtins.int
+    MEAN_FIELD_NUMBER: builtins.int
+    SUM_OF_SQUARED_DEVIATIONS_FIELD_NUMBER: builtins.int
+    STANDARD_DEVIATION_FIELD_NUMBER: builtins.int
+    MIN_FIELD_NUMBER: builtins.int
+    MAX_FIELD_NUMBER: builtins.int
+    count: builtins.int
+    mean: builtins.float
+    sum_of_squared_deviations: builtins.float
+    """The sum of the squared differences from the mean, with which statistics of different
+    measurements can be merged exactly.
+    """
+    standard_deviation: builtins.float
+    """The sample standard deviation, or zero if there are fewer than two values."""
+    min: builtins.float
+    """The smallest value, or zero if there are no values."""
+    max: builtins.float
+    """The largest value, or zero if there are no values."""
+    def __init__(
+        self,
+        *,
+        count: builtins.int = ...,
+        mean: builtins.float = ...,
+        sum_of_squared_deviations: builtins.float = ...,
+        standard_deviation: builtins.float = ...,
+        min: builtins.float = ...,
+        max: builtins.float = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["count", b"count", "max", b"max", "mean", b"mean", "min", b"min", "standard_deviation", b"standard_deviation", "sum_of_squared_deviations", b"sum_of_squared_deviations"]) -> None: ...
+
+global___RunningStatistics = RunningStatistics
+
+@typing.final
+class PinSummary(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    SITE_FIELD_NUMBER: builtins.int
+    PIN_FIELD_NUMBER: builtins.int
+    VOLTAGE_FIELD_NUMBER: builtins.int
+    CURRENT_FIELD_NUMBER: builtins.int
+    COMPLIANCE_COUNT_FIELD_NUMBER: builtins.int
+    IN_COMPLIANCE_COUNT_FIELD_NUMBER: builtins.int
+    COMPLIANCE_RATE_FIELD_NUMBER: builtins.int
+    site: builtins.int
+    pin: builtins.str
+    compliance_count: builtins.int
+    """The number of measurements with a compliance flag."""
+    in_compliance_count: builtins.int
+    compliance_rate: builtins.float
+    """The fraction of the measurements with a compliance flag that were in compliance, or NaN
+    if no measurement had a compliance flag.
+    """
+    @property
+    def voltage(self) -> global___RunningStatistics: ...
+    @property
+    def current(self) -> global___RunningStatistics: ...
+    def __init__(
+        self,
+        *,
+        site: builtins.int = ...,
+        pin: builtins.str = ...,
+        voltage: global___RunningStatistics | None = ...,
+        current: global___RunningStatistics | None = ...,
+        compliance_count: builtins.int = ...,
+        in_compliance_count: builtins.int = ...,
+        compliance_rate: builtins.float = ...,
+    ) -> None: ...
+    def HasField(self, field_name: typing.Literal["current", b"current", "voltage", b"voltage"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["compliance_count", b"compliance_count", "compliance_rate", b"compliance_rate", "current", b"current", "in_compliance_count", b"in_compliance_count", "pin", b"pin", "site", b"site", "voltage", b"voltage"]) -> None: ...
+
+global___PinSummary = PinSummary
+
+@typing.final
+class SummaryWindow(google.protobuf.message.Message):
+    """The measurements logged in a time window, from start_time up to but not including end_time."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    START_TIME_FIELD_NUMBER: builtins.int
+    END_TIME_FIELD_NUMBER: builtins.int
+    PINS_FIELD_NUMBER: builtins.int
+    start_time: builtins.float
+    """In seconds since the epoch."""
+    end_time: builtins.float
+    """In seconds since the epoch."""
+    @property
+    def pins(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___PinSummary]: ...
+    def __init__(
+        self,
+        *,
+        start_time: builtins.float = ...,
+        end_time: builtins.float = ...,
+        pins: collections.abc.Iterable[global___PinSummary] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["end_time", b"end_time", "pins", b"pins", "start_time", b"start_time"]) -> None: ...
+
+global___SummaryWindow = SummaryWindow
+
+@typing.final
+class GetSummaryResponse(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    PINS_FIELD_NUMBER: builtins.int
+    WINDOWS_FIELD_NUMBER: builtins.int
+    @property
+    def pins(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___PinSummary]:
+        """The statistics of each site and pin since the logger service started."""
+
+    @property
+    def windows(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___SummaryWindow]:
+        """The statistics of each site and pin in the most recent time windows, most recent first.
+        Empty if the logger service doesn't keep time windows.
+        """
+
+    def __init__(
+        self,
+        *,
+        pins: collections.abc.Iterable[global___PinSummary] | None = ...,
+        windows: collections.abc.Iterable[global___SummaryWindow] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["pins", b"pins", "windows", b"windows"]) -> None: ...
+
+global___GetSummaryResponse = GetSummaryResponse
+
+@typing.final
+class OpenSharedMemoryRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    CAPACITY_FIELD_NUMBER: builtins.int
+    capacity: builtins.int
+    """The number of bytes of records that the ring buffer holds. If zero, the server chooses."""
+    def __init__(
+        self,
+        *,
+        capacity: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["capacity", b"capacity"]) -> None: ...
+
+global___OpenSharedMemoryRequest = OpenSharedMemoryRequest
+
+@typing.final
+class OpenSharedMemoryResponse(google.protobuf.message.Message):
+    """A ring buffer in shared memory, into which a client on the same host writes serialized
+    LogRequests for the server to log. See json_logger/shared_memory.py for its layout.
+    """
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    NAME_FIELD_NUMBER: builtins.int
+    CAPACITY_FIELD_NUMBER: builtins.int
+    TOKEN_FIELD_NUMBER: builtins.int
+    name: builtins.str
+    """The name of the shared memory block, as passed to multiprocessing.shared_memory."""
+    capacity: builtins.int
+    """The number of bytes of records that the ring buffer holds."""
+    token: builtins.bytes
+    """A random value in the header of the ring buffer, with which the client checks that it
+    opened the block that the server created.
+    """
+    def __init__(
+        self,
+        *,
+        name: builtins.str = ...,
+        capacity: builtins.int = ...,
+        token: builtins.bytes = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["capacity", b"capacity", "name", b"name", "token", b"token"]) -> None: ...
+
+global___OpenSharedMemoryResponse = OpenSharedMemoryResponse
+
+@typing.final
+class SubscribeRequest(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    SITES_FIELD_NUMBER: builtins.int
+    PINS_FIELD_NUMBER: builtins.int
+    MAX_RATE_FIELD_NUMBER: builtins.int
+    MAX_POINTS_PER_PIN_FIELD_NUMBER: builtins.int
+    max_rate: builtins.float
+    """The maximum number of responses per second. If zero, the server chooses."""
+    max_points_per_pin: builtins.int
+    """The maximum number of measurements of each site and pin in a response. When more were
+    logged since the previous response, they are decimated to the measurements with the
+    minimum and maximum voltage of equal slices of them. If zero, the server chooses.
+    """
+    @property
+    def sites(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]:
+        """Only send measurements of these sites. If empty, send measurements of all sites."""
+
+    @property
+    def pins(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]:
+        """Only send measurements of these pins. If empty, send measurements of all pins."""
+
+    def __init__(
+        self,
+        *,
+        sites: collections.abc.Iterable[builtins.int] | None = ...,
+        pins: collections.abc.Iterable[builtins.str] | None = ...,
+        max_rate: builtins.float = ...,
+        max_points_per_pin: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["max_points_per_pin", b"max_points_per_pin", "max_rate", b"max_rate", "pins", b"pins", "sites", b"sites"]) -> None: ...
+
+global___SubscribeRequest = SubscribeRequest
+
+@typing.final
+class SubscribeResponse(google.protobuf.message.Message):
+    """The measurements logged since the previous response, ordered by time."""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    TIMESTAMPS_FIELD_NUMBER: builtins.int
+    MEASURED_SITES_FIELD_NUMBER: builtins.int
+    MEASURED_PINS_FIELD_NUMBER: builtins.int
+    VOLTAGE_MEASUREMENTS_FIELD_NUMBER: builtins.int
+    CURRENT_MEASUREMENTS_FIELD_NUMBER: builtins.int
+    IN_COMPLIANCE_FIELD_NUMBER: builtins.int
+    DECIMATED_COUNT_FIELD_NUMBER: builtins.int
+    DROPPED_COUNT_FIELD_NUMBER: builtins.int
+    decimated_count: builtins.int
+    """The number of measurements that decimation left out of this response."""
+    dropped_count: builtins.int
+    """The number of measurements that were dropped since the previous response, because the
+    subscriber's queue was full.
+    """
+    @property
+    def timestamps(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]:
+        """The time at which each measurement was logged, in seconds since the epoch."""
+
+    @property
+    def measured_sites(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+    @property
+    def measured_pins(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.str]: ...
+    @property
+    def voltage_measurements(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]: ...
+    @property
+    def current_measurements(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.float]: ...
+    @property
+    def in_compliance(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.bool]: ...
+    def __init__(
+        self,
+        *,
+        timestamps: collections.abc.Iterable[builtins.float] | None = ...,
+        measured_sites: collections.abc.Iterable[builtins.int] | None = ...,
+        measured_pins: collections.abc.Iterable[builtins.str] | None = ...,
+        voltage_measurements: collections.abc.Iterable[builtins.float] | None = ...,
+        current_measurements: collections.abc.Iterable[builtins.float] | None = ...,
+        in_compliance: collections.abc.Iterable[builtins.bool] | None = ...,
+        decimated_count: builtins.int = ...,
+        dropped_count: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["current_measurements", b"current_measurements", "decimated_count", b"decimated_count", "dropped_count", b"dropped_count", "in_compliance", b"in_compliance", "measured_pins", b"measured_pins", "measured_sites", b"measured_sites", "timestamps", b"timestamps", "voltage_measurements", b"voltage_measurements"]) -> None: ...
+
+global___SubscribeResponse = SubscribeResponse
@@ -24,12 +24,82 @@ class LogMeasurementStub:
         log_measurement_pb2.LogResponse,
     ]
 
+    LogStream: grpc.StreamUnaryMultiCallable[
+        log_measurement_pb2.LogRequest,
+        log_measurement_pb2.LogStreamResponse,
+    ]
+
+    LogBatch: grpc.UnaryUnaryMultiCallable[
+        log_measurement_pb2.LogBatchRequest,
+        log_measurement_pb2.LogBatchResponse,
+    ]
+
+    Query: grpc.UnaryStreamMultiCallable[
+        log_measurement_pb2.QueryRequest,
+        log_measurement_pb2.QueryResponse,
+    ]
+
+    GetStats: grpc.UnaryUnaryMultiCallable[
+        log_measurement_pb2.GetStatsRequest,
+        log_measurement_pb2.GetStatsResponse,
+    ]
+
+    GetSummary: grpc.UnaryUnaryMultiCallable[
+        log_measurement_pb2.GetSummaryRequest,
+        log_measurement_pb2.GetSummaryResponse,
+    ]
+
+    OpenSharedMemory: grpc.UnaryUnaryMultiCallable[
+        log_measurement_pb2.OpenSharedMemoryRequest,
+        log_measurement_pb2.OpenSharedMemoryResponse,
+    ]
+
+    Subscribe: grpc.UnaryStreamMultiCallable[
+        log_measurement_pb2.SubscribeRequest,
+        log_measurement_pb2.SubscribeResponse,
+    ]
+
 class LogMeasurementAsyncStub:
     Log: grpc.aio.UnaryUnaryMultiCallable[
         log_measurement_pb2.LogRequest,
         log_measurement_pb2.LogResponse,
     ]
 
+    LogStream: grpc.aio.StreamUnaryMultiCallable[
+        log_measurement_pb2.LogRequest,
+        log_measurement_pb2.LogStreamResponse,
+    ]
+
+    LogBatch: grpc.aio.UnaryUnaryMultiCallable[
+        log_measurement_pb2.LogBatchRequest,
+        log_measurement_pb2.LogBatchResponse,
+    ]
+
+    Query: grpc.aio.UnaryStreamMultiCallable[
+        log_measurement_pb2.QueryRequest,
+        log_measurement_pb2.QueryResponse,
+    ]
+
+    GetStats: grpc.aio.UnaryUnaryMultiCallable[
+        log_measurement_pb2.GetStatsRequest,
+        log_measurement_pb2.GetStatsResponse,
+    ]
+
+    GetSummary: grpc.aio.UnaryUnaryMultiCallable[
+        log_measurement_pb2.GetSummaryRequest,
+        log_measurement_pb2.GetSummaryResponse,
+    ]
+
+    OpenSharedMemory: grpc.aio.UnaryUnaryMultiCallable[
+        log_measurement_pb2.OpenSharedMemoryRequest,
+        log_measurement_pb2.OpenSharedMemoryResponse,
+    ]
+
+    Subscribe: grpc.aio.UnaryStreamMultiCallable[
+        log_measurement_pb2.SubscribeRequest,
+        log_measurement_pb2.SubscribeResponse,
+    ]
+
 class LogMeasurementServicer(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def Log(
@@ -38,4 +108,53 @@ class LogMeasurementServicer(metaclass=abc.ABCMeta):
         context: _ServicerContext,
     ) -> typing.Union[log_measurement_pb2.LogResponse, collections.abc.Awaitable[log_measurement_pb2.LogResponse]]: ...
 
+    @abc.abstractmethod
+    def LogStream(
+        self,
+        request_iterator: _MaybeAsyncIterator[log_measurement_pb2.LogRequest],
+        context: _ServicerContext,
+    ) -> typing.Union[log_measurement_pb2.LogStreamResponse, collections.abc.Awaitable[log_measurement_pb2.LogStreamResponse]]: ...
+
+    @abc.abstractmethod
+    def LogBatch(
+        self,
+        request: log_measurement_pb2.LogBatchRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[log_measurement_pb2.LogBatchResponse, collections.abc.Awaitable[log_measurement_pb2.LogBatchResponse]]: ...
+
+    @abc.abstractmethod
+    def Query(
+        self,
+        request: log_measurement_pb2.QueryRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[collections.abc.Iterator[log_measurement_pb2.QueryResponse], collections.abc.AsyncIterator[log_measurement_pb2.QueryResponse]]: ...
+
+    @abc.abstractmethod
+    def GetStats(
+        self,
+        request: log_measurement_pb2.GetStatsRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[log_measurement_pb2.GetStatsResponse, collections.abc.Awaitable[log_measurement_pb2.GetStatsResponse]]: ...
+
+    @abc.abstractmethod
+    def GetSummary(
+        self,
+        request: log_measurement_pb2.GetSummaryRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[log_measurement_pb2.GetSummaryResponse, collections.abc.Awaitable[log_measurement_pb2.GetSummaryResponse]]: ...
+
+    @abc.abstractmethod
+    def OpenSharedMemory(
+        self,
+        request: log_measurement_pb2.OpenSharedMemoryRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[log_measurement_pb2.OpenSharedMemoryResponse, collections.abc.Awaitable[log_measurement_pb2.OpenSharedMemoryResponse]]: ...
+
+    @abc.abstractmethod
+    def Subscribe(
+        self,
+        request: log_measurement_pb2.SubscribeRequest,
+        context: _ServicerContext,
+    ) -> typing.Union[collections.abc.Iterator[log_measurement_pb2.SubscribeResponse], collections.abc.AsyncIterator[log_measurement_pb2.SubscribeResponse]]: ...
+
 def add_LogMeasurementServicer_to_server(servicer: LogMeasurementServicer, server: typing.Union[grpc.Server, grpc.aio.Server]) -> None: ...
@@ -0,0 +1,77 @@
+"""Stand-ins for the clock, the cancellation event and the RPC abort of a measurement."""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import List, NoReturn, Optional
+
+import grpc
+from _wait import EventWaiter
+
+
+class FakeClock:
+    """A monotonic clock that only advances when a test or a fake advances it."""
+
+    def __init__(self) -> None:
+        """Initialize the clock at 0."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Get the time in seconds."""
+        return self.now
+
+
+class FakeCancellationEvent(threading.Event):
+    """A cancellation event whose wait() advances the fake clock instead of sleeping."""
+
+    def __init__(self, clock: FakeClock, cancel_time: float = math.inf) -> None:
+        """Initialize the event, which is set once the clock reaches cancel_time."""
+        super().__init__()
+        self.clock = clock
+        self.cancel_time = cancel_time
+        self.wait_lengths: List[float] = []
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Advance the clock by the timeout and return whether the event is set."""
+        assert timeout is not None
+        self.wait_lengths.append(timeout)
+        self.clock.now += timeout
+        if self.clock.now >= self.cancel_time:
+            self.set()
+        return self.is_set()
+
+
+class SliceTimeoutError(Exception):
+    """Raised by fake channels when a slice expires before the event occurs."""
+
+
+class AbortError(Exception):
+    """Raised by abort() instead of the exception that gRPC raises."""
+
+    def __init__(self, code: grpc.StatusCode, details: str) -> None:
+        """Initialize the error with the status code and details of the abort."""
+        super().__init__(details)
+        self.code = code
+
+
+def abort(code: grpc.StatusCode, details: str) -> NoReturn:
+    """Abort the fake RPC."""
+    raise AbortError(code, details)
+
+
+def create_waiter(
+    clock: FakeClock,
+    cancellation_event: Optional[threading.Event] = None,
+    time_remaining: float = math.inf,
+) -> EventWaiter:
+    """Create an event waiter that measures time with the fake clock."""
+    return EventWaiter(
+        cancellation_event if cancellation_event is not None else FakeCancellationEvent(clock),
+        abort,
+        time_remaining=time_remaining,
+        is_timeout_error=lambda e: isinstance(e, SliceTimeoutError),
+        slice_margin=2e-3,
+        max_slice=20e-3,
+        clock=clock,
+    )
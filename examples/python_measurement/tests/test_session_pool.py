@@ -0,0 +1,206 @@
+"""Tests of the pool that keeps instrument sessions open between measurements."""
+
+from __future__ import annotations
+
+import contextlib
+from typing import Iterator, List, Sequence, cast
+
+import pytest
+from _fakes import FakeClock
+from _session_pool import SessionPool
+from ni_measurement_plugin_sdk_service.session_management import (
+    INSTRUMENT_TYPE_NI_DCPOWER,
+    SessionInformation,
+    TypedSessionInformation,
+)
+
+_MAX_IDLE_TIME = 300.0
+
+
+class _FakeSession:
+    def __init__(self, session_name: str) -> None:
+        self.session_name = session_name
+        self.reset = False
+        self.closed = False
+
+
+class _FakeReservation:
+    """Initializes stand-in sessions like reservation.initialize_nidcpower_sessions."""
+
+    def __init__(self, session_infos: Sequence[SessionInformation]) -> None:
+        self.session_infos = session_infos
+        self.sessions: List[_FakeSession] = []
+
+    @contextlib.contextmanager
+    def initialize_sessions(self) -> Iterator[Sequence[TypedSessionInformation[_FakeSession]]]:
+        sessions = [_FakeSession(session_info.session_name) for session_info in self.session_infos]
+        self.sessions.extend(sessions)
+        try:
+            yield [
+                cast(TypedSessionInformation[_FakeSession], session_info._replace(session=session))
+                for session_info, session in zip(self.session_infos, sessions)
+            ]
+        finally:
+            for session in sessions:
+                session.closed = True
+
+
+def _create_session_infos(session_exists: bool = False) -> List[SessionInformation]:
+    return [
+        SessionInformation(
+            session_name=f"DCPower{index}",
+            resource_name=f"PXI1Slot{index + 2}",
+            channel_list=f"PXI1Slot{index + 2}/0",
+            instrument_type_id=INSTRUMENT_TYPE_NI_DCPOWER,
+            session_exists=session_exists,
+            channel_mappings=[],
+        )
+        for index in range(2)
+    ]
+
+
+def _reset_session(session: _FakeSession) -> None:
+    session.reset = True
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def pool(clock: FakeClock) -> Iterator[SessionPool[_FakeSession]]:
+    pool = SessionPool[_FakeSession](
+        max_idle_time=_MAX_IDLE_TIME, reset_session=_reset_session, clock=clock
+    )
+    yield pool
+    pool.close()
+
+
+def test___released_sessions___acquire___reuses_them(pool: SessionPool[_FakeSession]) -> None:
+    reservation = _FakeReservation(_create_session_infos())
+
+    with pool.acquire("PinMap1", reservation.session_infos, reservation.initialize_sessions):
+        pass
+    with pool.acquire(
+        "PinMap1", reservation.session_infos, reservation.initialize_sessions
+    ) as pooled_sessions:
+        sessions = [session_info.session for session_info in pooled_sessions.session_infos]
+
+    assert pooled_sessions.pooled
+    assert sessions == reservation.sessions
+    assert not any(session.closed for session in reservation.sessions)
+
+
+def test___idle_sessions___evict_idle___resets_and_closes_them(
+    pool: SessionPool[_FakeSession], clock: FakeClock
+) -> None:
+    reservation = _FakeReservation(_create_session_infos())
+    with pool.acquire("PinMap1", reservation.session_infos, reservation.initialize_sessions):
+        pass
+
+    clock.now += _MAX_IDLE_TIME - 1.0
+    pool.evict_idle()
+    assert not any(session.closed for session in reservation.sessions)
+    clock.now += 1.0
+    pool.evict_idle()
+
+    assert all(session.reset and session.closed for session in reservation.sessions)
+
+
+def test___idle_sessions___acquire___initializes_new_sessions(
+    pool: SessionPool[_FakeSession], clock: FakeClock
+) -> None:
+    reservation = _FakeReservation(_create_session_infos())
+    with pool.acquire("PinMap1", reservation.session_infos, reservation.initialize_sessions):
+        pass
+
+    clock.now += _MAX_IDLE_TIME
+    with pool.acquire("PinMap1", reservation.session_infos, reservation.initialize_sessions):
+        pass
+
+    assert [session.closed for session in reservation.sessions] == [True, True, False, False]
+
+
+def test___pin_map_changed___acquire___closes_pooled_sessions(
+    pool: SessionPool[_FakeSession],
+) -> None:
+    reservation = _FakeReservation(_create_session_infos())
+    with pool.acquire("PinMap1", reservation.session_infos, reservation.initialize_sessions):
+        pass
+
+    with pool.acquire(
+        "PinMap2", reservation.session_infos, reservation.initialize_sessions
+    ) as pooled_sessions:
+        sessions = [session_info.session for session_info in pooled_sessions.session_infos]
+
+    assert len(reservation.sessions) == 4
+    assert all(session.reset and session.closed for session in reservation.sessions[:2])
+    assert sessions == reservation.sessions[2:]
+
+
+def test___applied_properties___changed_properties___skips_unchanged_properties(
+    pool: SessionPool[_FakeSession],
+) -> None:
+    reservation = _FakeReservation(_create_session_infos())
+    properties = {"source_delay": 0.01, "voltage_level": 1.0, "current_limit": 0.01}
+    with pool.acquire(
+        "PinMap1", reservation.session_infos, reservation.initialize_sessions
+    ) as pooled_sessions:
+        first_changed = pooled_sessions.changed_properties("DCPower0", properties)
+
+    with pool.acquire(
+        "PinMap1", reservation.session_infos, reservation.initialize_sessions
+    ) as pooled_sessions:
+        unchanged = pooled_sessions.changed_properties("DCPower0", properties)
+        changed = pooled_sessions.changed_properties(
+            "DCPower0", dict(properties, voltage_level=2.0)
+        )
+        other_session_changed = pooled_sessions.changed_properties("DCPower1", properties)
+
+    assert first_changed == ["source_delay", "voltage_level", "current_limit"]
+    assert unchanged == []
+    assert changed == ["voltage_level"]
+    assert other_session_changed == ["source_delay", "voltage_level", "current_limit"]
+
+
+def test___measurement_raises___acquire___closes_sessions(
+    pool: SessionPool[_FakeSession],
+) -> None:
+    reservation = _FakeReservation(_create_session_infos())
+
+    with pytest.raises(ValueError):
+        with pool.acquire("PinMap1", reservation.session_infos, reservation.initialize_sessions):
+            raise ValueError("Measurement failed.")
+    with pool.acquire(
+        "PinMap1", reservation.session_infos, reservation.initialize_sessions
+    ) as pooled_sessions:
+        changed = pooled_sessions.changed_properties("DCPower0", {"voltage_level": 1.0})
+
+    assert [session.closed for session in reservation.sessions] == [True, True, False, False]
+    assert all(session.reset for session in reservation.sessions[:2])
+    assert changed == ["voltage_level"]
+
+
+def test___registered_sessions___acquire___does_not_pool_them(
+    pool: SessionPool[_FakeSession],
+) -> None:
+    reservation = _FakeReservation(_create_session_infos(session_exists=True))
+
+    with pool.acquire(
+        "PinMap1", reservation.session_infos, reservation.initialize_sessions
+    ) as pooled_sessions:
+        assert not pooled_sessions.pooled
+        assert pooled_sessions.changed_properties("DCPower0", {"voltage_level": 1.0}) == [
+            "voltage_level"
+        ]
+    with pool.acquire(
+        "PinMap1", reservation.session_infos, reservation.initialize_sessions
+    ) as pooled_sessions:
+        assert pooled_sessions.changed_properties("DCPower0", {"voltage_level": 1.0}) == [
+            "voltage_level"
+        ]
+
+    assert len(reservation.sessions) == 4
+    # The initialization context closes or detaches from the sessions, not the pool.
+    assert all(session.closed and not session.reset for session in reservation.sessions)
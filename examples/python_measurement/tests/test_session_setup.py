@@ -0,0 +1,173 @@
+"""Tests of the concurrent initialization and closing of instrument sessions."""
+
+from __future__ import annotations
+
+import threading
+from typing import AbstractSet, Dict, List, Set
+
+import pytest
+from _session_setup import close_sessions, group_by_instrument, initialize_sessions
+from ni_measurement_plugin_sdk_service.session_management import (
+    INSTRUMENT_TYPE_NI_DCPOWER,
+    SessionInformation,
+)
+
+# Long enough to not fail on a slow machine, but short enough to not hang the tests.
+_TIMEOUT = 10.0
+
+
+class _FakeInstruments:
+    """Creates stand-in sessions and records which sessions of an instrument overlap."""
+
+    def __init__(self, failing_session_names: AbstractSet[str] = frozenset()) -> None:
+        self.failing_session_names = failing_session_names
+        self.created: List[str] = []
+        self.closed: List[str] = []
+        self.overlapping_instruments: Set[str] = set()
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def construct(self, session_info: SessionInformation) -> str:
+        instrument = session_info.resource_name.split("/")[0]
+        with self._lock:
+            if self._active.get(instrument):
+                self.overlapping_instruments.add(instrument)
+            self._active[instrument] = self._active.get(instrument, 0) + 1
+        try:
+            if session_info.session_name in self.failing_session_names:
+                raise RuntimeError(f"Failed to initialize {session_info.session_name}.")
+            with self._lock:
+                self.created.append(session_info.session_name)
+            return session_info.session_name
+        finally:
+            with self._lock:
+                self._active[instrument] -= 1
+
+    def close(self, session: str) -> None:
+        with self._lock:
+            self.closed.append(session)
+
+
+def _create_session_info(session_name: str, resource_name: str) -> SessionInformation:
+    return SessionInformation(
+        session_name=session_name,
+        resource_name=resource_name,
+        channel_list="",
+        instrument_type_id=INSTRUMENT_TYPE_NI_DCPOWER,
+        session_exists=False,
+        channel_mappings=[],
+    )
+
+
+def test___sessions_sharing_instruments___group_by_instrument___groups_transitively() -> None:
+    session_infos = [
+        _create_session_info("a", "PXI1Slot2/0"),
+        _create_session_info("b", "PXI1Slot3/0"),
+        _create_session_info("c", "PXI1Slot2/1"),
+        _create_session_info("d", "PXI1Slot3/1, PXI1Slot4/0"),
+        _create_session_info("e", "PXI1Slot4/1"),
+        _create_session_info("f", "PXI1Slot5/0"),
+    ]
+
+    groups = group_by_instrument(session_infos)
+
+    assert [[info.session_name for info in group] for group in groups] == [
+        ["a", "c"],
+        ["b", "d", "e"],
+        ["f"],
+    ]
+
+
+def test___independent_instruments___initialize_sessions___initializes_them_concurrently() -> None:
+    session_infos = [
+        _create_session_info("a", "PXI1Slot2/0"),
+        _create_session_info("b", "PXI1Slot3/0"),
+        _create_session_info("c", "PXI1Slot2/1"),
+    ]
+    instruments = _FakeInstruments()
+    # Each instrument only finishes its first session once the other instrument has started,
+    # which can only happen if they are initialized concurrently.
+    barrier = threading.Barrier(2, timeout=_TIMEOUT)
+
+    def construct(session_info: SessionInformation) -> str:
+        if session_info.session_name in ("a", "b"):
+            barrier.wait()
+        return instruments.construct(session_info)
+
+    sessions, timings = initialize_sessions(session_infos, construct, instruments.close, 2)
+
+    assert sessions == ["a", "b", "c"]
+    assert [timing.session_name for timing in timings] == ["a", "b", "c"]
+    assert not instruments.overlapping_instruments
+    assert not instruments.closed
+
+
+def test___session_fails___initialize_sessions___closes_initialized_sessions() -> None:
+    session_infos = [
+        _create_session_info("a", "PXI1Slot2/0"),
+        _create_session_info("b", "PXI1Slot3/0"),
+        _create_session_info("c", "PXI1Slot3/1"),
+        _create_session_info("d", "PXI1Slot4/0"),
+    ]
+    instruments = _FakeInstruments(failing_session_names={"b"})
+
+    with pytest.raises(RuntimeError, match="Failed to initialize b."):
+        initialize_sessions(session_infos, instruments.construct, instruments.close, 1)
+
+    # The sessions are initialized one after another, so the session after the failure is
+    # skipped.
+    assert instruments.created == ["a"]
+    assert instruments.closed == ["a"]
+
+
+def test___session_fails_concurrently___initialize_sessions___closes_initialized_sessions() -> None:
+    session_infos = [
+        _create_session_info("a", "PXI1Slot2/0"),
+        _create_session_info("b", "PXI1Slot3/0"),
+        _create_session_info("c", "PXI1Slot4/0"),
+    ]
+    instruments = _FakeInstruments(failing_session_names={"b"})
+
+    with pytest.raises(RuntimeError, match="Failed to initialize b."):
+        initialize_sessions(session_infos, instruments.construct, instruments.close, 3)
+
+    assert sorted(instruments.closed) == sorted(instruments.created)
+    assert "b" not in instruments.created
+
+
+def test___session_fails_to_close___close_sessions___closes_other_sessions() -> None:
+    session_infos = [
+        _create_session_info("a", "PXI1Slot2/0"),
+        _create_session_info("b", "PXI1Slot2/1"),
+        _create_session_info("c", "PXI1Slot3/0"),
+    ]
+    closed: List[str] = []
+    lock = threading.Lock()
+
+    def close_session(session_info: SessionInformation) -> None:
+        if session_info.session_name == "a":
+            raise RuntimeError("Failed to close a.")
+        with lock:
+            closed.append(session_info.session_name)
+
+    with pytest.raises(RuntimeError, match="Failed to close a."):
+        close_sessions(session_infos, close_session, 2)
+
+    assert sorted(closed) == ["b", "c"]
+
+
+def test___sessions___close_sessions___returns_timings_in_order() -> None:
+    session_infos = [
+        _create_session_info("a", "PXI1Slot2/0"),
+        _create_session_info("b", "PXI1Slot3/0"),
+        _create_session_info("c", "PXI1Slot2/1"),
+    ]
+
+    timings = close_sessions(session_infos, lambda session_info: None, 2)
+
+    assert [timing.session_name for timing in timings] == ["a", "b", "c"]
+    assert [timing.resource_name for timing in timings] == [
+        "PXI1Slot2/0",
+        "PXI1Slot3/0",
+        "PXI1Slot2/1",
+    ]
@@ -0,0 +1,169 @@
+"""Tests of fetching the records of a hardware-timed voltage sweep as they arrive."""
+
+from __future__ import annotations
+
+import math
+from typing import List, NamedTuple, Sequence
+
+import grpc
+import pytest
+from _fakes import AbortError, FakeCancellationEvent, FakeClock, create_waiter
+from _sweep import SweepChannelMapping, fetch_sweep
+
+_SOURCE_DELAY = 10e-3
+
+
+class _Record(NamedTuple):
+    voltage: float
+    current: float
+    in_compliance: bool
+
+
+class _FakeChannel:
+    """A channel that measures point i of the sweep at record_times[i] on the fake clock."""
+
+    def __init__(self, clock: FakeClock, record_times: Sequence[float], current: float) -> None:
+        self.clock = clock
+        self.record_times = record_times
+        self.current = current
+        self.fetched_count = 0
+        self.fetch_counts: List[int] = []
+
+    @property
+    def fetch_backlog(self) -> int:
+        measured_count = sum(1 for time in self.record_times if time <= self.clock.now)
+        return measured_count - self.fetched_count
+
+    def fetch_multiple(self, count: int, timeout: float) -> List[_Record]:
+        assert 0 < count <= self.fetch_backlog
+        records = [
+            _Record(float(index), self.current, False)
+            for index in range(self.fetched_count, self.fetched_count + count)
+        ]
+        self.fetched_count += count
+        self.fetch_counts.append(count)
+        return records
+
+
+def _get_record_times(point_count: int, interval: float) -> List[float]:
+    return [(index + 1) * interval for index in range(point_count)]
+
+
+def test___slow_sweep___fetch_sweep___fetches_records_in_several_calls() -> None:
+    clock = FakeClock()
+    channel = _FakeChannel(clock, _get_record_times(5, _SOURCE_DELAY), current=1e-3)
+    mappings = [SweepChannelMapping(0, "Pin1", channel)]
+
+    points = list(
+        fetch_sweep(
+            mappings,
+            [0.0, 1.0, 2.0, 3.0, 4.0],
+            create_waiter(clock),
+            source_delay=_SOURCE_DELAY,
+            timeout=1.0,
+        )
+    )
+
+    assert len(channel.fetch_counts) > 1
+    assert sum(channel.fetch_counts) == 5
+    assert [point.point_index for point in points] == [0, 1, 2, 3, 4]
+    assert [point.records[0].voltage for point in points] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test___finished_sweep___fetch_sweep___fetches_each_channel_once() -> None:
+    clock = FakeClock()
+    channels = [
+        _FakeChannel(clock, [0.0] * 4, current=1e-3),
+        _FakeChannel(clock, [0.0] * 4, current=2e-3),
+    ]
+    mappings = [
+        SweepChannelMapping(0, "Pin1", channels[0]),
+        SweepChannelMapping(1, "Pin1", channels[1]),
+    ]
+
+    points = list(
+        fetch_sweep(
+            mappings,
+            [0.0, 0.5, 1.0, 1.5],
+            create_waiter(clock),
+            source_delay=_SOURCE_DELAY,
+            timeout=1.0,
+        )
+    )
+
+    assert [channel.fetch_counts for channel in channels] == [[4], [4]]
+    assert len(points) == 4
+    assert clock.now == 0.0
+
+
+def test___channels_finish_at_different_times___fetch_sweep___yields_points_in_order() -> None:
+    clock = FakeClock()
+    fast_channel = _FakeChannel(clock, _get_record_times(4, 1e-3), current=1e-3)
+    slow_channel = _FakeChannel(clock, _get_record_times(4, 30e-3), current=2e-3)
+    mappings = [
+        SweepChannelMapping(0, "Pin1", fast_channel),
+        SweepChannelMapping(0, "Pin2", slow_channel),
+    ]
+    yield_times: List[float] = []
+
+    points = []
+    for point in fetch_sweep(
+        mappings,
+        [0.0, 1.0, 2.0, 3.0],
+        create_waiter(clock),
+        source_delay=_SOURCE_DELAY,
+        timeout=1.0,
+    ):
+        points.append(point)
+        yield_times.append(clock.now)
+
+    assert [point.point_index for point in points] == [0, 1, 2, 3]
+    assert [point.voltage_level for point in points] == [0.0, 1.0, 2.0, 3.0]
+    assert [
+        [(record.site, record.pin, record.voltage, record.current) for record in point.records]
+        for point in points
+    ] == [[(0, "Pin1", float(index), 1e-3), (0, "Pin2", float(index), 2e-3)] for index in range(4)]
+    # Each point is yielded once the slow channel measured it, not after the whole sweep.
+    assert yield_times[0] < slow_channel.record_times[1]
+    assert yield_times == sorted(yield_times)
+
+
+def test___channel_stops_measuring___fetch_sweep___raises_timeout_error() -> None:
+    clock = FakeClock()
+    channel = _FakeChannel(clock, [1e-3, math.inf], current=1e-3)
+    mappings = [SweepChannelMapping(0, "Pin1", channel)]
+    points = fetch_sweep(
+        mappings,
+        [0.0, 1.0],
+        create_waiter(clock),
+        source_delay=_SOURCE_DELAY,
+        timeout=0.1,
+    )
+
+    first_point = next(points)
+    first_point_time = clock.now
+    with pytest.raises(TimeoutError):
+        next(points)
+
+    assert first_point.point_index == 0
+    assert clock.now - first_point_time == pytest.approx(0.1)
+
+
+def test___canceled___fetch_sweep___aborts() -> None:
+    clock = FakeClock()
+    channel = _FakeChannel(clock, _get_record_times(10, _SOURCE_DELAY), current=1e-3)
+    mappings = [SweepChannelMapping(0, "Pin1", channel)]
+    points = []
+
+    with pytest.raises(AbortError) as exc_info:
+        for point in fetch_sweep(
+            mappings,
+            [float(index) for index in range(10)],
+            create_waiter(clock, FakeCancellationEvent(clock, cancel_time=35e-3)),
+            source_delay=_SOURCE_DELAY,
+            timeout=1.0,
+        ):
+            points.append(point)
+
+    assert exc_info.value.code == grpc.StatusCode.CANCELLED
+    assert [point.point_index for point in points] == [0, 1, 2]
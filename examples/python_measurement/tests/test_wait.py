@@ -0,0 +1,140 @@
+"""Tests of the sliced, cancelable wait for instrument events."""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Callable, List, NoReturn, Optional
+
+import grpc
+import pytest
+from _fakes import (
+    AbortError,
+    FakeCancellationEvent,
+    FakeClock,
+    SliceTimeoutError,
+    create_waiter,
+)
+
+
+class _FakeChannels:
+    """Channels whose event occurs at event_time on the fake clock."""
+
+    def __init__(
+        self,
+        clock: FakeClock,
+        event_time: float = math.inf,
+        on_slice: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.clock = clock
+        self.event_time = event_time
+        self.on_slice = on_slice
+        self.slice_lengths: List[float] = []
+
+    def wait_for_event(self, event_id: Any, timeout: float) -> None:
+        self.slice_lengths.append(timeout)
+        if self.on_slice is not None:
+            self.on_slice()
+        if self.clock.now + timeout >= self.event_time:
+            self.clock.now = max(self.clock.now, self.event_time)
+            return
+        self.clock.now += timeout
+        raise SliceTimeoutError()
+
+
+def test___long_wait___wait___slices_end_at_max_slice_and_near_expected_time() -> None:
+    clock = FakeClock()
+    channels = _FakeChannels(clock, event_time=60e-3)
+    waiter = create_waiter(clock)
+
+    result = waiter.wait(channels, "event", timeout=1.0, expected_duration=50e-3)
+
+    # The third slice ends slice_margin after the expected time instead of at max_slice.
+    assert channels.slice_lengths == pytest.approx([20e-3, 20e-3, 12e-3, 20e-3])
+    assert result.elapsed == pytest.approx(60e-3)
+    assert result.overshoot == pytest.approx(10e-3)
+
+
+def test___short_settle___wait___returns_in_one_slice() -> None:
+    clock = FakeClock()
+    channels = _FakeChannels(clock, event_time=6e-3)
+    waiter = create_waiter(clock)
+
+    result = waiter.wait(channels, "event", timeout=1.0, expected_duration=5e-3)
+
+    assert channels.slice_lengths == pytest.approx([7e-3])
+    assert result.elapsed == pytest.approx(6e-3)
+    assert result.expected == 5e-3
+
+
+def test___canceled_during_slice___wait___aborts_after_slice() -> None:
+    clock = FakeClock()
+    cancellation_event = threading.Event()
+    channels = _FakeChannels(clock, on_slice=cancellation_event.set)
+    waiter = create_waiter(clock, cancellation_event)
+
+    with pytest.raises(AbortError) as exc_info:
+        waiter.wait(channels, "event", timeout=1.0)
+
+    assert exc_info.value.code == grpc.StatusCode.CANCELLED
+    assert len(channels.slice_lengths) == 1
+
+
+def test___grpc_deadline___wait___slices_stop_at_deadline_and_abort() -> None:
+    clock = FakeClock()
+    channels = _FakeChannels(clock)
+    waiter = create_waiter(clock, time_remaining=30e-3)
+
+    with pytest.raises(AbortError) as exc_info:
+        waiter.wait(channels, "event", timeout=1.0)
+
+    assert exc_info.value.code == grpc.StatusCode.DEADLINE_EXCEEDED
+    assert channels.slice_lengths == pytest.approx([20e-3, 10e-3])
+
+
+def test___user_timeout___wait___slices_stop_at_timeout_and_raise() -> None:
+    clock = FakeClock()
+    channels = _FakeChannels(clock)
+    waiter = create_waiter(clock)
+
+    with pytest.raises(TimeoutError):
+        waiter.wait(channels, "event", timeout=25e-3)
+
+    assert channels.slice_lengths == pytest.approx([20e-3, 5e-3])
+
+
+def test___driver_error___wait___raises_it() -> None:
+    clock = FakeClock()
+    channels = _FakeChannels(clock, on_slice=lambda: _raise(ValueError("Driver error.")))
+    waiter = create_waiter(clock)
+
+    with pytest.raises(ValueError, match="Driver error."):
+        waiter.wait(channels, "event", timeout=1.0)
+
+
+def test___condition_becomes_true___wait_until___polls_once_per_slice() -> None:
+    clock = FakeClock()
+    cancellation_event = FakeCancellationEvent(clock)
+    waiter = create_waiter(clock, cancellation_event)
+
+    result = waiter.wait_until(lambda: clock.now >= 30e-3, timeout=1.0, expected_duration=5e-3)
+
+    assert cancellation_event.wait_lengths == pytest.approx([7e-3, 20e-3, 20e-3])
+    assert result.elapsed == pytest.approx(47e-3)
+
+
+def test___canceled___wait_until___aborts() -> None:
+    clock = FakeClock()
+    cancellation_event = FakeCancellationEvent(clock)
+    cancellation_event.set()
+    waiter = create_waiter(clock, cancellation_event)
+
+    with pytest.raises(AbortError) as exc_info:
+        waiter.wait_until(lambda: False, timeout=1.0)
+
+    assert exc_info.value.code == grpc.StatusCode.CANCELLED
+    assert not cancellation_event.wait_lengths
+
+
+def _raise(error: Exception) -> NoReturn:
+    raise error
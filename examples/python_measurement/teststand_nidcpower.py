@@ -1,24 +1,46 @@
 """Functions to set up and tear down sessions of NI-DCPower devices in NI TestStand."""
 
-from typing import Any
+import logging
+import pathlib
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
 
+import grpc
 from _helpers import TestStandSupport
+from _session_setup import SessionTiming, close_sessions, format_timings, initialize_sessions
 from ni_measurement_plugin_sdk_service.discovery import DiscoveryClient
 from ni_measurement_plugin_sdk_service.grpc.channelpool import GrpcChannelPool
 from ni_measurement_plugin_sdk_service.session_management import (
     INSTRUMENT_TYPE_NI_DCPOWER,
     PinMapContext,
+    SessionInformation,
     SessionInitializationBehavior,
     SessionManagementClient,
 )
 
+_logger = logging.getLogger(__name__)
 
-def create_nidcpower_sessions(sequence_context: Any) -> None:
+# The service class of the NI gRPC Device Server, which keeps the NI-DCPower sessions open between
+# the steps of the sequence.
+_GRPC_DEVICE_SERVER_SERVICE_CLASS = "ni.measurementlink.v1.grpcdeviceserver"
+
+# The prefix of the .env settings that the Measurement Plug-In SDK reads, such as
+# MEASUREMENT_PLUGIN_NIDCPOWER_SIMULATE.
+_CONFIG_PREFIX = "MEASUREMENT_PLUGIN"
+
+_SessionConstructor = Callable[[SessionInformation], Any]
+_SessionConstructorFactory = Callable[[SessionInitializationBehavior], _SessionConstructor]
+
+
+def create_nidcpower_sessions(sequence_context: Any, max_workers: int = 1) -> None:
     """Create and register all NI-DCPower sessions.
 
     Args:
         sequence_context: The SequenceContext COM object from the TestStand sequence execution.
             (Dynamically typed.)
+        max_workers: The maximum number of instruments to initialize at once. With more than 1,
+            the sessions of different instruments are initialized concurrently, so the setup
+            takes about as long as the slowest instrument instead of the sum of all of them.
     """
     with GrpcChannelPool() as grpc_channel_pool:
         teststand_support = TestStandSupport(sequence_context)
@@ -29,32 +51,229 @@ def create_nidcpower_sessions(sequence_context: Any) -> None:
         session_management_client = SessionManagementClient(
             discovery_client=discovery_client, grpc_channel_pool=grpc_channel_pool
         )
-        with session_management_client.reserve_sessions(
-            pin_map_context, instrument_type_id=INSTRUMENT_TYPE_NI_DCPOWER
-        ) as reservation:
-            with reservation.initialize_nidcpower_sessions(
-                initialization_behavior=SessionInitializationBehavior.INITIALIZE_SESSION_THEN_DETACH
-            ):
-                pass
+        timings = setup_nidcpower_sessions(
+            session_management_client,
+            pin_map_context,
+            _get_session_constructor_factory(discovery_client, grpc_channel_pool),
+            max_workers,
+        )
+        if timings:
+            _logger.info("Initialized the NI-DCPower sessions:\n%s", format_timings(timings))
 
-            session_management_client.register_sessions(reservation.session_info)
 
+def destroy_nidcpower_sessions(max_workers: int = 1) -> None:
+    """Destroy and unregister all NI-DCPower sessions.
 
-def destroy_nidcpower_sessions() -> None:
-    """Destroy and unregister all NI-DCPower sessions."""
+    Args:
+        max_workers: The maximum number of instruments to close at once.
+    """
     with GrpcChannelPool() as grpc_channel_pool:
         discovery_client = DiscoveryClient(grpc_channel_pool=grpc_channel_pool)
         session_management_client = SessionManagementClient(
             discovery_client=discovery_client, grpc_channel_pool=grpc_channel_pool
         )
-        with session_management_client.reserve_all_registered_sessions(
-            instrument_type_id=INSTRUMENT_TYPE_NI_DCPOWER,
-        ) as reservation:
-            if not reservation.session_info:
-                return
+        timings = teardown_nidcpower_sessions(
+            session_management_client,
+            _get_session_constructor_factory(discovery_client, grpc_channel_pool),
+            max_workers,
+        )
+        if timings:
+            _logger.info("Closed the NI-DCPower sessions:\n%s", format_timings(timings))
+
 
-            session_management_client.unregister_sessions(reservation.session_info)
+def setup_nidcpower_sessions(
+    session_management_client: SessionManagementClient,
+    pin_map_context: PinMapContext,
+    session_constructor_factory: _SessionConstructorFactory,
+    max_workers: int = 1,
+) -> List[SessionTiming]:
+    """Initialize the NI-DCPower sessions of a pin map, detach from them and register them.
+
+    If a session fails to initialize, the sessions that were initialized are closed and none
+    are registered.
+
+    Args:
+        session_management_client: The session management client.
+        pin_map_context: The pin map whose NI-DCPower sessions to initialize.
+        session_constructor_factory: Creates the session constructor for an initialization
+            behavior. Only used if max_workers is more than 1.
+        max_workers: The maximum number of instruments to initialize at once. With 1, the
+            reservation initializes the sessions one after another.
+
+    Returns:
+        The time that each session took to initialize, or an empty list if max_workers is 1.
+    """
+    with session_management_client.reserve_sessions(
+        pin_map_context, instrument_type_id=INSTRUMENT_TYPE_NI_DCPOWER
+    ) as reservation:
+        session_infos = _get_nidcpower_session_infos(reservation.session_info)
+        if not session_infos:
+            raise ValueError(
+                f"No reserved sessions matched instrument type ID '{INSTRUMENT_TYPE_NI_DCPOWER}'."
+            )
+        # The NI gRPC Device Server keeps the sessions open after the driver session objects
+        # are discarded.
+        timings: List[SessionTiming] = []
+        if max_workers <= 1:
+            with reservation.initialize_nidcpower_sessions(
+                initialization_behavior=SessionInitializationBehavior.INITIALIZE_SESSION_THEN_DETACH
+            ):
+                pass
+        else:
+            _, timings = initialize_sessions(
+                session_infos,
+                session_constructor_factory(
+                    SessionInitializationBehavior.INITIALIZE_SESSION_THEN_DETACH
+                ),
+                _close_session,
+                max_workers,
+            )
+
+        session_management_client.register_sessions(reservation.session_info)
+    return timings
+
+
+def teardown_nidcpower_sessions(
+    session_management_client: SessionManagementClient,
+    session_constructor_factory: _SessionConstructorFactory,
+    max_workers: int = 1,
+) -> List[SessionTiming]:
+    """Unregister all NI-DCPower sessions, attach to them and close them.
+
+    Args:
+        session_management_client: The session management client.
+        session_constructor_factory: Creates the session constructor for an initialization
+            behavior. Only used if max_workers is more than 1.
+        max_workers: The maximum number of instruments to close at once. With 1, the
+            reservation closes the sessions one after another.
+
+    Returns:
+        The time that each session took to close, or an empty list if max_workers is 1.
+    """
+    with session_management_client.reserve_all_registered_sessions(
+        instrument_type_id=INSTRUMENT_TYPE_NI_DCPOWER,
+    ) as reservation:
+        if not reservation.session_info:
+            return []
+
+        session_management_client.unregister_sessions(reservation.session_info)
+        if max_workers <= 1:
             with reservation.initialize_nidcpower_sessions(
                 initialization_behavior=SessionInitializationBehavior.ATTACH_TO_SESSION_THEN_CLOSE
             ):
                 pass
+            return []
+
+        session_constructor = session_constructor_factory(
+            SessionInitializationBehavior.ATTACH_TO_SESSION_THEN_CLOSE
+        )
+        return close_sessions(
+            _get_nidcpower_session_infos(reservation.session_info),
+            lambda session_info: _close_session(session_constructor(session_info)),
+            max_workers,
+        )
+
+
+def _get_session_constructor_factory(
+    discovery_client: DiscoveryClient, grpc_channel_pool: GrpcChannelPool
+) -> _SessionConstructorFactory:
+    # reservation.initialize_nidcpower_sessions initializes all of the reserved sessions one
+    # after another, so construct each session with the nidcpower API and the same .env settings
+    # as it does. Import nidcpower on demand, because it is slow to import.
+    import nidcpower
+    from decouple import AutoConfig
+
+    config = AutoConfig(str(pathlib.Path(__file__).resolve().parent))
+    options = _get_nidcpower_options(config)
+    grpc_initialization_behaviors = {
+        SessionInitializationBehavior.INITIALIZE_SESSION_THEN_DETACH: (
+            nidcpower.SessionInitializationBehavior.INITIALIZE_SERVER_SESSION
+        ),
+        SessionInitializationBehavior.ATTACH_TO_SESSION_THEN_CLOSE: (
+            nidcpower.SessionInitializationBehavior.ATTACH_TO_SERVER_SESSION
+        ),
+    }
+
+    def create_session_constructor(
+        initialization_behavior: SessionInitializationBehavior,
+    ) -> _SessionConstructor:
+        grpc_channel = _get_grpc_device_server_channel(
+            config, discovery_client, grpc_channel_pool, nidcpower.GRPC_SERVICE_INTERFACE_NAME
+        )
+        grpc_initialization_behavior = grpc_initialization_behaviors[initialization_behavior]
+
+        def construct_session(session_info: SessionInformation) -> Any:
+            if grpc_channel is None:
+                return nidcpower.Session(
+                    resource_name=session_info.resource_name, reset=False, options=options
+                )
+            return nidcpower.Session(
+                resource_name=session_info.resource_name,
+                reset=False,
+                options=options,
+                grpc_options=nidcpower.GrpcSessionOptions(
+                    grpc_channel,
+                    session_info.session_name,
+                    initialization_behavior=grpc_initialization_behavior,
+                ),
+            )
+
+        return construct_session
+
+    return create_session_constructor
+
+
+def _get_nidcpower_options(config: Any) -> Dict[str, Any]:
+    options: Dict[str, Any] = {}
+    if config(f"{_CONFIG_PREFIX}_NIDCPOWER_SIMULATE", default=False, cast=bool):
+        options["simulate"] = True
+    driver_setup = {}
+    board_type = config(f"{_CONFIG_PREFIX}_NIDCPOWER_BOARD_TYPE", default="")
+    if board_type:
+        driver_setup["BoardType"] = board_type
+    model = config(f"{_CONFIG_PREFIX}_NIDCPOWER_MODEL", default="")
+    if model:
+        driver_setup["Model"] = model
+    if driver_setup:
+        options["driver_setup"] = driver_setup
+    return options
+
+
+def _get_grpc_device_server_channel(
+    config: Any,
+    discovery_client: DiscoveryClient,
+    grpc_channel_pool: GrpcChannelPool,
+    provided_interface: str,
+) -> Optional[grpc.Channel]:
+    if not config(f"{_CONFIG_PREFIX}_USE_GRPC_DEVICE_SERVER", default=True, cast=bool):
+        return None
+
+    address = config(f"{_CONFIG_PREFIX}_GRPC_DEVICE_SERVER_ADDRESS", default="")
+    if address:
+        url = urlsplit(address)
+        if url.scheme != "http" or not url.netloc:
+            raise ValueError(
+                f"Unsupported NI gRPC Device Server address '{address}'. "
+                "Specify an address such as http://localhost:31763."
+            )
+        return grpc_channel_pool.get_channel(url.netloc)
+
+    service_location = discovery_client.resolve_service(
+        provided_interface=provided_interface,
+        service_class=_GRPC_DEVICE_SERVER_SERVICE_CLASS,
+    )
+    return grpc_channel_pool.get_channel(service_location.insecure_address)
+
+
+def _get_nidcpower_session_infos(
+    session_infos: Sequence[SessionInformation],
+) -> List[SessionInformation]:
+    return [
+        session_info
+        for session_info in session_infos
+        if session_info.instrument_type_id == INSTRUMENT_TYPE_NI_DCPOWER
+    ]
+
+
+def _close_session(session: Any) -> None:
+    session.close()
@@ -0,0 +1,91 @@
+"""An in-process logger service for benchmarks that doesn't need the discovery service."""
+
+import concurrent.futures
+import threading
+from types import TracebackType
+from typing import Any, Optional, Type
+
+from ni_measurement_plugin_sdk_service.discovery import ServiceLocation
+
+from json_logger.logger_service import start_server
+
+
+class LoopbackDiscoveryClient:
+    """Resolves the logger service to a loopback port instead of asking the discovery service.
+
+    Pass it to LoggerServiceClient as the discovery client.
+    """
+
+    def __init__(self, port: str) -> None:
+        """Initialize the loopback discovery client.
+
+        Args:
+            port: The port that the logger service listens on.
+        """
+        self._port = port
+
+    def resolve_service(
+        self, provided_interface: str, service_class: str = "", *args: Any, **kwargs: Any
+    ) -> ServiceLocation:
+        """Resolve any service to the logger service."""
+        return ServiceLocation("localhost", self._port, "")
+
+
+class InProcessLoggerServer:
+    """Runs the logger service on a background thread of this process.
+
+    The service listens on a loopback port but isn't registered with the discovery service. Use
+    :class:`LoopbackDiscoveryClient` to resolve it. On exit, the server is stopped and the log
+    files are drained and closed, so their size is final.
+    """
+
+    def __init__(self, **server_options: Any) -> None:
+        """Initialize the in-process server.
+
+        Args:
+            server_options: The keyword arguments of start_server(), except run_service.
+        """
+        self._server_options = server_options
+        self._port: "concurrent.futures.Future[str]" = concurrent.futures.Future()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="InProcessLoggerServer")
+        self._error: Optional[BaseException] = None
+
+    @property
+    def port(self) -> str:
+        """The port that the logger service listens on."""
+        return self._port.result()
+
+    def __enter__(self) -> "InProcessLoggerServer":
+        """Start the server and wait until it listens."""
+        self._thread.start()
+        try:
+            self._port.result()
+        except BaseException:
+            self._thread.join()
+            raise
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Stop the server and close the log files."""
+        self._stop_event.set()
+        self._thread.join()
+        if self._error is not None and exc_type is None:
+            raise self._error
+
+    def _run(self) -> None:
+        try:
+            start_server(run_service=self._run_service, **self._server_options)
+        except BaseException as e:
+            self._error = e
+            if not self._port.done():
+                self._port.set_exception(e)
+
+    def _run_service(self, port: str) -> None:
+        self._port.set_result(port)
+        self._stop_event.wait()
@@ -0,0 +1,376 @@
+"""Measure how long the logger service and the measurement service take to become ready.
+
+Each run starts the service in a fresh Python process, so the time includes starting the
+interpreter and importing the modules, which usually dominate. The logger service is ready once
+it answers a GetStats call. It is started without the discovery service, like in the throughput
+benchmark, so the time to register it is not included. The measurement service can't be hosted
+without the discovery service, so its time to ready is the time to import the measurement
+module, which creates the service and its logger client.
+
+The results are appended as one JSON line per run to a results file, so that runs can be
+compared and a run can be checked against a baseline. With --import-profile, one more run is
+made with ``python -X importtime`` to report the modules that took longest to import.
+"""
+
+import collections
+import datetime
+import enum
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import click
+import grpc
+
+from json_logger.stubs.log_measurement_pb2 import GetStatsRequest
+from json_logger.stubs.log_measurement_pb2_grpc import LogMeasurementStub
+
+# The Python measurement example, relative to this file.
+_DEFAULT_MEASUREMENT_DIR = (
+    pathlib.Path(__file__).resolve().parents[3] / "examples" / "python_measurement"
+)
+# The directory that contains the json_logger package.
+_SRC_DIR = pathlib.Path(__file__).resolve().parents[2]
+
+_RESULTS_VERSION = 1
+
+# Started with the output path as its argument. Prints the port once the server listens and
+# stops the server when its standard input is closed.
+_LOGGER_SERVICE_CODE = """\
+import sys
+from json_logger.logger_service import start_server
+start_server(
+    output_path=sys.argv[1],
+    run_service=lambda port: (print(port, flush=True), sys.stdin.read()),
+)
+"""
+
+_MEASUREMENT_SERVICE_CODE = "import measurement"
+
+_READY_TIMEOUT = 60.0
+
+
+class Service(enum.Enum):
+    """The service to start."""
+
+    LOGGER = "logger"
+    """The logger service, which is ready when it answers a GetStats call."""
+
+    MEASUREMENT = "measurement"
+    """The measurement service of the Python example, which is ready when it is imported."""
+
+
+class StartupResult(NamedTuple):
+    """The time to ready of a service, over several runs."""
+
+    runs: int
+
+    time_to_ready: float
+    """The median time in seconds from starting the process until the service was ready."""
+
+    time_to_ready_min: float
+
+    time_to_ready_max: float
+
+    interpreter_startup: float
+    """The median time in seconds to start and stop a Python process that does nothing."""
+
+
+def measure_startup(
+    service: Service, runs: int, measurement_dir: pathlib.Path = _DEFAULT_MEASUREMENT_DIR
+) -> StartupResult:
+    """Start a service several times and measure how long it takes to become ready.
+
+    Args:
+        service: The service to start.
+        runs: The number of times to start the service.
+        measurement_dir: The directory that contains measurement.py.
+
+    Returns:
+        The time to ready of the service.
+
+    Raises:
+        RuntimeError: If the service fails to start.
+    """
+    interpreter_times = [_time_process(["-c", "pass"], _SRC_DIR) for _ in range(runs)]
+    ready_times = [_time_to_ready(service, measurement_dir) for _ in range(runs)]
+    return StartupResult(
+        runs=runs,
+        time_to_ready=statistics.median(ready_times),
+        time_to_ready_min=min(ready_times),
+        time_to_ready_max=max(ready_times),
+        interpreter_startup=statistics.median(interpreter_times),
+    )
+
+
+def profile_imports(
+    service: Service,
+    count: int = 10,
+    measurement_dir: pathlib.Path = _DEFAULT_MEASUREMENT_DIR,
+) -> List[Tuple[str, float]]:
+    """Start a service with ``python -X importtime`` and find the packages slowest to import.
+
+    Args:
+        service: The service to start.
+        count: The number of packages to return.
+        measurement_dir: The directory that contains measurement.py.
+
+    Returns:
+        The names of the top-level packages and the time in seconds to import their modules,
+        not counting the other packages that they import, slowest first.
+
+    Raises:
+        RuntimeError: If the service fails to start.
+    """
+    stderr = _run_service(service, measurement_dir, ["-X", "importtime"])[1]
+    import_times: Dict[str, float] = collections.defaultdict(float)
+    for line in stderr.splitlines():
+        fields = line.split("|")
+        # Skip the header line, whose times are not numbers.
+        if line.startswith("import time:") and len(fields) == 3:
+            self_time = fields[0].split(":")[1].strip()
+            if self_time.isdigit():
+                package = fields[2].strip().split(".")[0]
+                import_times[package] += int(self_time) * 1e-6
+    return sorted(import_times.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def find_regressions(result: StartupResult, baseline: StartupResult, tolerance: float) -> List[str]:
+    """Compare a result with a baseline result of the same service.
+
+    Args:
+        result: The result to check.
+        baseline: The result to compare with.
+        tolerance: The fraction by which the time to ready may rise.
+
+    Returns:
+        A description of the regression, if the time to ready rose by more than the tolerance.
+    """
+    if result.time_to_ready > baseline.time_to_ready * (1.0 + tolerance):
+        return [
+            f"time_to_ready rose from {baseline.time_to_ready:.6g} to {result.time_to_ready:.6g}"
+        ]
+    return []
+
+
+def load_baseline(path: pathlib.Path, service: Service) -> Optional[StartupResult]:
+    """Load the latest result of a service from a results file.
+
+    Args:
+        path: The results file, with one JSON line per run.
+        service: The service to find.
+
+    Returns:
+        The latest result of the service, or None if there is none.
+    """
+    baseline = None
+    with path.open() as file:
+        for line in file:
+            run = json.loads(line)
+            if run.get("version") == _RESULTS_VERSION and run["service"] == service.value:
+                baseline = StartupResult(**run["result"])
+    return baseline
+
+
+def _time_to_ready(service: Service, measurement_dir: pathlib.Path) -> float:
+    return _run_service(service, measurement_dir, [])[0]
+
+
+def _run_service(
+    service: Service, measurement_dir: pathlib.Path, python_options: Sequence[str]
+) -> Tuple[float, str]:
+    if service == Service.MEASUREMENT:
+        start_time = time.perf_counter()
+        stderr = _run_process([*python_options, "-c", _MEASUREMENT_SERVICE_CODE], measurement_dir)
+        return time.perf_counter() - start_time, stderr
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, "measurements.json")
+        start_time = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, *python_options, "-c", _LOGGER_SERVICE_CODE, output_path],
+            cwd=_SRC_DIR,
+            env=_child_environment(_SRC_DIR),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        assert process.stdout is not None
+        time_to_ready: Optional[float] = None
+        try:
+            port = process.stdout.readline().strip()
+            if port:
+                # The server listens before it prints its port, so this is the first call that
+                # it can answer.
+                with grpc.insecure_channel(f"localhost:{port}") as channel:
+                    LogMeasurementStub(channel).GetStats(
+                        GetStatsRequest(), timeout=_READY_TIMEOUT, wait_for_ready=True
+                    )
+                time_to_ready = time.perf_counter() - start_time
+        finally:
+            # Closing the standard input stops the server.
+            _, stderr = process.communicate(timeout=_READY_TIMEOUT)
+        if time_to_ready is None:
+            raise RuntimeError(f"The logger service failed to start:\n{stderr}")
+        return time_to_ready, stderr
+
+
+def _time_process(args: Sequence[str], cwd: pathlib.Path) -> float:
+    start_time = time.perf_counter()
+    _run_process(args, cwd)
+    return time.perf_counter() - start_time
+
+
+def _run_process(args: Sequence[str], cwd: pathlib.Path) -> str:
+    completed = subprocess.run(
+        [sys.executable, *args],
+        cwd=cwd,
+        env=_child_environment(cwd),
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=_READY_TIMEOUT,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{completed.stderr}")
+    return completed.stderr
+
+
+def _child_environment(path: pathlib.Path) -> Dict[str, str]:
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [str(path), *filter(None, [environment.get("PYTHONPATH")])]
+    )
+    return environment
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _append_result(path: pathlib.Path, service: Service, result: StartupResult) -> None:
+    run = {
+        "version": _RESULTS_VERSION,
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": _environment(),
+        "service": service.value,
+        "result": result._asdict(),
+    }
+    with path.open("a") as file:
+        file.write(json.dumps(run) + "\n")
+
+
+def _format_result(service: Service, result: StartupResult) -> str:
+    return (
+        f"{service.value}: ready in {result.time_to_ready * 1e3:.1f} ms "
+        f"(min {result.time_to_ready_min * 1e3:.1f} ms, max {result.time_to_ready_max * 1e3:.1f} "
+        f"ms, {result.runs} runs), of which {result.interpreter_startup * 1e3:.1f} ms to start "
+        "the interpreter"
+    )
+
+
+@click.command
+@click.option(
+    "--service",
+    "services",
+    type=click.Choice([service.value for service in Service]),
+    multiple=True,
+    default=[service.value for service in Service],
+    show_default=True,
+    help="The service to start. Repeat to start several services.",
+)
+@click.option(
+    "--runs",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help="The number of times to start each service.",
+)
+@click.option(
+    "--import-profile",
+    is_flag=True,
+    help="Start each service once more with -X importtime and print the packages that took "
+    "longest to import.",
+)
+@click.option(
+    "--measurement-dir",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    default=_DEFAULT_MEASUREMENT_DIR,
+    show_default=True,
+    help="The directory that contains measurement.py.",
+)
+@click.option(
+    "--results",
+    "results_path",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    default=pathlib.Path("startup_results.jsonl"),
+    show_default=True,
+    help="Append the result of each service to this JSON lines file.",
+)
+@click.option(
+    "--baseline",
+    "baseline_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    default=None,
+    help="Fail if a service starts slower than in its latest run in this results file.",
+)
+@click.option(
+    "--tolerance",
+    type=click.FloatRange(min=0.0),
+    default=0.2,
+    show_default=True,
+    help="The fraction by which the time to ready may rise.",
+)
+def main(
+    services: Sequence[str],
+    runs: int,
+    import_profile: bool,
+    measurement_dir: pathlib.Path,
+    results_path: pathlib.Path,
+    baseline_path: Optional[pathlib.Path],
+    tolerance: float,
+) -> None:
+    """Measure how long the logger and measurement services take to become ready."""
+    regressions: List[str] = []
+    for service in map(Service, dict.fromkeys(services)):
+        # Load the baseline first, in case it is the results file.
+        baseline = None
+        if baseline_path is not None:
+            baseline = load_baseline(baseline_path, service)
+            if baseline is None:
+                click.echo(f"{baseline_path} has no run of the {service.value} service.")
+        try:
+            result = measure_startup(service, runs, measurement_dir)
+            click.echo(_format_result(service, result))
+            if import_profile:
+                for name, import_time in profile_imports(service, measurement_dir=measurement_dir):
+                    click.echo(f"  {import_time * 1e3:8.1f} ms  {name}")
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        _append_result(results_path, service, result)
+        if baseline is not None:
+            regressions.extend(
+                f"{service.value} {regression}"
+                for regression in find_regressions(result, baseline, tolerance)
+            )
+
+    if regressions:
+        raise click.ClickException("Regressed: " + "; ".join(regressions))
+    if baseline_path is not None:
+        click.echo("No regressions compared to the baseline.")
+
+
+if __name__ == "__main__":
+    main()
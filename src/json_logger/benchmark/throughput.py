@@ -0,0 +1,639 @@
+"""Measure the throughput and latency of the logger service.
+
+The benchmark starts the logger service in this process on a loopback port, without the
+discovery service, and drives it from several client threads. Each client logs the same request
+over and over, either through the generated gRPC stub or through the LoggerServiceClient of the
+Python measurement example. The results are appended as one JSON line per run to a results file,
+so that runs can be compared and a run can be checked against a baseline.
+
+The clients and the server share the process, and so its CPU time and the GIL. The CPU time
+reported is the CPU time of the whole process.
+"""
+
+import concurrent.futures
+import datetime
+import enum
+import functools
+import importlib
+import json
+import math
+import os
+import pathlib
+import platform
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import click
+import grpc
+import numpy as np
+
+from json_logger.benchmark.server import InProcessLoggerServer, LoopbackDiscoveryClient
+from json_logger.logger_service import CLIENT_NAME_METADATA_KEY, ServerMode
+from json_logger.record_writer import Durability
+from json_logger.sharding import ShardKey
+from json_logger.storage import StorageFormat
+from json_logger.stubs.log_measurement_pb2 import (
+    LogBatchRequest,
+    LogRequest,
+    Waveform,
+    WaveformDataType,
+)
+from json_logger.stubs.log_measurement_pb2_grpc import LogMeasurementStub
+
+# The LoggerServiceClient of the Python measurement example, relative to this file.
+_DEFAULT_CLIENT_DIR = (
+    pathlib.Path(__file__).resolve().parents[3] / "examples" / "python_measurement"
+)
+
+_RESULTS_VERSION = 1
+
+
+class ClientApi(enum.Enum):
+    """How the clients call the logger service."""
+
+    STUB = "stub"
+    """Call the generated gRPC stub directly."""
+
+    CLIENT = "client"
+    """Call through the LoggerServiceClient of the Python measurement example."""
+
+
+class CallPattern(enum.Enum):
+    """Which RPCs the clients log the requests with."""
+
+    UNARY = "unary"
+    """Log each request with one Log call."""
+
+    BATCH = "batch"
+    """Log batch_size requests with one LogBatch call."""
+
+    STREAM = "stream"
+    """Log batch_size requests with one LogStream call."""
+
+    QUEUED = "queued"
+    """Queue each request in an asynchronous LoggerServiceClient, which sends them in batches.
+
+    The latency is the time to queue a request. This requires the client API.
+    """
+
+
+class BenchmarkConfig(NamedTuple):
+    """The workload and the server configuration of a benchmark run."""
+
+    api: ClientApi = ClientApi.STUB
+    pattern: CallPattern = CallPattern.UNARY
+    clients: int = 1
+    calls: int = 1000
+    warmup_calls: int = 100
+    batch_size: int = 100
+    measurements: int = 4
+    waveform_samples: int = 0
+    storage_format: StorageFormat = StorageFormat.JSON
+    durability: Durability = Durability.FLUSH
+    shard_key: ShardKey = ShardKey.NONE
+    server_mode: ServerMode = ServerMode.THREAD
+    indexed: bool = False
+
+    @property
+    def requests_per_call(self) -> int:
+        """The number of log requests that each call logs."""
+        if self.pattern in (CallPattern.BATCH, CallPattern.STREAM):
+            return self.batch_size
+        return 1
+
+    def to_json(self) -> Dict[str, Any]:
+        """Convert the configuration to JSON values."""
+        return {
+            name: value.value if isinstance(value, enum.Enum) else value
+            for name, value in self._asdict().items()
+        }
+
+
+class BenchmarkResult(NamedTuple):
+    """The measured performance of a benchmark run. Times are in seconds."""
+
+    calls: int
+    requests: int
+    measurements: int
+    wall_time: float
+    calls_per_second: float
+    requests_per_second: float
+    measurements_per_second: float
+    latency_mean: float
+    latency_p50: float
+    latency_p99: float
+    latency_p999: float
+    latency_max: float
+    cpu_time: float
+    cpu_utilization: float
+    """The CPU time of the process divided by the wall time. 1.0 is one fully used core."""
+    bytes_written: int
+    """The size of the log files, including the requests of the warmup calls."""
+    bytes_per_request: float
+    bytes_per_second: float
+
+
+def run_benchmark(
+    config: BenchmarkConfig,
+    output_dir: Optional[pathlib.Path] = None,
+    client_dir: pathlib.Path = _DEFAULT_CLIENT_DIR,
+) -> BenchmarkResult:
+    """Run the benchmark against an in-process logger service.
+
+    Args:
+        config: The workload and the server configuration.
+        output_dir: The directory to write the log files to. By default, the log files are
+            written to a temporary directory that is deleted afterward.
+        client_dir: The directory that contains logger_service_client.py, for the client API.
+
+    Returns:
+        The measured performance.
+
+    Raises:
+        ValueError: If the configuration is invalid.
+    """
+    if config.pattern == CallPattern.QUEUED and config.api != ClientApi.CLIENT:
+        raise ValueError("The queued call pattern requires the client API.")
+    if output_dir is None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            return run_benchmark(config, pathlib.Path(temp_dir), client_dir)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    server = InProcessLoggerServer(
+        storage_format=config.storage_format,
+        output_path=str(output_dir / f"measurements.{config.storage_format.value}"),
+        durability=config.durability,
+        shard_key=config.shard_key,
+        index_path=str(output_dir / "measurements.sqlite") if config.indexed else None,
+        server_mode=config.server_mode,
+        grace=1.0,
+    )
+    with server:
+        if config.api == ClientApi.CLIENT:
+            create_client = _client_api_factory(config, server.port, client_dir)
+        else:
+            create_client = _stub_api_factory(config, server.port)
+        latencies, wall_time, cpu_time = _run_clients(config, create_client)
+    bytes_written = sum(path.stat().st_size for path in output_dir.rglob("*") if path.is_file())
+
+    latencies.sort()
+    calls = len(latencies)
+    requests = calls * config.requests_per_call
+    total_requests = (calls + config.clients * config.warmup_calls) * config.requests_per_call
+    bytes_per_request = bytes_written / total_requests
+    return BenchmarkResult(
+        calls=calls,
+        requests=requests,
+        measurements=requests * config.measurements,
+        wall_time=wall_time,
+        calls_per_second=calls / wall_time,
+        requests_per_second=requests / wall_time,
+        measurements_per_second=requests * config.measurements / wall_time,
+        latency_mean=sum(latencies) / calls,
+        latency_p50=_percentile(latencies, 0.5),
+        latency_p99=_percentile(latencies, 0.99),
+        latency_p999=_percentile(latencies, 0.999),
+        latency_max=latencies[-1],
+        cpu_time=cpu_time,
+        cpu_utilization=cpu_time / wall_time,
+        bytes_written=bytes_written,
+        bytes_per_request=bytes_per_request,
+        bytes_per_second=bytes_per_request * requests / wall_time,
+    )
+
+
+# A client is a function that makes one call and a function that closes the client.
+_Client = Tuple[Callable[[], Any], Callable[[], None]]
+
+
+def _run_clients(
+    config: BenchmarkConfig, create_client: Callable[[int], _Client]
+) -> Tuple[List[float], float, float]:
+    start_times: List[float] = []
+
+    def record_start() -> None:
+        start_times.extend((time.perf_counter(), time.process_time()))
+
+    # The clients warm up on their own, then start the measured calls together.
+    barrier = threading.Barrier(config.clients, action=record_start)
+
+    def run_client(client_index: int) -> List[float]:
+        call, close = create_client(client_index)
+        try:
+            for _ in range(config.warmup_calls):
+                call()
+            barrier.wait()
+            latencies = []
+            for _ in range(config.calls):
+                start_time = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - start_time)
+        finally:
+            # Closing the queued client sends the queued requests, so it is part of the run.
+            close()
+        return latencies
+
+    with concurrent.futures.ThreadPoolExecutor(config.clients) as executor:
+        futures = [
+            executor.submit(run_client, client_index) for client_index in range(config.clients)
+        ]
+        try:
+            latencies = [latency for future in futures for latency in future.result()]
+        except BaseException:
+            barrier.abort()
+            raise
+    wall_time = time.perf_counter() - start_times[0]
+    cpu_time = time.process_time() - start_times[1]
+    return latencies, wall_time, cpu_time
+
+
+def _stub_api_factory(config: BenchmarkConfig, port: str) -> Callable[[int], _Client]:
+    request = LogRequest(
+        measured_sites=_sites(config),
+        measured_pins=_pins(config),
+        current_measurements=_values(config, 1e-3),
+        voltage_measurements=_values(config, 1.0),
+        in_compliance=[True] * config.measurements,
+    )
+    if config.waveform_samples:
+        request.waveforms.extend(
+            Waveform(
+                site=site,
+                pin=pin,
+                data_type=WaveformDataType.WAVEFORM_DATA_TYPE_FLOAT64,
+                dt=1e-6,
+                samples=_samples(config).tobytes(),
+            )
+            for site, pin in zip(_sites(config), _pins(config))
+        )
+    batch_request = LogBatchRequest(requests=[request] * config.batch_size)
+
+    def create_client(client_index: int) -> _Client:
+        channel = grpc.insecure_channel(f"localhost:{port}")
+        stub = LogMeasurementStub(channel)
+        metadata = ((CLIENT_NAME_METADATA_KEY, f"client{client_index}"),)
+
+        def log_stream() -> None:
+            stub.LogStream(iter(batch_request.requests), metadata=metadata)
+
+        call: Callable[[], Any]
+        if config.pattern == CallPattern.UNARY:
+            call = functools.partial(stub.Log, request, metadata=metadata)
+        elif config.pattern == CallPattern.BATCH:
+            call = functools.partial(stub.LogBatch, batch_request, metadata=metadata)
+        else:
+            call = log_stream
+        return call, channel.close
+
+    return create_client
+
+
+def _client_api_factory(
+    config: BenchmarkConfig, port: str, client_dir: pathlib.Path
+) -> Callable[[int], _Client]:
+    # The client imports its stubs as a top-level package, so import it from its directory.
+    if str(client_dir) not in sys.path:
+        sys.path.append(str(client_dir))
+    client_module: Any = importlib.import_module("logger_service_client")
+
+    waveforms = []
+    if config.waveform_samples:
+        waveforms = [
+            client_module.create_waveform(site, pin, _samples(config), dt=1e-6)
+            for site, pin in zip(_sites(config), _pins(config))
+        ]
+    arguments = (
+        _sites(config),
+        _pins(config),
+        _values(config, 1e-3),
+        _values(config, 1.0),
+        [True] * config.measurements,
+        waveforms,
+    )
+    batch = [client_module.create_log_request(*arguments)] * config.batch_size
+
+    def create_client(client_index: int) -> _Client:
+        # Each client has its own channel, like separate measurement services.
+        channel_pool = client_module.KeepaliveGrpcChannelPool()
+        client = client_module.LoggerServiceClient(
+            discovery_client=LoopbackDiscoveryClient(port),
+            grpc_channel_pool=channel_pool,
+            client_name=f"client{client_index}",
+            asynchronous=config.pattern == CallPattern.QUEUED,
+        )
+
+        def log_stream() -> None:
+            with client.open_log_stream() as stream:
+                for _ in range(config.batch_size):
+                    stream.log_measurement(*arguments)
+
+        call: Callable[[], Any]
+        if config.pattern in (CallPattern.UNARY, CallPattern.QUEUED):
+            call = functools.partial(client.log_measurement, *arguments)
+        elif config.pattern == CallPattern.BATCH:
+            call = functools.partial(client.log_measurements, batch)
+        else:
+            call = log_stream
+
+        def close() -> None:
+            client.close()
+            channel_pool.close()
+
+        return call, close
+
+    return create_client
+
+
+def _sites(config: BenchmarkConfig) -> List[int]:
+    return list(range(config.measurements))
+
+
+def _pins(config: BenchmarkConfig) -> List[str]:
+    return [f"Pin{index}" for index in range(config.measurements)]
+
+
+def _values(config: BenchmarkConfig, scale: float) -> List[float]:
+    return [scale * (index + 1) for index in range(config.measurements)]
+
+
+def _samples(config: BenchmarkConfig) -> np.ndarray:
+    return np.sin(np.linspace(0.0, 2.0 * np.pi, config.waveform_samples))
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    # The nearest-rank percentile, so that it is one of the measured values.
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "grpc": grpc.__version__,
+    }
+
+
+def find_regressions(
+    result: BenchmarkResult, baseline: BenchmarkResult, tolerance: float
+) -> List[str]:
+    """Compare a result with a baseline result of the same configuration.
+
+    Args:
+        result: The result to check.
+        baseline: The result to compare with.
+        tolerance: The fraction by which the throughput may drop and the latency may rise.
+
+    Returns:
+        A description of each metric that regressed by more than the tolerance.
+    """
+    regressions = []
+    for name in ("requests_per_second", "bytes_per_second"):
+        value, baseline_value = getattr(result, name), getattr(baseline, name)
+        if value < baseline_value * (1.0 - tolerance):
+            regressions.append(f"{name} dropped from {baseline_value:.6g} to {value:.6g}")
+    # The p99.9 latency of short runs depends on a few calls, so it is only reported.
+    for name in ("latency_p50", "latency_p99"):
+        value, baseline_value = getattr(result, name), getattr(baseline, name)
+        if value > baseline_value * (1.0 + tolerance):
+            regressions.append(f"{name} rose from {baseline_value:.6g} to {value:.6g}")
+    return regressions
+
+
+def load_baseline(path: pathlib.Path, config: BenchmarkConfig) -> Optional[BenchmarkResult]:
+    """Load the latest result of a configuration from a results file.
+
+    Args:
+        path: The results file, with one JSON line per run.
+        config: The configuration to find.
+
+    Returns:
+        The latest result with the same configuration, or None if there is none.
+    """
+    baseline = None
+    with path.open() as file:
+        for line in file:
+            run = json.loads(line)
+            if run.get("version") == _RESULTS_VERSION and run["config"] == config.to_json():
+                baseline = BenchmarkResult(**run["result"])
+    return baseline
+
+
+def _append_result(path: pathlib.Path, config: BenchmarkConfig, result: BenchmarkResult) -> None:
+    run = {
+        "version": _RESULTS_VERSION,
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": _environment(),
+        "config": config.to_json(),
+        "result": result._asdict(),
+    }
+    with path.open("a") as file:
+        file.write(json.dumps(run) + "\n")
+
+
+def _format_result(result: BenchmarkResult) -> str:
+    return "\n".join(
+        [
+            f"{result.calls} calls, {result.requests} requests in {result.wall_time:.3f} s",
+            f"throughput: {result.calls_per_second:.1f} calls/s, "
+            f"{result.requests_per_second:.1f} requests/s, "
+            f"{result.measurements_per_second:.1f} measurements/s",
+            f"latency: p50 {result.latency_p50 * 1e3:.3f} ms, "
+            f"p99 {result.latency_p99 * 1e3:.3f} ms, "
+            f"p99.9 {result.latency_p999 * 1e3:.3f} ms, "
+            f"max {result.latency_max * 1e3:.3f} ms",
+            f"cpu: {result.cpu_time:.3f} s ({result.cpu_utilization:.0%} of one core)",
+            f"written: {result.bytes_written} bytes, {result.bytes_per_request:.1f} bytes/request "
+            f"({result.bytes_per_second / 1e6:.2f} MB/s)",
+        ]
+    )
+
+
+@click.command
+@click.option(
+    "--api",
+    type=click.Choice([api.value for api in ClientApi]),
+    default=ClientApi.STUB.value,
+    show_default=True,
+    help="Whether to call the gRPC stub directly or through LoggerServiceClient.",
+)
+@click.option(
+    "--pattern",
+    type=click.Choice([pattern.value for pattern in CallPattern]),
+    default=CallPattern.UNARY.value,
+    show_default=True,
+    help="Which RPCs to log the requests with. queued requires --api client.",
+)
+@click.option(
+    "--clients",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of client threads.",
+)
+@click.option(
+    "--calls",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="The number of measured calls per client.",
+)
+@click.option(
+    "--warmup-calls",
+    type=click.IntRange(min=0),
+    default=100,
+    show_default=True,
+    help="The number of calls per client before the measured calls.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+    help="The number of requests per call for the batch and stream patterns.",
+)
+@click.option(
+    "--measurements",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="The number of site and pin measurements per request.",
+)
+@click.option(
+    "--waveform-samples",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="The number of samples of a waveform logged with each measurement, or 0 for none.",
+)
+@click.option(
+    "--format",
+    "storage_format",
+    type=click.Choice([storage_format.value for storage_format in StorageFormat]),
+    default=StorageFormat.JSON.value,
+    show_default=True,
+    help="The log file format of the server.",
+)
+@click.option(
+    "--durability",
+    type=click.Choice([durability.value for durability in Durability]),
+    default=Durability.FLUSH.value,
+    show_default=True,
+    help="The durability of the server's log files.",
+)
+@click.option(
+    "--shard-by",
+    "shard_key",
+    type=click.Choice([shard_key.value for shard_key in ShardKey]),
+    default=ShardKey.NONE.value,
+    show_default=True,
+    help="How the server splits the measurements across log files.",
+)
+@click.option(
+    "--server-mode",
+    type=click.Choice([server_mode.value for server_mode in ServerMode]),
+    default=ServerMode.THREAD.value,
+    show_default=True,
+    help="The kind of gRPC server.",
+)
+@click.option(
+    "--index", "indexed", is_flag=True, help="Index the measurements in a SQLite database."
+)
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+    default=None,
+    help="Keep the log files in this directory. By default, they are deleted.",
+)
+@click.option(
+    "--client-dir",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    default=_DEFAULT_CLIENT_DIR,
+    show_default=True,
+    help="The directory that contains logger_service_client.py, for --api client.",
+)
+@click.option(
+    "--results",
+    "results_path",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    default=pathlib.Path("benchmark_results.jsonl"),
+    show_default=True,
+    help="Append the configuration and the result of the run to this JSON lines file.",
+)
+@click.option(
+    "--baseline",
+    "baseline_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    default=None,
+    help="Fail if the run regressed compared to the latest run of the same configuration in "
+    "this results file.",
+)
+@click.option(
+    "--tolerance",
+    type=click.FloatRange(min=0.0),
+    default=0.1,
+    show_default=True,
+    help="The fraction by which the throughput may drop and the latency may rise.",
+)
+def main(
+    api: str,
+    pattern: str,
+    clients: int,
+    calls: int,
+    warmup_calls: int,
+    batch_size: int,
+    measurements: int,
+    waveform_samples: int,
+    storage_format: str,
+    durability: str,
+    shard_key: str,
+    server_mode: str,
+    indexed: bool,
+    output_dir: Optional[pathlib.Path],
+    client_dir: pathlib.Path,
+    results_path: pathlib.Path,
+    baseline_path: Optional[pathlib.Path],
+    tolerance: float,
+) -> None:
+    """Measure the throughput and latency of an in-process logger service."""
+    config = BenchmarkConfig(
+        api=ClientApi(api),
+        pattern=CallPattern(pattern),
+        clients=clients,
+        calls=calls,
+        warmup_calls=warmup_calls,
+        batch_size=batch_size,
+        measurements=measurements,
+        waveform_samples=waveform_samples,
+        storage_format=StorageFormat(storage_format),
+        durability=Durability(durability),
+        shard_key=ShardKey(shard_key),
+        server_mode=ServerMode(server_mode),
+        indexed=indexed,
+    )
+    # Load the baseline first, in case it is the results file.
+    baseline = None
+    if baseline_path is not None:
+        baseline = load_baseline(baseline_path, config)
+        if baseline is None:
+            click.echo(f"{baseline_path} has no run of this configuration to compare with.")
+    try:
+        result = run_benchmark(config, output_dir, client_dir)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    click.echo(_format_result(result))
+    _append_result(results_path, config, result)
+
+    if baseline is not None:
+        regressions = find_regressions(result, baseline, tolerance)
+        if regressions:
+            raise click.ClickException("Regressed: " + "; ".join(regressions))
+        click.echo("No regressions compared to the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Convert a raw log file written by the logger service to JSON lines."""
+
+import pathlib
+from typing import Optional
+
+import click
+
+from json_logger.storage import convert_raw_to_json
+
+
+@click.command
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_path", type=click.Path(dir_okay=False), required=False)
+def main(input_path: str, output_path: Optional[str]) -> None:
+    """Convert INPUT_PATH, written with --format raw, to JSON lines in OUTPUT_PATH.
+
+    OUTPUT_PATH defaults to INPUT_PATH with the suffix .json.
+    """
+    if output_path is None:
+        output_path = str(pathlib.Path(input_path).with_suffix(".json"))
+    try:
+        count = convert_raw_to_json(input_path, output_path)
+    except ValueError as e:
+        raise click.ClickException(f"Failed to convert {input_path}: {e}") from e
+    click.echo(f"Converted {count} log requests to {output_path}.")
+
+
+if __name__ == "__main__":
+    main()
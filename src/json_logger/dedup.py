@@ -0,0 +1,89 @@
+"""Dropping of log requests that a producer delivers more than once."""
+
+import collections
+import threading
+from typing import Dict, List, Sequence
+
+from json_logger.stubs.log_measurement_pb2 import LogRequest
+
+DEFAULT_MAX_PRODUCERS = 10000
+
+
+class Deduplicator:
+    """Drops the log requests whose sequence number their producer has already delivered.
+
+    Clients that spool their requests, such as the Python example's LoggerServiceClient with a
+    spool file, send each request with a producer ID and a sequence number that increases with
+    each request, and send a batch again if they don't know whether it was logged. The
+    deduplicator remembers the highest sequence number of each producer and drops the requests
+    at or below it. Requests without a producer ID are never dropped.
+
+    The sequence numbers are only remembered in memory, for the producers that delivered
+    requests most recently, so a request that is delivered again after the logger service
+    restarts is logged twice.
+    """
+
+    def __init__(self, max_producers: int = DEFAULT_MAX_PRODUCERS) -> None:
+        """Initialize the deduplicator.
+
+        Args:
+            max_producers: The number of producers whose sequence numbers are remembered.
+        """
+        self._max_producers = max_producers
+        self._sequence_numbers: "collections.OrderedDict[str, int]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, requests: Sequence[LogRequest]) -> Sequence[LogRequest]:
+        """Drop the requests that were already delivered.
+
+        The sequence numbers of the returned requests are not remembered until they are passed
+        to record(), so that requests which fail to be logged can be delivered again. Requests
+        that are delivered again while the first delivery is still being logged are logged
+        twice.
+
+        Args:
+            requests: The requests of a call, in the order in which they were produced.
+
+        Returns:
+            The requests that were not delivered before. If no request has a producer ID, this
+            is the given sequence.
+        """
+        if not any(request.producer_id for request in requests):
+            return requests
+        new_requests: List[LogRequest] = []
+        # The highest sequence number of each producer, including the earlier requests of this
+        # call.
+        sequence_numbers: Dict[str, int] = {}
+        with self._lock:
+            for request in requests:
+                producer_id = request.producer_id
+                if not producer_id:
+                    new_requests.append(request)
+                    continue
+                sequence_number = sequence_numbers.get(producer_id)
+                if sequence_number is None:
+                    sequence_number = self._sequence_numbers.get(producer_id, 0)
+                if request.sequence_number <= sequence_number:
+                    continue
+                sequence_numbers[producer_id] = request.sequence_number
+                new_requests.append(request)
+        return new_requests
+
+    def record(self, requests: Sequence[LogRequest]) -> None:
+        """Remember the sequence numbers of requests that were logged.
+
+        Args:
+            requests: The requests returned by filter(), once they are submitted to the writers.
+        """
+        if not any(request.producer_id for request in requests):
+            return
+        with self._lock:
+            for request in requests:
+                producer_id = request.producer_id
+                if not producer_id:
+                    continue
+                if request.sequence_number > self._sequence_numbers.get(producer_id, 0):
+                    self._sequence_numbers[producer_id] = request.sequence_number
+                self._sequence_numbers.move_to_end(producer_id)
+            while len(self._sequence_numbers) > self._max_producers:
+                self._sequence_numbers.popitem(last=False)
@@ -0,0 +1,201 @@
+"""A SQLite index of the logged measurements that supports filtered queries."""
+
+import itertools
+import math
+import sqlite3
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from json_logger.record_writer import Durability, RecordWriter
+from json_logger.storage import PathType, StorageBackend
+from json_logger.stubs.log_measurement_pb2 import (
+    ComplianceFilter,
+    LogRequest,
+    QueryRequest,
+    QueryResponse,
+)
+
+_Row = Tuple[float, Optional[int], Optional[str], Optional[float], Optional[float], Optional[bool]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    timestamp REAL NOT NULL,
+    site INTEGER,
+    pin TEXT,
+    voltage REAL,
+    current REAL,
+    in_compliance INTEGER
+);
+CREATE INDEX IF NOT EXISTS measurements_by_site_pin ON measurements (site, pin, timestamp);
+CREATE INDEX IF NOT EXISTS measurements_by_time ON measurements (timestamp);
+"""
+
+_INSERT = "INSERT INTO measurements VALUES (?, ?, ?, ?, ?, ?)"
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class MeasurementIndex:
+    """Stores one row per measured site and pin in a SQLite database in WAL mode.
+
+    The rows are built on the request handler threads and inserted in batches, one transaction
+    per batch, by a record writer thread. In WAL mode, queries read a consistent snapshot
+    without blocking the inserts.
+    """
+
+    def __init__(
+        self, path: PathType, *, max_batch_records: int = 1000, max_batch_delay: float = 0.05
+    ) -> None:
+        """Initialize the measurement index.
+
+        Args:
+            path: The SQLite database file.
+            max_batch_records: The maximum number of requests inserted in one transaction.
+            max_batch_delay: The maximum time in seconds to wait for more requests before
+                inserting a batch.
+        """
+        self._path = path
+        self._writer = RecordWriter(
+            _IndexBackend(path),
+            durability=Durability.FLUSH,
+            max_batch_records=max_batch_records,
+            max_batch_delay=max_batch_delay,
+        )
+
+    def start(self) -> None:
+        """Open the database and start inserting rows."""
+        self._writer.start()
+
+    def add(self, requests: Sequence[LogRequest]) -> None:
+        """Queue the measurements of log requests for insertion."""
+        self._writer.submit(self._writer.backend.encode(requests))
+
+    def try_add(self, requests: Sequence[LogRequest]) -> bool:
+        """Queue the measurements of log requests for insertion if the queue has room.
+
+        Returns:
+            False if the queue is full and the measurements were not queued.
+        """
+        return self._writer.try_submit(self._writer.backend.encode(requests))
+
+    def close(self) -> None:
+        """Insert the queued rows and close the database."""
+        self._writer.close()
+
+    def query(self, request: QueryRequest) -> Iterator[QueryResponse]:
+        """Query the logged measurements.
+
+        The query runs on its own connection and reads the rows in chunks, so a query over
+        many rows uses bounded memory.
+
+        Args:
+            request: The filters and the chunk size.
+
+        Returns:
+            An iterator of responses, each holding a chunk of measurements ordered by time.
+        """
+        conditions = []
+        parameters: List[object] = []
+        if request.sites:
+            conditions.append(f"site IN ({', '.join('?' * len(request.sites))})")
+            parameters.extend(request.sites)
+        if request.pins:
+            conditions.append(f"pin IN ({', '.join('?' * len(request.pins))})")
+            parameters.extend(request.pins)
+        if request.start_time:
+            conditions.append("timestamp >= ?")
+            parameters.append(request.start_time)
+        if request.end_time:
+            conditions.append("timestamp < ?")
+            parameters.append(request.end_time)
+        if request.compliance == ComplianceFilter.COMPLIANCE_FILTER_IN_COMPLIANCE:
+            conditions.append("in_compliance = 1")
+        elif request.compliance == ComplianceFilter.COMPLIANCE_FILTER_OUT_OF_COMPLIANCE:
+            conditions.append("in_compliance = 0")
+        sql = "SELECT * FROM measurements"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY timestamp"
+        chunk_size = request.max_chunk_size or DEFAULT_CHUNK_SIZE
+
+        # The chunks may be read on different threads, but never at the same time.
+        connection = sqlite3.connect(self._path, check_same_thread=False)
+        try:
+            cursor = connection.execute(sql, parameters)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield _to_query_response(rows)
+        finally:
+            connection.close()
+
+
+def _to_query_response(rows: List[_Row]) -> QueryResponse:
+    timestamps, sites, pins, voltages, currents, in_compliance = zip(*rows)
+    # Fields that were missing from a log request are stored as NULL.
+    return QueryResponse(
+        timestamps=timestamps,
+        measured_sites=[0 if site is None else site for site in sites],
+        measured_pins=["" if pin is None else pin for pin in pins],
+        voltage_measurements=[math.nan if value is None else value for value in voltages],
+        current_measurements=[math.nan if value is None else value for value in currents],
+        in_compliance=[bool(value) for value in in_compliance],
+    )
+
+
+class _IndexBackend(StorageBackend[List[_Row]]):
+    def __init__(self, path: PathType) -> None:
+        self._path = path
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def encode(self, requests: Sequence[LogRequest]) -> List[_Row]:
+        """Convert log requests into rows, stamped with the current time."""
+        timestamp = time.time()
+        return [
+            (timestamp, site, pin, voltage, current, in_compliance)
+            for request in requests
+            for site, pin, voltage, current, in_compliance in itertools.zip_longest(
+                request.measured_sites,
+                request.measured_pins,
+                request.voltage_measurements,
+                request.current_measurements,
+                request.in_compliance,
+            )
+        ]
+
+    def size_of(self, record: List[_Row]) -> int:
+        """Get the approximate size of the rows in bytes."""
+        return 48 * len(record)
+
+    def open(self) -> None:
+        """Open the database and create the table if necessary."""
+        # The connection is opened here but used by the writer thread.
+        self._connection = sqlite3.connect(self._path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def write(self, records: Sequence[List[_Row]]) -> None:
+        """Insert a batch of rows in one transaction."""
+        connection = self._get_connection()
+        with connection:
+            connection.executemany(_INSERT, itertools.chain.from_iterable(records))
+
+    def flush(self) -> None:
+        """Do nothing, because each batch is committed by write()."""
+
+    def sync(self) -> None:
+        """Checkpoint the write-ahead log into the database file."""
+        self._get_connection().execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        """Close the database."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            raise RuntimeError(f"The index {self._path} is not open.")
+        return self._connection
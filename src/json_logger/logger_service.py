@@ -1,30 +1,190 @@
 "A user-defined service to log the measurement data to a JSON file."
 
-import json
+import asyncio
+import concurrent.futures
+import enum
+import functools
+import ipaddress
+import logging
+import pathlib
+import threading
+import time
+import urllib.parse
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+import click
 import grpc
+from google.protobuf.message import DecodeError
 from grpc.framework.foundation import logging_pool
-from ni_measurement_plugin_sdk_service.discovery import DiscoveryClient, ServiceLocation
-from ni_measurement_plugin_sdk_service.measurement.info import ServiceInfo
 
-from json_logger.stubs.log_measurement_pb2 import LogRequest, LogResponse
+from json_logger.dedup import Deduplicator
+from json_logger.index import MeasurementIndex
+from json_logger.metrics import (
+    AsyncMetricsInterceptor,
+    LoggerMetrics,
+    MetricsHttpServer,
+    MetricsInterceptor,
+)
+from json_logger.record_writer import Durability, RecordWriter
+from json_logger.segments import Compression, SegmentStore
+from json_logger.sharding import ShardedWriter, ShardKey, shard_path
+from json_logger.shared_memory import SharedMemoryReceiver
+from json_logger.storage import (
+    PathType,
+    RawBackend,
+    StorageBackend,
+    StorageFormat,
+    WaveformBackend,
+    create_backend,
+    split_log_batch,
+    waveform_samples,
+)
+from json_logger.stubs.log_measurement_pb2 import (
+    GetStatsRequest,
+    GetStatsResponse,
+    GetSummaryRequest,
+    GetSummaryResponse,
+    LogBatchRequest,
+    LogBatchResponse,
+    LogRequest,
+    LogResponse,
+    LogStreamResponse,
+    OpenSharedMemoryRequest,
+    OpenSharedMemoryResponse,
+    QueryRequest,
+    QueryResponse,
+    SubscribeRequest,
+    SubscribeResponse,
+)
 from json_logger.stubs.log_measurement_pb2_grpc import (
     LogMeasurementServicer,
     add_LogMeasurementServicer_to_server,
 )
+from json_logger.subscriptions import SubscriptionHub
+from json_logger.summary import MeasurementSummary
+
+if TYPE_CHECKING:
+    from ni_measurement_plugin_sdk_service.discovery import DiscoveryClient
+
+_logger = logging.getLogger(__name__)
 
 GRPC_SERVICE_INTERFACE_NAME = "user.defined.logger.v1.LogService"
 GRPC_SERVICE_CLASS = "user.defined.jsonlogger.v1.LogService"
 DISPLAY_NAME = "JSON Logger Service"
 
+CLIENT_NAME_METADATA_KEY = "logger-client-name"
+"""The gRPC metadata key with which clients identify the calling measurement service."""
+
+_DEFAULT_OUTPUT_PATHS = {
+    StorageFormat.JSON: "measurements.json",
+    StorageFormat.COLUMNAR: "measurements.columns",
+    StorageFormat.RAW: "measurements.raw",
+}
+
+# Allow the keepalive pings with which clients keep idle connections open.
+_SERVER_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+]
+
+_LOG_MEASUREMENT_SERVICE_NAME = "logging_service.LogMeasurement"
+
+_TOO_MANY_LOG_STREAMS = "Too many clients are streaming log requests."
+
+DEFAULT_MAX_LOG_STREAMS = 16
+
+# The threads that handle the unary calls. In the thread server mode, each open LogStream and
+# Subscribe call holds a thread of its own on top of these, so the pool is sized from their limits.
+_THREAD_POOL_SIZE = 10
+
+
+class _LogResult(NamedTuple):
+    record_count: int
+    bytes_written: int
+
+
+class _EncodedRequests(NamedTuple):
+    requests: Sequence[LogRequest]
+    """The requests that were not delivered before."""
+    records: List[Tuple[RecordWriter, Any]]
 
-class LoggerService(LogMeasurementServicer):
-    """A gRPC service that logs measurement data to a JSON file."""
+
+class ServerMode(enum.Enum):
+    """The kind of gRPC server that hosts the logger service."""
+
+    THREAD = "thread"
+    """A grpc.server that handles each call on a thread from a thread pool."""
+
+    ASYNCIO = "asyncio"
+    """A grpc.aio.server that handles the calls as coroutines on one event loop."""
+
+
+class _LoggerServiceBase(LogMeasurementServicer):
+    """The state that LoggerService and AsyncLoggerService share."""
+
+    def __init__(
+        self,
+        writer: ShardedWriter,
+        index: Optional[MeasurementIndex] = None,
+        waveform_writer: Optional[ShardedWriter] = None,
+        metrics: Optional[LoggerMetrics] = None,
+        summary: Optional[MeasurementSummary] = None,
+        shared_memory: Optional[SharedMemoryReceiver] = None,
+        subscriptions: Optional[SubscriptionHub] = None,
+        max_log_streams: int = DEFAULT_MAX_LOG_STREAMS,
+    ) -> None:
+        """Initialize the logger service.
+
+        Args:
+            writer: The writer that appends the encoded records to the log files.
+            index: The index to add the measurements to, so that they can be queried.
+            waveform_writer: The writer that appends the waveforms to the waveform files. If
+                this is None, the waveforms are not logged.
+            metrics: The metrics to record the encoding time in and to return from GetStats.
+            summary: The running statistics to add the measurements to and to return from
+                GetSummary.
+            shared_memory: The receiver that drains the ring buffers opened with
+                OpenSharedMemory. If this is None, clients can't open ring buffers.
+            subscriptions: The hub to publish the measurements to and to subscribe to with
+                Subscribe. If this is None, clients can't subscribe.
+            max_log_streams: The maximum number of LogStream calls open at once. Further calls
+                are rejected with RESOURCE_EXHAUSTED.
+        """
+        self._writer = writer
+        self._index = index
+        self._waveform_writer = waveform_writer
+        self._metrics = metrics if metrics is not None else LoggerMetrics()
+        self._summary = summary
+        self._shared_memory = shared_memory
+        self._subscriptions = subscriptions
+        self._deduplicator = Deduplicator()
+        self._log_streams = threading.BoundedSemaphore(max_log_streams)
+
+
+class LoggerService(_LoggerServiceBase):
+    """A gRPC service that logs measurement data to a JSON file.
+
+    Requests with a producer ID and a sequence number that the producer has already delivered
+    are dropped, so clients can send a batch again when they don't know whether it was logged.
+    """
 
     def Log(  # noqa: N802 - function name should be lowercase
         self, request: LogRequest, context: grpc.ServicerContext
     ) -> LogResponse:
-        """Logs the received measurement data to a JSON file and prints the measurement.
+        """Logs the received measurement data to the log file and prints the measurement.
 
         Args:
             request: The measurement data to be logged.
@@ -33,32 +193,1087 @@ class LoggerService(LogMeasurementServicer):
         Returns:
             The response after logging the measurement.
         """
-        data = {
-            "measured_sites": list(request.measured_sites),
-            "measured_pins": list(request.measured_pins),
-            "current_measurements": list(request.current_measurements),
-            "voltage_measurements": list(request.voltage_measurements),
-            "in_compliance": list(request.in_compliance),
-        }
-
-        # Append new data to the JSON file
-        with open("measurements.json", mode="a", newline="") as file:
-            json.dump(data, file)
-            file.write("\n")
-
-        # Note: The JSON formatting is not strictly followed as this is only a sample example.
+        # Queue the record for the writer thread to append to the log file.
+        self._log([request], _get_client_name(context), context)
         return LogResponse()
 
+    def LogStream(  # noqa: N802 - function name should be lowercase
+        self, request_iterator: Iterator[LogRequest], context: grpc.ServicerContext
+    ) -> LogStreamResponse:
+        """Logs every measurement received on the stream to the log file.
+
+        Args:
+            request_iterator: The stream of measurement data to be logged.
+            context: The context of the request.
+
+        Returns:
+            The number of records and bytes logged once the client closes the stream.
+        """
+        # Each open stream holds a thread of the server, so limit them to leave threads for the
+        # unary calls.
+        if not self._log_streams.acquire(blocking=False):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, _TOO_MANY_LOG_STREAMS)
+        try:
+            client_name = _get_client_name(context)
+            record_count = 0
+            bytes_written = 0
+            for request in request_iterator:
+                result = self._log([request], client_name, context)
+                record_count += result.record_count
+                bytes_written += result.bytes_written
+        finally:
+            self._log_streams.release()
+        return LogStreamResponse(record_count=record_count, bytes_written=bytes_written)
+
+    def LogBatch(  # noqa: N802 - function name should be lowercase
+        self, request: LogBatchRequest, context: grpc.ServicerContext
+    ) -> LogBatchResponse:
+        """Logs a batch of measurements to the log file with one write.
+
+        Args:
+            request: The batch of measurement data to be logged.
+            context: The context of the request.
+
+        Returns:
+            The number of records and bytes logged.
+        """
+        result = self._log(request.requests, _get_client_name(context), context)
+        return LogBatchResponse(
+            record_count=result.record_count, bytes_written=result.bytes_written
+        )
+
+    def _log(
+        self, requests: Sequence[LogRequest], client_name: str, context: grpc.ServicerContext
+    ) -> _LogResult:
+        try:
+            return _log_requests(self, requests, client_name)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            raise
+
+    def Query(  # noqa: N802 - function name should be lowercase
+        self, request: QueryRequest, context: grpc.ServicerContext
+    ) -> Iterator[QueryResponse]:
+        """Streams the logged measurements that match the filters, ordered by time.
+
+        Args:
+            request: The filters and the chunk size.
+            context: The context of the request.
+
+        Returns:
+            An iterator of responses, each holding a chunk of matching measurements.
+        """
+        if self._index is None:
+            context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                "The logger service was started without a measurement index.",
+            )
+        assert self._index is not None
+        yield from self._index.query(request)
+
+    def GetStats(  # noqa: N802 - function name should be lowercase
+        self, request: GetStatsRequest, context: grpc.ServicerContext
+    ) -> GetStatsResponse:
+        """Gets the request counts, latencies, queue depth and write throughput of the service.
+
+        Args:
+            request: The empty request.
+            context: The context of the request.
+
+        Returns:
+            A snapshot of the metrics.
+        """
+        return self._metrics.get_stats(_queued_records(self._writer, self._waveform_writer))
+
+    def GetSummary(  # noqa: N802 - function name should be lowercase
+        self, request: GetSummaryRequest, context: grpc.ServicerContext
+    ) -> GetSummaryResponse:
+        """Gets the running statistics of each site and pin.
+
+        Args:
+            request: The sites and pins to summarize and the number of time windows to return.
+            context: The context of the request.
+
+        Returns:
+            The statistics since the logger service started and in the most recent time windows.
+        """
+        if self._summary is None:
+            context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                "The logger service was started without a summary.",
+            )
+        assert self._summary is not None
+        return self._summary.get_summary(request)
 
-def start_server() -> None:
-    """Starts the gRPC server and registers the service with the service registry."""
-    server = grpc.server(logging_pool.pool(max_workers=10))
-    add_LogMeasurementServicer_to_server(LoggerService(), server)
+    def OpenSharedMemory(  # noqa: N802 - function name should be lowercase
+        self, request: OpenSharedMemoryRequest, context: grpc.ServicerContext
+    ) -> OpenSharedMemoryResponse:
+        """Opens a ring buffer in shared memory for a client on the same host.
+
+        The client writes serialized log requests into the ring buffer instead of calling Log,
+        and the service logs them in bulk.
+
+        Args:
+            request: The capacity of the ring buffer.
+            context: The context of the request.
+
+        Returns:
+            The name, capacity and token of the ring buffer.
+        """
+        error = _check_shared_memory(self._shared_memory, context)
+        if error:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, error)
+        assert self._shared_memory is not None
+        log = functools.partial(_log_drained, self, _get_client_name(context))
+        return _open_shared_memory(self._shared_memory, request, log)
+
+    def Subscribe(  # noqa: N802 - function name should be lowercase
+        self, request: SubscribeRequest, context: grpc.ServicerContext
+    ) -> Iterator[SubscribeResponse]:
+        """Streams the measurements that match the filters as they are logged.
+
+        Each response holds the measurements logged since the previous response, and at most
+        max_rate responses are sent per second. If the client reads more slowly than the
+        measurements are logged, its oldest measurements are dropped and counted in the next
+        response, without slowing down the logging or the other subscribers.
+
+        Args:
+            request: The filters, the rate and the decimation of the responses.
+            context: The context of the request.
+
+        Returns:
+            An iterator of responses, which ends when the logger service stops.
+        """
+        if self._subscriptions is None:
+            context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                "The logger service was started without subscriptions.",
+            )
+        assert self._subscriptions is not None
+        ready = threading.Event()
+        try:
+            subscription = self._subscriptions.subscribe(request, ready.set)
+        except RuntimeError:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "The logger service is stopping.")
+            raise
+        if subscription is None:
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Too many clients have subscribed.")
+        assert subscription is not None
+        # Each subscription holds a thread of the server, so release it as soon as the client
+        # cancels the call.
+        if not context.add_callback(subscription.close):
+            subscription.close()
+        try:
+            next_send_time = 0.0
+            while True:
+                ready.wait()
+                ready.clear()
+                delay = next_send_time - time.monotonic()
+                if delay > 0 and not subscription.closed:
+                    # Let the measurements of the interval pile up into one response. While
+                    # they are queued, only closing the subscription sets the event.
+                    ready.wait(delay)
+                if subscription.closed:
+                    return
+                response = subscription.take()
+                if response is not None:
+                    next_send_time = time.monotonic() + subscription.interval
+                    yield response
+        finally:
+            self._subscriptions.unsubscribe(subscription)
+
+
+class AsyncLoggerService(_LoggerServiceBase):
+    """A grpc.aio version of LoggerService that handles the calls as coroutines."""
+
+    async def Log(  # noqa: N802 - function name should be lowercase
+        self, request: LogRequest, context: grpc.aio.ServicerContext
+    ) -> LogResponse:
+        """See LoggerService.Log."""
+        await self._log([request], _get_client_name(context), context)
+        return LogResponse()
+
+    async def LogStream(  # noqa: N802 - function name should be lowercase
+        self, request_iterator: AsyncIterator[LogRequest], context: grpc.aio.ServicerContext
+    ) -> LogStreamResponse:
+        """See LoggerService.LogStream."""
+        if not self._log_streams.acquire(blocking=False):
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, _TOO_MANY_LOG_STREAMS)
+        try:
+            client_name = _get_client_name(context)
+            record_count = 0
+            bytes_written = 0
+            async for request in request_iterator:
+                result = await self._log([request], client_name, context)
+                record_count += result.record_count
+                bytes_written += result.bytes_written
+        finally:
+            self._log_streams.release()
+        return LogStreamResponse(record_count=record_count, bytes_written=bytes_written)
+
+    async def LogBatch(  # noqa: N802 - function name should be lowercase
+        self, request: LogBatchRequest, context: grpc.aio.ServicerContext
+    ) -> LogBatchResponse:
+        """See LoggerService.LogBatch."""
+        result = await self._log(request.requests, _get_client_name(context), context)
+        return LogBatchResponse(
+            record_count=result.record_count, bytes_written=result.bytes_written
+        )
+
+    async def _log(
+        self, requests: Sequence[LogRequest], client_name: str, context: grpc.aio.ServicerContext
+    ) -> _LogResult:
+        try:
+            encoded = _encode_requests(self, requests, client_name)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            raise
+        if not encoded.requests:
+            return _LogResult(0, 0)
+        loop = asyncio.get_running_loop()
+        for writer, record in encoded.records:
+            # The writer thread does the file I/O. Only fall back to an executor thread when the
+            # writer's queue is full, because submit() would then block the event loop.
+            if not writer.try_submit(record):
+                await loop.run_in_executor(None, writer.submit, record)
+        if self._index is not None and not self._index.try_add(encoded.requests):
+            await loop.run_in_executor(None, self._index.add, encoded.requests)
+        return _finish_logging(self, encoded)
+
+    async def Query(  # noqa: N802 - function name should be lowercase
+        self, request: QueryRequest, context: grpc.aio.ServicerContext
+    ) -> AsyncIterator[QueryResponse]:
+        """See LoggerService.Query."""
+        if self._index is None:
+            await context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                "The logger service was started without a measurement index.",
+            )
+        assert self._index is not None
+        # SQLite blocks, so read each chunk on an executor thread.
+        loop = asyncio.get_running_loop()
+        responses = self._index.query(request)
+        while True:
+            response = await loop.run_in_executor(None, next, responses, None)
+            if response is None:
+                return
+            yield response
+
+    async def GetStats(  # noqa: N802 - function name should be lowercase
+        self, request: GetStatsRequest, context: grpc.aio.ServicerContext
+    ) -> GetStatsResponse:
+        """See LoggerService.GetStats."""
+        return self._metrics.get_stats(_queued_records(self._writer, self._waveform_writer))
+
+    async def GetSummary(  # noqa: N802 - function name should be lowercase
+        self, request: GetSummaryRequest, context: grpc.aio.ServicerContext
+    ) -> GetSummaryResponse:
+        """See LoggerService.GetSummary."""
+        if self._summary is None:
+            await context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                "The logger service was started without a summary.",
+            )
+        assert self._summary is not None
+        return self._summary.get_summary(request)
+
+    async def OpenSharedMemory(  # noqa: N802 - function name should be lowercase
+        self, request: OpenSharedMemoryRequest, context: grpc.aio.ServicerContext
+    ) -> OpenSharedMemoryResponse:
+        """See LoggerService.OpenSharedMemory."""
+        error = _check_shared_memory(self._shared_memory, context)
+        if error:
+            await context.abort(grpc.StatusCode.FAILED_PRECONDITION, error)
+        assert self._shared_memory is not None
+        # The receiver thread logs the drained requests without blocking the event loop.
+        log = functools.partial(_log_drained, self, _get_client_name(context))
+        return _open_shared_memory(self._shared_memory, request, log)
+
+    async def Subscribe(  # noqa: N802 - function name should be lowercase
+        self, request: SubscribeRequest, context: grpc.aio.ServicerContext
+    ) -> AsyncIterator[SubscribeResponse]:
+        """See LoggerService.Subscribe."""
+        if self._subscriptions is None:
+            await context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                "The logger service was started without subscriptions.",
+            )
+        assert self._subscriptions is not None
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        try:
+            # The measurements are published on the threads that log them.
+            subscription = self._subscriptions.subscribe(
+                request, functools.partial(loop.call_soon_threadsafe, ready.set)
+            )
+        except RuntimeError:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "The logger service is stopping.")
+            raise
+        if subscription is None:
+            await context.abort(
+                grpc.StatusCode.RESOURCE_EXHAUSTED, "Too many clients have subscribed."
+            )
+        assert subscription is not None
+        try:
+            next_send_time = 0.0
+            while True:
+                await ready.wait()
+                ready.clear()
+                delay = next_send_time - time.monotonic()
+                if delay > 0 and not subscription.closed:
+                    # Let the measurements of the interval pile up into one response. While
+                    # they are queued, only closing the subscription sets the event.
+                    try:
+                        await asyncio.wait_for(ready.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                if subscription.closed:
+                    return
+                response = subscription.take()
+                if response is not None:
+                    next_send_time = time.monotonic() + subscription.interval
+                    yield response
+        finally:
+            self._subscriptions.unsubscribe(subscription)
+
+
+class _RawLoggerServiceBase:
+    """The state that RawLoggerService and AsyncRawLoggerService share."""
+
+    def __init__(
+        self,
+        writer: ShardedWriter,
+        metrics: Optional[LoggerMetrics] = None,
+        shared_memory: Optional[SharedMemoryReceiver] = None,
+        max_log_streams: int = DEFAULT_MAX_LOG_STREAMS,
+    ) -> None:
+        """Initialize the logger service.
+
+        Args:
+            writer: The writer that appends the records to the log files. Its shards must use
+                a RawBackend and must not split the requests by site.
+            metrics: The metrics to record the encoding time in and to return from GetStats.
+            shared_memory: The receiver that drains the ring buffers opened with
+                OpenSharedMemory. If this is None, clients can't open ring buffers.
+            max_log_streams: The maximum number of LogStream calls open at once. Further calls
+                are rejected with RESOURCE_EXHAUSTED.
+        """
+        self._writer = writer
+        self._metrics = metrics if metrics is not None else LoggerMetrics()
+        self._shared_memory = shared_memory
+        self._log_streams = threading.BoundedSemaphore(max_log_streams)
+
+
+class RawLoggerService(_RawLoggerServiceBase):
+    """A gRPC service that logs the serialized measurement data without deserializing it.
+
+    Register it with :func:`add_raw_logger_service_to_server`, which passes the request bytes to
+    the handlers as they were received. Query and GetSummary are not supported and requests that a
+    producer delivers again are not dropped, because the measurement data is never decoded.
+    """
+
+    def Log(  # noqa: N802 - function name should be lowercase
+        self, request: bytes, context: grpc.ServicerContext
+    ) -> LogResponse:
+        """Logs a serialized LogRequest to the log file.
+
+        Args:
+            request: The serialized measurement data to be logged.
+            context: The context of the request.
+
+        Returns:
+            The response after logging the measurement.
+        """
+        self._log([request], _get_client_name(context))
+        return LogResponse()
+
+    def LogStream(  # noqa: N802 - function name should be lowercase
+        self, request_iterator: Iterator[bytes], context: grpc.ServicerContext
+    ) -> LogStreamResponse:
+        """Logs every serialized LogRequest received on the stream to the log file.
+
+        Args:
+            request_iterator: The stream of serialized measurement data to be logged.
+            context: The context of the request.
+
+        Returns:
+            The number of records and bytes logged once the client closes the stream.
+        """
+        if not self._log_streams.acquire(blocking=False):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, _TOO_MANY_LOG_STREAMS)
+        try:
+            client_name = _get_client_name(context)
+            record_count = 0
+            bytes_written = 0
+            for request in request_iterator:
+                bytes_written += self._log([request], client_name)
+                record_count += 1
+        finally:
+            self._log_streams.release()
+        return LogStreamResponse(record_count=record_count, bytes_written=bytes_written)
+
+    def LogBatch(  # noqa: N802 - function name should be lowercase
+        self, request: bytes, context: grpc.ServicerContext
+    ) -> LogBatchResponse:
+        """Logs the requests of a serialized LogBatchRequest to the log file with one write.
+
+        Args:
+            request: The serialized batch of measurement data to be logged.
+            context: The context of the request.
+
+        Returns:
+            The number of records and bytes logged.
+        """
+        payloads = _split_log_batch(request, context)
+        bytes_written = self._log(payloads, _get_client_name(context))
+        return LogBatchResponse(record_count=len(payloads), bytes_written=bytes_written)
+
+    def GetStats(  # noqa: N802 - function name should be lowercase
+        self, request: GetStatsRequest, context: grpc.ServicerContext
+    ) -> GetStatsResponse:
+        """Gets the request counts, latencies, queue depth and write throughput of the service.
+
+        Args:
+            request: The empty request.
+            context: The context of the request.
+
+        Returns:
+            A snapshot of the metrics.
+        """
+        return self._metrics.get_stats(_queued_records(self._writer))
+
+    def OpenSharedMemory(  # noqa: N802 - function name should be lowercase
+        self, request: OpenSharedMemoryRequest, context: grpc.ServicerContext
+    ) -> OpenSharedMemoryResponse:
+        """Opens a ring buffer in shared memory for a client on the same host.
+
+        The client writes serialized log requests into the ring buffer instead of calling Log,
+        and the service logs them in bulk.
+
+        Args:
+            request: The capacity of the ring buffer.
+            context: The context of the request.
+
+        Returns:
+            The name, capacity and token of the ring buffer.
+        """
+        error = _check_shared_memory(self._shared_memory, context)
+        if error:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, error)
+        assert self._shared_memory is not None
+        log = functools.partial(
+            _log_raw_drained, self._writer, self._metrics, _get_client_name(context)
+        )
+        return _open_shared_memory(self._shared_memory, request, log)
+
+    def _log(self, payloads: Sequence[bytes], client_name: str) -> int:
+        return _log_raw(self._writer, self._metrics, payloads, client_name)
+
+
+class AsyncRawLoggerService(_RawLoggerServiceBase):
+    """A grpc.aio version of RawLoggerService that handles the calls as coroutines."""
+
+    async def Log(  # noqa: N802 - function name should be lowercase
+        self, request: bytes, context: grpc.aio.ServicerContext
+    ) -> LogResponse:
+        """See RawLoggerService.Log."""
+        await self._log([request], _get_client_name(context))
+        return LogResponse()
+
+    async def LogStream(  # noqa: N802 - function name should be lowercase
+        self, request_iterator: AsyncIterator[bytes], context: grpc.aio.ServicerContext
+    ) -> LogStreamResponse:
+        """See RawLoggerService.LogStream."""
+        if not self._log_streams.acquire(blocking=False):
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, _TOO_MANY_LOG_STREAMS)
+        try:
+            client_name = _get_client_name(context)
+            record_count = 0
+            bytes_written = 0
+            async for request in request_iterator:
+                bytes_written += await self._log([request], client_name)
+                record_count += 1
+        finally:
+            self._log_streams.release()
+        return LogStreamResponse(record_count=record_count, bytes_written=bytes_written)
+
+    async def LogBatch(  # noqa: N802 - function name should be lowercase
+        self, request: bytes, context: grpc.aio.ServicerContext
+    ) -> LogBatchResponse:
+        """See RawLoggerService.LogBatch."""
+        try:
+            payloads = split_log_batch(request)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            raise
+        bytes_written = await self._log(payloads, _get_client_name(context))
+        return LogBatchResponse(record_count=len(payloads), bytes_written=bytes_written)
+
+    async def GetStats(  # noqa: N802 - function name should be lowercase
+        self, request: GetStatsRequest, context: grpc.aio.ServicerContext
+    ) -> GetStatsResponse:
+        """See RawLoggerService.GetStats."""
+        return self._metrics.get_stats(_queued_records(self._writer))
+
+    async def OpenSharedMemory(  # noqa: N802 - function name should be lowercase
+        self, request: OpenSharedMemoryRequest, context: grpc.aio.ServicerContext
+    ) -> OpenSharedMemoryResponse:
+        """See RawLoggerService.OpenSharedMemory."""
+        error = _check_shared_memory(self._shared_memory, context)
+        if error:
+            await context.abort(grpc.StatusCode.FAILED_PRECONDITION, error)
+        assert self._shared_memory is not None
+        log = functools.partial(
+            _log_raw_drained, self._writer, self._metrics, _get_client_name(context)
+        )
+        return _open_shared_memory(self._shared_memory, request, log)
+
+    async def _log(self, payloads: Sequence[bytes], client_name: str) -> int:
+        writer, record = _encode_raw(self._writer, self._metrics, payloads, client_name)
+        if not writer.try_submit(record):
+            await asyncio.get_running_loop().run_in_executor(None, writer.submit, record)
+        return len(record)
+
+
+def add_raw_logger_service_to_server(
+    servicer: Union[RawLoggerService, AsyncRawLoggerService],
+    server: Union[grpc.Server, grpc.aio.Server],
+) -> None:
+    """Register a raw logger service with a gRPC server.
+
+    Unlike add_LogMeasurementServicer_to_server, this does not deserialize the log requests, so
+    the handlers receive the request bytes as they were received.
+
+    Args:
+        servicer: The raw logger service.
+        server: The gRPC server.
+    """
+    rpc_method_handlers = {
+        "Log": grpc.unary_unary_rpc_method_handler(
+            servicer.Log,
+            response_serializer=LogResponse.SerializeToString,
+        ),
+        "LogStream": grpc.stream_unary_rpc_method_handler(
+            servicer.LogStream,
+            response_serializer=LogStreamResponse.SerializeToString,
+        ),
+        "LogBatch": grpc.unary_unary_rpc_method_handler(
+            servicer.LogBatch,
+            response_serializer=LogBatchResponse.SerializeToString,
+        ),
+        "GetStats": grpc.unary_unary_rpc_method_handler(
+            servicer.GetStats,
+            request_deserializer=GetStatsRequest.FromString,
+            response_serializer=GetStatsResponse.SerializeToString,
+        ),
+        "OpenSharedMemory": grpc.unary_unary_rpc_method_handler(
+            servicer.OpenSharedMemory,
+            request_deserializer=OpenSharedMemoryRequest.FromString,
+            response_serializer=OpenSharedMemoryResponse.SerializeToString,
+        ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+        _LOG_MEASUREMENT_SERVICE_NAME, rpc_method_handlers
+    )
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+def _split_log_batch(request: bytes, context: grpc.ServicerContext) -> List[bytes]:
+    try:
+        return split_log_batch(request)
+    except ValueError as e:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        raise
+
+
+def _drop_duplicates(
+    deduplicator: Deduplicator, metrics: LoggerMetrics, requests: Sequence[LogRequest]
+) -> Sequence[LogRequest]:
+    new_requests = deduplicator.filter(requests)
+    if len(new_requests) < len(requests):
+        metrics.duplicate_requests.add(len(requests) - len(new_requests))
+    return new_requests
+
+
+def _log_requests(
+    service: _LoggerServiceBase, requests: Sequence[LogRequest], client_name: str
+) -> _LogResult:
+    encoded = _encode_requests(service, requests, client_name)
+    if not encoded.requests:
+        return _LogResult(0, 0)
+    for writer, record in encoded.records:
+        writer.submit(record)
+    if service._index is not None:
+        service._index.add(encoded.requests)
+    return _finish_logging(service, encoded)
+
+
+def _encode_requests(
+    service: _LoggerServiceBase, requests: Sequence[LogRequest], client_name: str
+) -> _EncodedRequests:
+    start_time = time.perf_counter()
+    requests = _drop_duplicates(service._deduplicator, service._metrics, requests)
+    if not requests:
+        return _EncodedRequests(requests, [])
+    waveform_records = _encode_waveforms(service._waveform_writer, requests, client_name)
+    # Submit the requests of each shard as one record so that they are written with one write
+    # and records from other requests can't land in the middle of them.
+    records = waveform_records + [
+        (writer, writer.backend.encode(shard_requests))
+        for writer, shard_requests in service._writer.route(requests, client_name)
+    ]
+    service._metrics.encode_duration.observe(time.perf_counter() - start_time)
+    return _EncodedRequests(requests, records)
+
+
+def _finish_logging(service: _LoggerServiceBase, encoded: _EncodedRequests) -> _LogResult:
+    # Remember the sequence numbers only once the records are submitted, so that requests that
+    # were rejected can be delivered again.
+    service._deduplicator.record(encoded.requests)
+    if service._summary is not None:
+        service._summary.add(encoded.requests)
+    if service._subscriptions is not None:
+        service._subscriptions.publish(encoded.requests)
+    bytes_written = sum(writer.backend.size_of(record) for writer, record in encoded.records)
+    return _LogResult(len(encoded.requests), bytes_written)
+
+
+def _log_drained(service: _LoggerServiceBase, client_name: str, payloads: List[bytes]) -> None:
+    requests = []
+    for payload in payloads:
+        try:
+            request = LogRequest.FromString(payload)
+            # Nobody can be told that a request was invalid, so drop it instead of the batch.
+            for waveform in request.waveforms:
+                waveform_samples(waveform)
+        except (DecodeError, ValueError) as e:
+            _logger.warning("Dropped an invalid request from shared memory: %s", e)
+            continue
+        requests.append(request)
+    service._metrics.shared_memory_requests.add(len(requests))
+    _log_requests(service, requests, client_name)
+
+
+def _log_raw(
+    writer: ShardedWriter, metrics: LoggerMetrics, payloads: Sequence[bytes], client_name: str
+) -> int:
+    client_writer, record = _encode_raw(writer, metrics, payloads, client_name)
+    client_writer.submit(record)
+    return len(record)
+
+
+def _encode_raw(
+    writer: ShardedWriter, metrics: LoggerMetrics, payloads: Sequence[bytes], client_name: str
+) -> Tuple[RecordWriter, bytes]:
+    start_time = time.perf_counter()
+    client_writer = writer.get_client_writer(client_name)
+    backend = client_writer.backend
+    assert isinstance(backend, RawBackend)
+    record = backend.encode_serialized(payloads)
+    metrics.encode_duration.observe(time.perf_counter() - start_time)
+    return client_writer, record
+
+
+def _log_raw_drained(
+    writer: ShardedWriter, metrics: LoggerMetrics, client_name: str, payloads: List[bytes]
+) -> None:
+    metrics.shared_memory_requests.add(len(payloads))
+    _log_raw(writer, metrics, payloads, client_name)
+
+
+def _check_shared_memory(
+    receiver: Optional[SharedMemoryReceiver],
+    context: Union[grpc.ServicerContext, grpc.aio.ServicerContext],
+) -> str:
+    if receiver is None:
+        return "The logger service was started without shared memory."
+    if not _is_local_peer(context.peer()):
+        return "Shared memory is only available to clients on the same host."
+    return ""
+
+
+def _is_local_peer(peer: str) -> bool:
+    scheme, address = _split_peer(peer)
+    if scheme == "unix":
+        return True
+    host = address.strip("[]")
+    try:
+        ip_address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    if isinstance(ip_address, ipaddress.IPv6Address) and ip_address.ipv4_mapped is not None:
+        return ip_address.ipv4_mapped.is_loopback
+    return ip_address.is_loopback
+
+
+def _split_peer(peer: str) -> Tuple[str, str]:
+    # Such as ipv6:[::1]:50000, ipv4:127.0.0.1:50000 or unix:/tmp/logger. Newer versions of gRPC
+    # percent-encode the brackets. Return the scheme and the address without the port.
+    scheme, _, address = urllib.parse.unquote(peer).partition(":")
+    if scheme != "unix":
+        address = address.rpartition(":")[0]
+    return scheme, address
+
+
+def _open_shared_memory(
+    receiver: SharedMemoryReceiver,
+    request: OpenSharedMemoryRequest,
+    log: Callable[[List[bytes]], None],
+) -> OpenSharedMemoryResponse:
+    ring = receiver.open(request.capacity, log)
+    return OpenSharedMemoryResponse(name=ring.name, capacity=ring.capacity, token=ring.token)
+
+
+def _encode_waveforms(
+    waveform_writer: Optional[ShardedWriter], requests: Sequence[LogRequest], client_name: str
+) -> List[Tuple[RecordWriter, Any]]:
+    # Encode the waveforms before any record is submitted, so that a request with invalid
+    # waveforms is rejected without logging any part of it.
+    if waveform_writer is None or not any(request.waveforms for request in requests):
+        return []
+    return [
+        (writer, writer.backend.encode(shard_requests))
+        for writer, shard_requests in waveform_writer.route(requests, client_name)
+    ]
+
+
+def _queued_records(*writers: Optional[ShardedWriter]) -> int:
+    return sum(writer.queued_records for writer in writers if writer is not None)
+
+
+def _get_client_name(context: Union[grpc.ServicerContext, grpc.aio.ServicerContext]) -> str:
+    for key, value in context.invocation_metadata() or ():
+        if key == CLIENT_NAME_METADATA_KEY:
+            return str(value)
+    # Clients that don't name themselves, such as the LabVIEW and TestStand clients, connect from
+    # a new port each time, so identify them by their host.
+    scheme, address = _split_peer(context.peer())
+    return f"{scheme}:{address}"
+
+
+def start_server(
+    *,
+    storage_format: StorageFormat = StorageFormat.JSON,
+    output_path: str = "measurements.json",
+    durability: Durability = Durability.FLUSH,
+    max_batch_records: int = 1000,
+    max_batch_delay: float = 0.01,
+    shard_key: ShardKey = ShardKey.NONE,
+    max_segment_bytes: Optional[int] = None,
+    max_segment_age: Optional[float] = None,
+    compression: Compression = Compression.NONE,
+    index_path: Optional[str] = None,
+    summary: bool = False,
+    summary_window: Optional[float] = None,
+    shared_memory: bool = True,
+    max_subscribers: int = 0,
+    max_log_streams: int = DEFAULT_MAX_LOG_STREAMS,
+    server_mode: ServerMode = ServerMode.THREAD,
+    max_concurrent_rpcs: Optional[int] = None,
+    grace: float = 5.0,
+    run_service: Optional[Callable[[str], None]] = None,
+    metrics_port: Optional[int] = None,
+    port: int = 0,
+    reuse_port: bool = False,
+) -> None:
+    """Starts the gRPC server and registers the service with the service registry.
+
+    Args:
+        storage_format: The format of the log file.
+        output_path: The log file to append the measurement data to. The waveforms of the
+            requests are appended in binary to a file with the suffix .waveforms next to it.
+        durability: How far each batch of records is pushed toward the disk.
+        max_batch_records: The maximum number of records written with one write.
+        max_batch_delay: The maximum time in seconds to wait for more records before writing.
+        shard_key: How the measurement data is split across log files.
+        max_segment_bytes: The size in bytes after which a log file segment is closed.
+        max_segment_age: The time in seconds after which a log file segment is closed. The age
+            is checked on the next write to the log file.
+        compression: How closed log file segments are compressed.
+        index_path: The SQLite database to index the measurement data in, so that it can be
+            queried with the Query RPC. If this is None, the measurement data is not indexed.
+        summary: Whether to keep running statistics of each site and pin, which are returned
+            by the GetSummary RPC.
+        summary_window: The length in seconds of the time windows in which to also keep the
+            running statistics. If this is not None, the running statistics are kept even if
+            summary is False.
+        shared_memory: Whether clients on the same host may send their requests through ring
+            buffers in shared memory instead of gRPC calls.
+        max_subscribers: The maximum number of clients that stream the measurements with the
+            Subscribe RPC at once. If this is 0, clients can't subscribe.
+        max_log_streams: The maximum number of LogStream calls open at once. Further calls
+            are rejected with RESOURCE_EXHAUSTED. With the thread server mode, each open
+            LogStream and Subscribe call holds a thread, so the server has 10 threads for the
+            other calls plus one for each of these.
+        server_mode: The kind of gRPC server to host the service with.
+        max_concurrent_rpcs: The maximum number of calls the server handles at once. Further
+            calls are rejected with RESOURCE_EXHAUSTED. If this is None, there is no limit.
+        grace: The time in seconds to let in-flight requests finish when stopping the server.
+        run_service: Called with the port once the server has started. The server stops when
+            it returns. By default, the service is registered with the discovery service until
+            the user presses enter. The connection to the discovery service is then opened
+            while the server starts, so that the service is registered as soon as it listens.
+        metrics_port: The local port to serve the metrics on in the Prometheus text format, at
+            /metrics. If this is None, the metrics are only available from the GetStats RPC.
+        port: The port to listen on, or 0 to pick a free port.
+        reuse_port: Whether to let other processes listen on the same port with SO_REUSEPORT,
+            so that the operating system spreads the connections across them. This is only
+            supported on Linux.
+
+    Raises:
+        ValueError: If the raw format is combined with sharding by site, an index, a summary or
+            subscribers, which all need the measurement data to be deserialized.
+    """
+    raw = storage_format == StorageFormat.RAW
+    if raw and shard_key == ShardKey.SITE:
+        raise ValueError("The raw format can't be sharded by site, because it isn't deserialized.")
+    if raw and index_path is not None:
+        raise ValueError("The raw format can't be indexed, because it isn't deserialized.")
+    summary = summary or summary_window is not None
+    if raw and summary:
+        raise ValueError("The raw format can't be summarized, because it isn't deserialized.")
+    if raw and max_subscribers:
+        raise ValueError("The raw format can't be subscribed to, because it isn't deserialized.")
+
+    segment_store: Optional[SegmentStore] = None
+    if (
+        max_segment_bytes is not None
+        or max_segment_age is not None
+        or compression != Compression.NONE
+    ):
+        manifest_path = pathlib.Path(output_path).with_suffix(".manifest.json")
+        segment_store = SegmentStore(
+            manifest_path,
+            max_segment_bytes=max_segment_bytes,
+            max_segment_age=max_segment_age,
+            compression=compression,
+        )
+    metrics = LoggerMetrics()
+
+    def create_writer(
+        create_backend: Callable[..., StorageBackend], path: PathType, shard: str
+    ) -> RecordWriter:
+        path = shard_path(path, shard)
+        if segment_store is not None:
+            backend = create_backend(
+                path, open_file=functools.partial(segment_store.open, shard=shard)
+            )
+        else:
+            backend = create_backend(path)
+        writer = RecordWriter(
+            backend,
+            durability=durability,
+            max_batch_records=max_batch_records,
+            max_batch_delay=max_batch_delay,
+            metrics=metrics.writes,
+        )
+        writer.start()
+        return writer
+
+    writer = ShardedWriter(
+        shard_key,
+        functools.partial(
+            create_writer, functools.partial(create_backend, storage_format), output_path
+        ),
+    )
+    # Log the waveforms next to the log file, in binary.
+    waveform_writer = ShardedWriter(
+        shard_key,
+        functools.partial(
+            create_writer, WaveformBackend, pathlib.Path(output_path).with_suffix(".waveforms")
+        ),
+    )
+    index: Optional[MeasurementIndex] = None
+    if index_path is not None:
+        index = MeasurementIndex(index_path, max_batch_records=max_batch_records)
+        index.start()
+    measurement_summary = MeasurementSummary(summary_window) if summary else None
+    shared_memory_receiver = SharedMemoryReceiver() if shared_memory else None
+    subscription_hub = SubscriptionHub(max_subscribers) if max_subscribers else None
+
+    add_service: Callable[[Any], None]
+    if raw:
+        # The raw log keeps the waveforms in the serialized requests.
+        raw_servicer_type = (
+            AsyncRawLoggerService if server_mode == ServerMode.ASYNCIO else RawLoggerService
+        )
+        add_service = functools.partial(
+            add_raw_logger_service_to_server,
+            raw_servicer_type(writer, metrics, shared_memory_receiver, max_log_streams),
+        )
+    else:
+        servicer_type = AsyncLoggerService if server_mode == ServerMode.ASYNCIO else LoggerService
+        add_service = functools.partial(
+            add_LogMeasurementServicer_to_server,
+            servicer_type(
+                writer,
+                index,
+                waveform_writer,
+                metrics,
+                measurement_summary,
+                shared_memory_receiver,
+                subscription_hub,
+                max_log_streams,
+            ),
+        )
+    if run_service is None:
+        run_service = functools.partial(_run_registered_service, connect_discovery_service())
+    if subscription_hub is not None:
+        # End the streams of the subscribers before the server waits for the in-flight calls.
+        run_service = functools.partial(_run_then_close, run_service, subscription_hub.close)
+    options = list(_SERVER_OPTIONS)
+    if reuse_port:
+        options.append(("grpc.so_reuseport", 1))
+    metrics_server: Optional[MetricsHttpServer] = None
+    try:
+        if metrics_port is not None:
+            metrics_server = MetricsHttpServer(
+                metrics_port,
+                lambda: metrics.get_stats(_queued_records(writer, waveform_writer)),
+            )
+            metrics_server.start()
+        if server_mode == ServerMode.ASYNCIO:
+            asyncio.run(
+                _serve_asyncio(
+                    add_service, run_service, metrics, options, port, max_concurrent_rpcs, grace
+                )
+            )
+        else:
+            _serve_thread(
+                add_service,
+                run_service,
+                metrics,
+                options,
+                port,
+                _THREAD_POOL_SIZE + max_log_streams + max_subscribers,
+                max_concurrent_rpcs,
+                grace,
+            )
+    finally:
+        # Log the requests left in shared memory before draining the writers.
+        if shared_memory_receiver is not None:
+            shared_memory_receiver.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        writer.close()
+        waveform_writer.close()
+        if index is not None:
+            index.close()
+        if segment_store is not None:
+            segment_store.close()
+
+
+def _serve_thread(
+    add_service: Callable[[grpc.Server], None],
+    run_service: Callable[[str], None],
+    metrics: LoggerMetrics,
+    options: List[Tuple[str, Any]],
+    port: int,
+    thread_count: int,
+    max_concurrent_rpcs: Optional[int],
+    grace: float,
+) -> None:
+    server = grpc.server(
+        logging_pool.pool(max_workers=thread_count),
+        interceptors=[MetricsInterceptor(metrics)],
+        options=options,
+        maximum_concurrent_rpcs=max_concurrent_rpcs,
+    )
+    add_service(server)
     host = "[::1]"
-    port = str(server.add_insecure_port(f"{host}:0"))
+    bound_port = str(server.add_insecure_port(f"{host}:{port}"))
     server.start()
 
+    run_service(bound_port)
+    # Let the in-flight requests queue their records before draining the writer.
+    server.stop(grace=grace).wait()
+
+
+async def _serve_asyncio(
+    add_service: Callable[[grpc.aio.Server], None],
+    run_service: Callable[[str], None],
+    metrics: LoggerMetrics,
+    options: List[Tuple[str, Any]],
+    port: int,
+    max_concurrent_rpcs: Optional[int],
+    grace: float,
+) -> None:
+    server = grpc.aio.server(
+        interceptors=[AsyncMetricsInterceptor(metrics)],
+        options=options,
+        maximum_concurrent_rpcs=max_concurrent_rpcs,
+    )
+    add_service(server)
+    host = "[::1]"
+    bound_port = str(server.add_insecure_port(f"{host}:{port}"))
+    await server.start()
+
+    # The discovery client and input() block, so keep them off the event loop.
+    await asyncio.get_running_loop().run_in_executor(None, run_service, bound_port)
+    # Let the in-flight requests queue their records before draining the writer.
+    await server.stop(grace=grace)
+
+
+def _run_then_close(
+    run_service: Callable[[str], None], close: Callable[[], None], port: str
+) -> None:
+    try:
+        run_service(port)
+    finally:
+        close()
+
+
+def _run_registered_service(
+    discovery_client_future: "concurrent.futures.Future[DiscoveryClient]", port: str
+) -> None:
+    discovery_client = discovery_client_future.result()
+    registration_id = register_service(discovery_client, port)
+    _ = input("Press enter to stop the server.")
+    discovery_client.unregister_service(registration_id)
+
+
+def connect_discovery_service() -> "concurrent.futures.Future[DiscoveryClient]":
+    """Start connecting to the discovery service on a background thread.
+
+    Locating the discovery service, and starting it if it isn't running, can take longer than
+    starting the logger service, so do it while the logger service starts.
+
+    Returns:
+        A future of a discovery client that is connected to the discovery service.
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="DiscoveryConnection"
+    )
+    try:
+        return executor.submit(_connect_discovery_service)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def _connect_discovery_service() -> "DiscoveryClient":
+    # Import the discovery client on demand, because the logger service only needs it to
+    # register and it takes a while to import.
+    from ni_measurement_plugin_sdk_service.discovery import DiscoveryClient
+
     discovery_client = DiscoveryClient()
+    # Any call locates the discovery service and opens the channel to it.
+    discovery_client.enumerate_services(GRPC_SERVICE_INTERFACE_NAME)
+    return discovery_client
+
+
+def register_service(discovery_client: "DiscoveryClient", port: str) -> str:
+    """Register a logger service that listens on a local port with the discovery service.
+
+    Args:
+        discovery_client: The client of the discovery service.
+        port: The port that the logger service listens on.
+
+    Returns:
+        The registration ID to unregister the service with.
+    """
+    from ni_measurement_plugin_sdk_service.discovery import ServiceLocation
+    from ni_measurement_plugin_sdk_service.measurement.info import ServiceInfo
+
     service_location = ServiceLocation("localhost", f"{port}", "")
     service_info = ServiceInfo(
         service_class=GRPC_SERVICE_CLASS,
@@ -69,11 +1284,202 @@ def start_server() -> None:
     registration_id = discovery_client.register_service(
         service_info=service_info, service_location=service_location
     )
+    return registration_id
 
-    _ = input("Press enter to stop the server.")
-    discovery_client.unregister_service(registration_id)
-    server.stop(grace=5)
+
+@click.command
+@click.option(
+    "--format",
+    "storage_format",
+    type=click.Choice([storage_format.value for storage_format in StorageFormat]),
+    default=StorageFormat.JSON.value,
+    show_default=True,
+    help="Whether to log the measurement data as JSON lines, as typed column chunks, or as the "
+    "serialized requests without deserializing them.",
+)
+@click.option(
+    "--output",
+    "output_path",
+    default=None,
+    help="The log file to append the measurement data to. [default: measurements.json, "
+    "measurements.columns for the columnar format, or measurements.raw for the raw format]",
+)
+@click.option(
+    "--durability",
+    type=click.Choice([durability.value for durability in Durability]),
+    default=Durability.FLUSH.value,
+    show_default=True,
+    help="Whether to flush or fsync the log file after each batch of records.",
+)
+@click.option(
+    "--max-batch-records",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="The maximum number of records written with one write.",
+)
+@click.option(
+    "--max-batch-delay",
+    type=click.FloatRange(min=0.0),
+    default=0.01,
+    show_default=True,
+    help="The maximum time in seconds to wait for more records before writing a batch.",
+)
+@click.option(
+    "--shard-by",
+    "shard_key",
+    type=click.Choice([shard_key.value for shard_key in ShardKey]),
+    default=ShardKey.NONE.value,
+    show_default=True,
+    help="Whether to log each site or each calling measurement service to a separate log file.",
+)
+@click.option(
+    "--max-segment-bytes",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Close the log file segment and start a new one after this many bytes.",
+)
+@click.option(
+    "--max-segment-age",
+    type=click.FloatRange(min=0.0, min_open=True),
+    default=None,
+    help=(
+        "Close the log file segment and start a new one after this many seconds. The age is "
+        "checked when data is written, so an idle log file keeps its segment open."
+    ),
+)
+@click.option(
+    "--compression",
+    type=click.Choice([compression.value for compression in Compression]),
+    default=Compression.NONE.value,
+    show_default=True,
+    help="How to compress closed log file segments in the background.",
+)
+@click.option(
+    "--index",
+    "index_path",
+    default=None,
+    help="Index the measurement data in this SQLite database so that it can be queried.",
+)
+@click.option(
+    "--summary",
+    is_flag=True,
+    help="Keep running statistics of each site and pin, which the GetSummary RPC returns.",
+)
+@click.option(
+    "--summary-window",
+    type=click.FloatRange(min=0.0, min_open=True),
+    default=None,
+    help="Also keep the running statistics in tumbling time windows of this many seconds. "
+    "Implies --summary.",
+)
+@click.option(
+    "--shared-memory/--no-shared-memory",
+    default=True,
+    show_default=True,
+    help="Whether clients on the same host may send their requests through shared memory.",
+)
+@click.option(
+    "--max-subscribers",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="The maximum number of clients that stream the measurements with the Subscribe RPC at "
+    "once. If 0, clients can't subscribe.",
+)
+@click.option(
+    "--max-log-streams",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_LOG_STREAMS,
+    show_default=True,
+    help="The maximum number of LogStream calls open at once. With the thread server mode, each "
+    "open LogStream or Subscribe call holds a thread, on top of the 10 threads for the other "
+    "calls.",
+)
+@click.option(
+    "--server-mode",
+    type=click.Choice([server_mode.value for server_mode in ServerMode]),
+    default=ServerMode.THREAD.value,
+    show_default=True,
+    help="Whether to handle calls on a thread pool or as coroutines on an asyncio event loop.",
+)
+@click.option(
+    "--max-concurrent-rpcs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="The maximum number of calls handled at once. By default, there is no limit.",
+)
+@click.option(
+    "--metrics-port",
+    type=click.IntRange(min=0, max=65535),
+    default=None,
+    help="Serve the metrics in the Prometheus text format at http://127.0.0.1:PORT/metrics.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of worker processes. Each worker writes its own log files, such as "
+    "measurements.worker0.json, and serves its metrics on the metrics port plus its number, "
+    "so the metrics port can't be 0.",
+)
+def main(
+    storage_format: str,
+    output_path: Optional[str],
+    durability: str,
+    max_batch_records: int,
+    max_batch_delay: float,
+    shard_key: str,
+    max_segment_bytes: Optional[int],
+    max_segment_age: Optional[float],
+    compression: str,
+    index_path: Optional[str],
+    summary: bool,
+    summary_window: Optional[float],
+    shared_memory: bool,
+    max_subscribers: int,
+    max_log_streams: int,
+    server_mode: str,
+    max_concurrent_rpcs: Optional[int],
+    metrics_port: Optional[int],
+    workers: int,
+) -> None:
+    """Start the JSON logger service."""
+    if output_path is None:
+        output_path = _DEFAULT_OUTPUT_PATHS[StorageFormat(storage_format)]
+    server_options: Dict[str, Any] = dict(
+        storage_format=StorageFormat(storage_format),
+        output_path=output_path,
+        durability=Durability(durability),
+        max_batch_records=max_batch_records,
+        max_batch_delay=max_batch_delay,
+        shard_key=ShardKey(shard_key),
+        max_segment_bytes=max_segment_bytes,
+        max_segment_age=max_segment_age,
+        compression=Compression(compression),
+        index_path=index_path,
+        summary=summary,
+        summary_window=summary_window,
+        shared_memory=shared_memory,
+        max_subscribers=max_subscribers,
+        max_log_streams=max_log_streams,
+        server_mode=ServerMode(server_mode),
+        max_concurrent_rpcs=max_concurrent_rpcs,
+        metrics_port=metrics_port,
+    )
+    if workers > 1:
+        # The supervisor imports this module, so import it on demand.
+        from json_logger.workers import check_worker_options, serve_workers
+
+        try:
+            check_worker_options(workers, **server_options)
+        except ValueError as e:
+            raise click.UsageError(str(e)) from e
+        serve_workers(workers, **server_options)
+    else:
+        start_server(**server_options)
 
 
 if __name__ == "__main__":
-    start_server()
+    main()
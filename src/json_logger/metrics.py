@@ -0,0 +1,551 @@
+"""Low-overhead counters and latency histograms of the logger service."""
+
+import abc
+import bisect
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import grpc
+
+from json_logger.stubs.log_measurement_pb2 import GetStatsResponse
+from json_logger.stubs.log_measurement_pb2 import Histogram as HistogramMessage
+from json_logger.stubs.log_measurement_pb2 import RpcStats
+
+LATENCY_BUCKETS = (
+    1e-5,
+    2.5e-5,
+    5e-5,
+    1e-4,
+    2.5e-4,
+    5e-4,
+    1e-3,
+    2.5e-3,
+    5e-3,
+    1e-2,
+    2.5e-2,
+    5e-2,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+"""The upper bounds in seconds of the buckets of latency histograms."""
+
+
+class Counter:
+    """A count that only goes up, such as the number of bytes written."""
+
+    def __init__(self) -> None:
+        """Initialize the counter to zero."""
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount: int = 1) -> None:
+        """Add to the count."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        """The current count."""
+        return self._value
+
+
+class Gauge(Counter):
+    """A count that goes up and down, such as the number of calls in progress."""
+
+
+class HistogramSnapshot(NamedTuple):
+    """The bucket counts of a histogram at one point in time."""
+
+    bounds: Tuple[float, ...]
+    """The upper bounds of the buckets. The last bucket has no upper bound."""
+
+    counts: List[int]
+    """The number of observations in each bucket, with one more entry than bounds."""
+
+    sum: float
+    """The sum of the observations."""
+
+
+class Histogram:
+    """Counts observations, such as durations in seconds, in fixed buckets.
+
+    Recording an observation takes one binary search and one uncontended lock, so it is cheap
+    enough to leave on for every call.
+    """
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """Initialize the histogram.
+
+        Args:
+            bounds: The ascending upper bounds of the buckets.
+        """
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Count an observation in the first bucket whose upper bound is at least the value."""
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> HistogramSnapshot:
+        """Get the current bucket counts."""
+        with self._lock:
+            return HistogramSnapshot(self._bounds, list(self._counts), self._sum)
+
+
+class RpcMetrics:
+    """The metrics of one RPC method."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.duration = Histogram()
+        """The time in seconds from the start of each call until its handler returned."""
+
+        self.errors = Counter()
+        """The number of calls whose handler raised an exception or aborted."""
+
+
+class WriterMetrics:
+    """The metrics of the record writers, updated by the writer threads."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.write_duration = Histogram()
+        """The time in seconds to write, flush and sync each batch."""
+
+        self.records_written = Counter()
+        self.bytes_written = Counter()
+        self.write_errors = Counter()
+        """The number of batches that failed to be written."""
+
+
+class LoggerMetrics:
+    """The metrics of a logger service."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self._start_time = time.monotonic()
+        self._rpcs: Dict[str, RpcMetrics] = {}
+        self._lock = threading.Lock()
+
+        self.in_flight_requests = Gauge()
+        """The number of calls whose handler is running."""
+
+        self.encode_duration = Histogram()
+        """The time in seconds to encode the requests of each call into records."""
+
+        self.writes = WriterMetrics()
+        """The metrics shared by the record writers of the log files."""
+
+        self.duplicate_requests = Counter()
+        """The number of requests dropped because their producer had already delivered them."""
+
+        self.shared_memory_requests = Counter()
+        """The number of requests received through shared memory instead of gRPC calls."""
+
+    def rpc(self, method: str) -> RpcMetrics:
+        """Get the metrics of an RPC method, creating them on first use."""
+        metrics = self._rpcs.get(method)
+        if metrics is None:
+            with self._lock:
+                metrics = self._rpcs.setdefault(method, RpcMetrics())
+        return metrics
+
+    def get_stats(self, queued_records: int = 0) -> GetStatsResponse:
+        """Get a snapshot of the metrics.
+
+        Args:
+            queued_records: The number of records waiting to be written.
+
+        Returns:
+            The metrics as a GetStats response.
+        """
+        with self._lock:
+            rpcs = sorted(self._rpcs.items())
+        return GetStatsResponse(
+            uptime=time.monotonic() - self._start_time,
+            in_flight_requests=self.in_flight_requests.value,
+            queued_records=queued_records,
+            records_written=self.writes.records_written.value,
+            bytes_written=self.writes.bytes_written.value,
+            write_errors=self.writes.write_errors.value,
+            rpcs=[
+                RpcStats(
+                    method=method,
+                    duration=_to_histogram_message(metrics.duration.snapshot()),
+                    error_count=metrics.errors.value,
+                )
+                for method, metrics in rpcs
+            ],
+            encode_duration=_to_histogram_message(self.encode_duration.snapshot()),
+            write_duration=_to_histogram_message(self.writes.write_duration.snapshot()),
+            duplicate_requests=self.duplicate_requests.value,
+            shared_memory_requests=self.shared_memory_requests.value,
+        )
+
+
+def _to_histogram_message(snapshot: HistogramSnapshot) -> HistogramMessage:
+    return HistogramMessage(
+        bucket_bounds=snapshot.bounds,
+        bucket_counts=snapshot.counts,
+        count=sum(snapshot.counts),
+        sum=snapshot.sum,
+    )
+
+
+def format_prometheus(stats: GetStatsResponse) -> str:
+    """Format a snapshot of the metrics in the Prometheus text exposition format.
+
+    Args:
+        stats: The snapshot returned by :meth:`LoggerMetrics.get_stats`.
+
+    Returns:
+        The metrics, one sample per line.
+    """
+    lines: List[str] = []
+
+    def add_metric(name: str, metric_type: str, help_text: str, samples: List[str]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(samples)
+
+    def histogram_samples(name: str, histogram: HistogramMessage, labels: str = "") -> List[str]:
+        samples = []
+        cumulative_count = 0
+        bounds = [repr(bound) for bound in histogram.bucket_bounds] + ["+Inf"]
+        for bound, count in zip(bounds, histogram.bucket_counts):
+            cumulative_count += count
+            samples.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative_count}')
+        label_set = f"{{{labels.rstrip(',')}}}" if labels else ""
+        samples.append(f"{name}_sum{label_set} {histogram.sum!r}")
+        samples.append(f"{name}_count{label_set} {histogram.count}")
+        return samples
+
+    add_metric(
+        "logger_uptime_seconds",
+        "gauge",
+        "The time since the logger service started.",
+        [f"logger_uptime_seconds {stats.uptime!r}"],
+    )
+    add_metric(
+        "logger_in_flight_requests",
+        "gauge",
+        "The number of calls being handled.",
+        [f"logger_in_flight_requests {stats.in_flight_requests}"],
+    )
+    add_metric(
+        "logger_queued_records",
+        "gauge",
+        "The number of records waiting to be written.",
+        [f"logger_queued_records {stats.queued_records}"],
+    )
+    add_metric(
+        "logger_records_written_total",
+        "counter",
+        "The number of records written to the log files.",
+        [f"logger_records_written_total {stats.records_written}"],
+    )
+    add_metric(
+        "logger_bytes_written_total",
+        "counter",
+        "The number of bytes written to the log files.",
+        [f"logger_bytes_written_total {stats.bytes_written}"],
+    )
+    add_metric(
+        "logger_write_errors_total",
+        "counter",
+        "The number of batches of records that failed to be written.",
+        [f"logger_write_errors_total {stats.write_errors}"],
+    )
+    add_metric(
+        "logger_duplicate_requests_total",
+        "counter",
+        "The number of requests dropped because their producer had already delivered them.",
+        [f"logger_duplicate_requests_total {stats.duplicate_requests}"],
+    )
+    add_metric(
+        "logger_shared_memory_requests_total",
+        "counter",
+        "The number of requests received through shared memory instead of gRPC calls.",
+        [f"logger_shared_memory_requests_total {stats.shared_memory_requests}"],
+    )
+    add_metric(
+        "logger_rpc_duration_seconds",
+        "histogram",
+        "The time to handle each call.",
+        [
+            sample
+            for rpc in stats.rpcs
+            for sample in histogram_samples(
+                "logger_rpc_duration_seconds", rpc.duration, f'method="{rpc.method}",'
+            )
+        ],
+    )
+    add_metric(
+        "logger_rpc_errors_total",
+        "counter",
+        "The number of calls that failed.",
+        [
+            f'logger_rpc_errors_total{{method="{rpc.method}"}} {rpc.error_count}'
+            for rpc in stats.rpcs
+        ],
+    )
+    add_metric(
+        "logger_encode_duration_seconds",
+        "histogram",
+        "The time to encode the requests of each call into records.",
+        histogram_samples("logger_encode_duration_seconds", stats.encode_duration),
+    )
+    add_metric(
+        "logger_write_duration_seconds",
+        "histogram",
+        "The time to write, flush and sync each batch of records.",
+        histogram_samples("logger_write_duration_seconds", stats.write_duration),
+    )
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsWrapper(abc.ABC):
+    def __init__(self, metrics: LoggerMetrics) -> None:
+        self._metrics = metrics
+        # The wrapped handler of each method, and the handler that it wraps.
+        self._handlers: Dict[str, Tuple[grpc.RpcMethodHandler, grpc.RpcMethodHandler]] = {}
+
+    def _wrap_handler(self, handler: grpc.RpcMethodHandler, method: str) -> grpc.RpcMethodHandler:
+        # The generated and generic handlers return the same handler for every call of a
+        # method, so only the first call of a method pays for wrapping it.
+        cached = self._handlers.get(method)
+        if cached is not None and cached[0] is handler:
+            return cached[1]
+        rpc = self._metrics.rpc(method.rpartition("/")[2])
+        wrapped_handler: grpc.RpcMethodHandler
+        if handler.unary_unary is not None:
+            wrapped_handler = grpc.unary_unary_rpc_method_handler(
+                self._track(rpc, handler.unary_unary),
+                handler.request_deserializer,
+                handler.response_serializer,
+            )
+        elif handler.unary_stream is not None:
+            wrapped_handler = grpc.unary_stream_rpc_method_handler(
+                self._track_stream(rpc, handler.unary_stream),
+                handler.request_deserializer,
+                handler.response_serializer,
+            )
+        elif handler.stream_unary is not None:
+            wrapped_handler = grpc.stream_unary_rpc_method_handler(
+                self._track(rpc, handler.stream_unary),
+                handler.request_deserializer,
+                handler.response_serializer,
+            )
+        else:
+            assert handler.stream_stream is not None
+            wrapped_handler = grpc.stream_stream_rpc_method_handler(
+                self._track_stream(rpc, handler.stream_stream),
+                handler.request_deserializer,
+                handler.response_serializer,
+            )
+        self._handlers[method] = (handler, wrapped_handler)
+        return wrapped_handler
+
+    @abc.abstractmethod
+    def _track(self, rpc: RpcMetrics, behavior: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap the behavior of a unary-response RPC to record its calls in the metrics."""
+
+    @abc.abstractmethod
+    def _track_stream(self, rpc: RpcMetrics, behavior: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap the behavior of a streaming-response RPC to record its calls in the metrics."""
+
+
+class MetricsInterceptor(_MetricsWrapper, grpc.ServerInterceptor):
+    """Records the duration, errors and concurrency of the calls of a grpc.server."""
+
+    def __init__(self, metrics: LoggerMetrics) -> None:
+        """Initialize the interceptor.
+
+        Args:
+            metrics: The metrics to record the calls in.
+        """
+        super().__init__(metrics)
+
+    def intercept_service(
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Optional[grpc.RpcMethodHandler]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> Optional[grpc.RpcMethodHandler]:
+        """Wrap the handler of a call with one that records its metrics."""
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        return self._wrap_handler(handler, handler_call_details.method)
+
+    def _track(self, rpc: RpcMetrics, behavior: Callable[..., Any]) -> Callable[..., Any]:
+        in_flight_requests = self._metrics.in_flight_requests
+
+        def track(request: Any, context: grpc.ServicerContext) -> Any:
+            start_time = time.perf_counter()
+            in_flight_requests.add(1)
+            try:
+                return behavior(request, context)
+            except BaseException:
+                rpc.errors.add()
+                raise
+            finally:
+                in_flight_requests.add(-1)
+                rpc.duration.observe(time.perf_counter() - start_time)
+
+        return track
+
+    def _track_stream(self, rpc: RpcMetrics, behavior: Callable[..., Any]) -> Callable[..., Any]:
+        in_flight_requests = self._metrics.in_flight_requests
+
+        def track_stream(request: Any, context: grpc.ServicerContext) -> Iterator[Any]:
+            start_time = time.perf_counter()
+            in_flight_requests.add(1)
+            try:
+                yield from behavior(request, context)
+            except BaseException:
+                rpc.errors.add()
+                raise
+            finally:
+                in_flight_requests.add(-1)
+                rpc.duration.observe(time.perf_counter() - start_time)
+
+        return track_stream
+
+
+class AsyncMetricsInterceptor(_MetricsWrapper, grpc.aio.ServerInterceptor):
+    """Records the duration, errors and concurrency of the calls of a grpc.aio.server."""
+
+    def __init__(self, metrics: LoggerMetrics) -> None:
+        """Initialize the interceptor.
+
+        Args:
+            metrics: The metrics to record the calls in.
+        """
+        super().__init__(metrics)
+
+    async def intercept_service(
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Awaitable[grpc.RpcMethodHandler]],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> grpc.RpcMethodHandler:
+        """Wrap the handler of a call with one that records its metrics."""
+        handler = await continuation(handler_call_details)
+        # The handler is None if no service implements the method.
+        if handler is None:
+            return handler
+        return self._wrap_handler(handler, handler_call_details.method)
+
+    def _track(self, rpc: RpcMetrics, behavior: Callable[..., Any]) -> Callable[..., Any]:
+        in_flight_requests = self._metrics.in_flight_requests
+
+        async def track(request: Any, context: grpc.aio.ServicerContext) -> Any:
+            start_time = time.perf_counter()
+            in_flight_requests.add(1)
+            try:
+                return await behavior(request, context)
+            except BaseException:
+                rpc.errors.add()
+                raise
+            finally:
+                in_flight_requests.add(-1)
+                rpc.duration.observe(time.perf_counter() - start_time)
+
+        return track
+
+    def _track_stream(self, rpc: RpcMetrics, behavior: Callable[..., Any]) -> Callable[..., Any]:
+        in_flight_requests = self._metrics.in_flight_requests
+
+        async def track_stream(
+            request: Any, context: grpc.aio.ServicerContext
+        ) -> AsyncIterator[Any]:
+            start_time = time.perf_counter()
+            in_flight_requests.add(1)
+            try:
+                async for response in behavior(request, context):
+                    yield response
+            except BaseException:
+                rpc.errors.add()
+                raise
+            finally:
+                in_flight_requests.add(-1)
+                rpc.duration.observe(time.perf_counter() - start_time)
+
+        return track_stream
+
+
+class MetricsHttpServer:
+    """Serves the metrics in the Prometheus text format at /metrics on a local port."""
+
+    def __init__(
+        self, port: int, collect: Callable[[], GetStatsResponse], host: str = "127.0.0.1"
+    ) -> None:
+        """Initialize the HTTP server.
+
+        Args:
+            port: The port to listen on, or 0 to pick a free port.
+            collect: Gets a snapshot of the metrics for each scrape.
+            host: The address to listen on. By default, only local scrapers can connect.
+        """
+        # Import the HTTP server on demand, so that it doesn't slow down the startup of
+        # services that don't serve their metrics over HTTP.
+        import http.server
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - function name should be lowercase
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = format_prometheus(collect()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                # Don't print a line for every scrape.
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="MetricsHttpServer", daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        """The port that the server listens on."""
+        return self._server.server_address[1]
+
+    def start(self) -> None:
+        """Start serving on a background thread."""
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop serving and close the port."""
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
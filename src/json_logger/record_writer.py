@@ -0,0 +1,218 @@
+"""A group-commit writer that batches encoded log records into buffered writes."""
+
+import enum
+import logging
+import queue
+import threading
+import time
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+from json_logger.metrics import WriterMetrics
+from json_logger.storage import StorageBackend
+
+_logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# How often a caller blocked on a full queue checks that the writer thread is still running.
+_PUT_POLL_INTERVAL = 0.1
+
+
+class Durability(enum.Enum):
+    """How far each batch is pushed toward the disk before the writer takes the next one."""
+
+    NONE = "none"
+    """Leave the batch in the file buffer."""
+
+    FLUSH = "flush"
+    """Flush the batch to the operating system."""
+
+    FSYNC = "fsync"
+    """Flush the batch and wait for the operating system to write it to the disk."""
+
+
+class RecordWriter(Generic[_T]):
+    """Writes encoded records to a storage backend from a single background thread.
+
+    Request handlers encode requests with :attr:`backend` and pass the records to :meth:`submit`,
+    which puts them on a bounded queue and returns without touching the storage. The writer
+    thread takes queued records until the batch reaches ``max_batch_records`` or
+    ``max_batch_bytes`` or ``max_batch_delay`` seconds have passed since the first record of the
+    batch, then writes the whole batch with one buffered write. Because only the writer thread
+    touches the storage, records from concurrent handlers never interleave.
+    """
+
+    def __init__(
+        self,
+        backend: StorageBackend[_T],
+        *,
+        durability: Durability = Durability.FLUSH,
+        max_batch_records: int = 1000,
+        max_batch_bytes: int = 1024 * 1024,
+        max_batch_delay: float = 0.01,
+        max_queue_records: int = 10000,
+        metrics: Optional[WriterMetrics] = None,
+    ) -> None:
+        """Initialize the record writer.
+
+        Args:
+            backend: The storage backend that encodes and writes the records.
+            durability: How far each batch is pushed toward the disk.
+            max_batch_records: The maximum number of records in one batch.
+            max_batch_bytes: The batch size in bytes after which the batch is written.
+            max_batch_delay: The maximum time in seconds to wait for more records before
+                writing a batch.
+            max_queue_records: The maximum number of records waiting to be written. When the
+                queue is full, :meth:`submit` blocks until the writer catches up.
+            metrics: The metrics to record the written batches in. Writers can share them.
+        """
+        self._backend = backend
+        self._durability = durability
+        self._max_batch_records = max_batch_records
+        self._max_batch_bytes = max_batch_bytes
+        self._max_batch_delay = max_batch_delay
+        # None tells the writer thread to stop.
+        self._queue: "queue.Queue[Optional[_T]]" = queue.Queue(maxsize=max_queue_records)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._metrics = metrics if metrics is not None else WriterMetrics()
+
+    @property
+    def backend(self) -> StorageBackend[_T]:
+        """The storage backend that encodes and writes the records."""
+        return self._backend
+
+    @property
+    def queued_records(self) -> int:
+        """The approximate number of records waiting to be written."""
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Open the storage and start the writer thread."""
+        self._backend.open()
+        self._thread = threading.Thread(target=self._run, name="RecordWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: _T) -> None:
+        """Queue an encoded record for writing.
+
+        The record is written as a unit, so a caller that needs several requests written
+        together can encode them into one record.
+
+        Args:
+            record: The record returned by the backend's encode method.
+
+        Raises:
+            RuntimeError: If the record writer is closed or its thread stopped.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The record writer is closed.")
+            self._put(record)
+
+    def try_submit(self, record: _T) -> bool:
+        """Queue an encoded record for writing if the queue has room for it.
+
+        Args:
+            record: The record returned by the backend's encode method.
+
+        Returns:
+            False if the queue is full and the record was not queued.
+
+        Raises:
+            RuntimeError: If the record writer is closed or its thread stopped.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The record writer is closed.")
+            self._check_thread()
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                return False
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write the records that are still queued, then close the storage.
+
+        Args:
+            timeout: The maximum time in seconds to wait for the queue to drain. If this is
+                None, wait until every queued record is written.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._put(None)
+            except RuntimeError:
+                # The writer thread stopped, so there is nothing left to drain.
+                return
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                _logger.warning("Timed out waiting for the record writer to drain.")
+
+    def _put(self, item: Optional[_T]) -> None:
+        # Block in short intervals, so that a caller waiting for room in a full queue doesn't
+        # wait forever, while holding the lock, if the writer thread stopped.
+        while True:
+            self._check_thread()
+            try:
+                self._queue.put(item, timeout=_PUT_POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def _check_thread(self) -> None:
+        if self._thread is not None and not self._thread.is_alive():
+            raise RuntimeError("The record writer thread stopped.")
+
+    def _run(self) -> None:
+        try:
+            stopping = False
+            while not stopping:
+                batch, batch_bytes, stopping = self._next_batch()
+                if batch:
+                    self._write_batch(batch, batch_bytes)
+        finally:
+            self._backend.close()
+
+    def _next_batch(self) -> Tuple[List[_T], int, bool]:
+        record = self._queue.get()
+        if record is None:
+            return [], 0, True
+        batch = [record]
+        batch_bytes = self._backend.size_of(record)
+        deadline = time.monotonic() + self._max_batch_delay
+        while len(batch) < self._max_batch_records and batch_bytes < self._max_batch_bytes:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    record = self._queue.get(timeout=remaining)
+                else:
+                    record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is None:
+                return batch, batch_bytes, True
+            batch.append(record)
+            batch_bytes += self._backend.size_of(record)
+        return batch, batch_bytes, False
+
+    def _write_batch(self, batch: List[_T], batch_bytes: int) -> None:
+        start_time = time.perf_counter()
+        try:
+            self._backend.write(batch)
+            if self._durability != Durability.NONE:
+                self._backend.flush()
+            if self._durability == Durability.FSYNC:
+                self._backend.sync()
+        except Exception:
+            _logger.exception("Failed to write %d records.", len(batch))
+            self._metrics.write_errors.add()
+            return
+        self._metrics.write_duration.observe(time.perf_counter() - start_time)
+        self._metrics.records_written.add(len(batch))
+        self._metrics.bytes_written.add(batch_bytes)
@@ -0,0 +1,313 @@
+"""Size- and age-based rotation of log files into segments, with background compression."""
+
+import datetime
+import enum
+import gzip
+import json
+import logging
+import os
+import pathlib
+import queue
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_logger = logging.getLogger(__name__)
+
+PathType = Union[str, "os.PathLike[str]"]
+
+
+class Compression(enum.Enum):
+    """How closed segments are compressed."""
+
+    NONE = "none"
+    """Leave closed segments uncompressed."""
+
+    GZIP = "gzip"
+    """Compress closed segments with gzip."""
+
+    ZSTD = "zstd"
+    """Compress closed segments with Zstandard. This requires the zstandard package."""
+
+
+_COMPRESSED_SUFFIXES = {Compression.GZIP: ".gz", Compression.ZSTD: ".zst"}
+
+
+class SegmentManifest:
+    """A JSON file that lists the segments of the log files and their time ranges."""
+
+    def __init__(self, path: PathType) -> None:
+        """Initialize the manifest, loading the segments listed by an existing manifest.
+
+        Args:
+            path: The manifest file.
+        """
+        self._path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._segments: List[Dict[str, Any]] = []
+        if self._path.exists():
+            with self._path.open() as file:
+                self._segments = json.load(file)["segments"]
+
+    def add(self, shard: str, segment_path: pathlib.Path, start_time: float) -> None:
+        """Add a newly opened segment."""
+        with self._lock:
+            self._segments.append(
+                {
+                    "shard": shard,
+                    "path": segment_path.name,
+                    "start_time": _format_time(start_time),
+                    "end_time": None,
+                    "size": 0,
+                }
+            )
+            self._save()
+
+    def update(self, segment_path: pathlib.Path, **fields: Any) -> None:
+        """Update the entry of a segment."""
+        with self._lock:
+            for segment in self._segments:
+                if segment["path"] == segment_path.name:
+                    segment.update(fields)
+            self._save()
+
+    def _save(self) -> None:
+        # Replace the manifest in one step so that readers never see a partial file.
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        with temp_path.open("w") as file:
+            json.dump({"segments": self._segments}, file, indent=2)
+        os.replace(temp_path, self._path)
+
+
+class SegmentCompressor:
+    """Compresses closed segments on a background thread so that writers never wait for it."""
+
+    def __init__(self, compression: Compression, manifest: SegmentManifest) -> None:
+        """Initialize the compressor.
+
+        Args:
+            compression: How to compress the segments.
+            manifest: The manifest to record the compressed segments in.
+        """
+        if compression == Compression.ZSTD and zstandard is None:
+            raise ValueError("Zstandard compression requires the zstandard package.")
+        self._compression = compression
+        self._manifest = manifest
+        # None tells the compressor thread to stop.
+        self._queue: "queue.Queue[Optional[pathlib.Path]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="SegmentCompressor", daemon=True)
+        self._thread.start()
+
+    def submit(self, segment_path: pathlib.Path) -> None:
+        """Queue a closed segment for compression."""
+        self._queue.put(segment_path)
+
+    def close(self) -> None:
+        """Compress the segments that are still queued and stop the compressor thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        for segment_path in iter(self._queue.get, None):
+            try:
+                self._compress(segment_path)
+            except OSError:
+                _logger.exception("Failed to compress %s.", segment_path)
+
+    def _compress(self, segment_path: pathlib.Path) -> None:
+        compressed_path = segment_path.with_name(
+            segment_path.name + _COMPRESSED_SUFFIXES[self._compression]
+        )
+        with segment_path.open("rb") as source, compressed_path.open("wb") as destination:
+            if self._compression == Compression.ZSTD:
+                zstandard.ZstdCompressor().copy_stream(source, destination)
+            else:
+                with gzip.GzipFile(fileobj=destination, mode="wb") as gzip_file:
+                    shutil.copyfileobj(source, gzip_file)
+        self._manifest.update(
+            segment_path,
+            path=compressed_path.name,
+            compressed_size=compressed_path.stat().st_size,
+        )
+        segment_path.unlink()
+
+
+class SegmentStore:
+    """Opens segmented log files that share one manifest and one compressor."""
+
+    def __init__(
+        self,
+        manifest_path: PathType,
+        *,
+        max_segment_bytes: Optional[int] = None,
+        max_segment_age: Optional[float] = None,
+        compression: Compression = Compression.NONE,
+    ) -> None:
+        """Initialize the segment store.
+
+        Args:
+            manifest_path: The manifest file that lists the segments.
+            max_segment_bytes: The size in bytes after which a segment is closed.
+            max_segment_age: The time in seconds after which a segment is closed. The age is only
+                checked when data is written, so the segment of an idle log file stays open and
+                uncompressed until the next write.
+            compression: How closed segments are compressed.
+        """
+        self._manifest = SegmentManifest(manifest_path)
+        self._max_segment_bytes = max_segment_bytes
+        self._max_segment_age = max_segment_age
+        self._compressor: Optional[SegmentCompressor] = None
+        if compression != Compression.NONE:
+            self._compressor = SegmentCompressor(compression, self._manifest)
+
+    def open(self, path: PathType, shard: str = "") -> "SegmentedFile":
+        """Open a segmented log file for appending.
+
+        Args:
+            path: The log file. The segments are named after it.
+            shard: The shard that the log file belongs to, as recorded in the manifest.
+
+        Returns:
+            The segmented file.
+        """
+        return SegmentedFile(
+            pathlib.Path(path),
+            shard,
+            manifest=self._manifest,
+            compressor=self._compressor,
+            max_segment_bytes=self._max_segment_bytes,
+            max_segment_age=self._max_segment_age,
+        )
+
+    def close(self) -> None:
+        """Wait for the closed segments to be compressed."""
+        if self._compressor is not None:
+            self._compressor.close()
+
+
+class SegmentedFile:
+    """A log file that is split into segments by size and age.
+
+    The writes go to the current segment. Before a write, the current segment is closed and a
+    new one is opened if the current segment is too large or too old. Nothing closes an old
+    segment between writes. Closed segments are compressed in the background.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        shard: str,
+        *,
+        manifest: SegmentManifest,
+        compressor: Optional[SegmentCompressor],
+        max_segment_bytes: Optional[int],
+        max_segment_age: Optional[float],
+    ) -> None:
+        """Initialize the segmented file. Use :meth:`SegmentStore.open` instead."""
+        self._path = path
+        self._shard = shard
+        self._manifest = manifest
+        self._compressor = compressor
+        self._max_segment_bytes = max_segment_bytes
+        self._max_segment_age = max_segment_age
+        self._file: Optional[Any] = None
+        self._segment_path = path
+        self._segment_size = 0
+        self._segment_start_time = 0.0
+        self._segment_end_time = 0.0
+
+    def write(self, data: bytes) -> int:
+        """Write data to the current segment, opening a new segment first if necessary."""
+        if self._file is None or self._should_rotate():
+            self._rotate()
+        assert self._file is not None
+        written = self._file.write(data)
+        self._segment_size += written
+        self._segment_end_time = time.time()
+        return written
+
+    def flush(self) -> None:
+        """Flush the current segment."""
+        if self._file is not None:
+            self._file.flush()
+
+    def fileno(self) -> int:
+        """Get the file descriptor of the current segment."""
+        if self._file is None:
+            raise ValueError("No segment is open.")
+        return self._file.fileno()
+
+    def close(self) -> None:
+        """Close the current segment."""
+        if self._file is not None:
+            self._close_segment()
+
+    def _should_rotate(self) -> bool:
+        if self._max_segment_bytes is not None and self._segment_size >= self._max_segment_bytes:
+            return True
+        if self._max_segment_age is not None:
+            return time.time() - self._segment_start_time >= self._max_segment_age
+        return False
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._close_segment()
+        self._segment_start_time = time.time()
+        self._segment_end_time = self._segment_start_time
+        self._segment_path = self._next_segment_path()
+        self._segment_size = 0
+        self._file = self._segment_path.open("ab")
+        self._manifest.add(self._shard, self._segment_path, self._segment_start_time)
+
+    def _close_segment(self) -> None:
+        assert self._file is not None
+        self._file.close()
+        self._file = None
+        self._manifest.update(
+            self._segment_path,
+            end_time=_format_time(self._segment_end_time),
+            size=self._segment_size,
+        )
+        if self._compressor is not None:
+            self._compressor.submit(self._segment_path)
+
+    def _next_segment_path(self) -> pathlib.Path:
+        timestamp = datetime.datetime.fromtimestamp(self._segment_start_time).strftime(
+            "%Y%m%dT%H%M%S%f"
+        )
+        stem = f"{self._path.stem}.{timestamp}"
+        segment_path = self._path.with_name(stem + self._path.suffix)
+        index = 1
+        while segment_path.exists():
+            segment_path = self._path.with_name(f"{stem}-{index}{self._path.suffix}")
+            index += 1
+        return segment_path
+
+
+def open_segment(path: PathType) -> Any:
+    """Open a segment for reading, decompressing it if necessary.
+
+    Args:
+        path: The segment, as listed in the manifest.
+
+    Returns:
+        A binary file object.
+    """
+    suffix = pathlib.Path(path).suffix
+    if suffix == _COMPRESSED_SUFFIXES[Compression.GZIP]:
+        return gzip.open(path, "rb")
+    if suffix == _COMPRESSED_SUFFIXES[Compression.ZSTD]:
+        if zstandard is None:
+            raise ValueError("Reading Zstandard segments requires the zstandard package.")
+        return zstandard.open(path, "rb")
+    return open(path, "rb")
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
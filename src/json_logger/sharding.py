@@ -0,0 +1,200 @@
+"""Routing of log requests to per-shard record writers."""
+
+import collections
+import enum
+import logging
+import os
+import pathlib
+import re
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from json_logger.record_writer import RecordWriter
+from json_logger.stubs.log_measurement_pb2 import LogRequest
+
+PathType = Union[str, "os.PathLike[str]"]
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CLIENT_SHARDS = 64
+
+# The shard of the clients that connect once there are max_client_shards shards.
+_OTHER_CLIENTS_SHARD = "other_clients"
+
+_LOG_REQUEST_FIELDS = (
+    "measured_sites",
+    "measured_pins",
+    "voltage_measurements",
+    "current_measurements",
+    "in_compliance",
+)
+
+
+class ShardKey(enum.Enum):
+    """How log requests are split across log files."""
+
+    NONE = "none"
+    """Log every request to one log file."""
+
+    SITE = "site"
+    """Log the measurements of each site to a separate log file."""
+
+    CLIENT = "client"
+    """Log the requests of each calling measurement service to a separate log file."""
+
+
+class ShardedWriter:
+    """Routes log requests to one record writer per shard.
+
+    Each shard has its own writer, writer thread and log file, so handlers that log to different
+    shards never contend for the same queue or file. The writers are created on first use and
+    kept until the sharded writer is closed, so the number of client shards is bounded.
+    """
+
+    def __init__(
+        self,
+        shard_key: ShardKey,
+        create_writer: Callable[[str], RecordWriter],
+        *,
+        max_client_shards: int = DEFAULT_MAX_CLIENT_SHARDS,
+    ) -> None:
+        """Initialize the sharded writer.
+
+        Args:
+            shard_key: How the log requests are split across shards.
+            create_writer: Creates and starts the record writer of a shard, given the shard name.
+                The shard name is empty if shard_key is NONE.
+            max_client_shards: The number of clients that get their own shard when sharding by
+                client. The requests of further clients are logged to one shard for all of them.
+        """
+        self._shard_key = shard_key
+        self._create_writer = create_writer
+        self._max_client_shards = max_client_shards
+        self._writers: Dict[str, RecordWriter] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._warned_max_client_shards = False
+
+    def route(
+        self, requests: Sequence[LogRequest], client_name: str
+    ) -> List[Tuple[RecordWriter, Sequence[LogRequest]]]:
+        """Split log requests into shards.
+
+        Args:
+            requests: The log requests.
+            client_name: The name of the calling measurement service.
+
+        Returns:
+            The record writer of each shard and the requests to log to it.
+        """
+        if self._shard_key == ShardKey.SITE:
+            shards: Dict[str, List[LogRequest]] = collections.defaultdict(list)
+            for request in requests:
+                for site, site_request in _split_by_site(request):
+                    shards[f"site{site}"].append(site_request)
+            return [
+                (self._get_writer(shard), shard_requests)
+                for shard, shard_requests in shards.items()
+            ]
+        return [(self.get_client_writer(client_name), requests)]
+
+    @property
+    def queued_records(self) -> int:
+        """The approximate number of records waiting to be written by all shards."""
+        return sum(writer.queued_records for writer in list(self._writers.values()))
+
+    def get_client_writer(self, client_name: str) -> RecordWriter:
+        """Get the record writer for the requests of a client, without looking at the requests.
+
+        Args:
+            client_name: The name of the calling measurement service.
+
+        Returns:
+            The record writer of the client's shard.
+
+        Raises:
+            ValueError: If the requests are sharded by site.
+        """
+        if self._shard_key == ShardKey.SITE:
+            raise ValueError("Requests that are sharded by site must be routed with route().")
+        if self._shard_key == ShardKey.CLIENT:
+            shard = _sanitize(client_name)
+            if shard not in self._writers and len(self._writers) >= self._max_client_shards:
+                # Each shard has a writer thread and an open file, so don't let a stream of new
+                # clients create them without bound.
+                if not self._warned_max_client_shards:
+                    self._warned_max_client_shards = True
+                    _logger.warning(
+                        "More than %d clients logged. The requests of further clients are logged "
+                        "to the shard %s.",
+                        self._max_client_shards,
+                        _OTHER_CLIENTS_SHARD,
+                    )
+                shard = _OTHER_CLIENTS_SHARD
+            return self._get_writer(shard)
+        return self._get_writer("")
+
+    def close(self) -> None:
+        """Drain and close the record writers of all shards."""
+        with self._lock:
+            self._closed = True
+            writers = list(self._writers.values())
+        for writer in writers:
+            writer.close()
+
+    def _get_writer(self, shard: str) -> RecordWriter:
+        writer = self._writers.get(shard)
+        if writer is None:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("The sharded writer is closed.")
+                writer = self._writers.get(shard)
+                if writer is None:
+                    writer = self._create_writer(shard)
+                    self._writers[shard] = writer
+        return writer
+
+
+def shard_path(path: PathType, shard: str) -> pathlib.Path:
+    """Get the log file of a shard.
+
+    Args:
+        path: The log file given on the command line, such as measurements.json.
+        shard: The shard name.
+
+    Returns:
+        The log file of the shard, such as measurements.site0.json.
+    """
+    path = pathlib.Path(path)
+    if not shard:
+        return path
+    return path.with_name(f"{path.stem}.{shard}{path.suffix}")
+
+
+def _split_by_site(request: LogRequest) -> List[Tuple[int, LogRequest]]:
+    sites = list(request.measured_sites)
+    waveform_sites = [waveform.site for waveform in request.waveforms]
+    distinct_sites = set(sites).union(waveform_sites)
+    if len(distinct_sites) <= 1:
+        return [(distinct_sites.pop() if distinct_sites else -1, request)]
+    indices: Dict[int, List[int]] = collections.defaultdict(list)
+    for index, site in enumerate(sites):
+        indices[site].append(index)
+    site_requests: Dict[int, LogRequest] = collections.defaultdict(LogRequest)
+    for site, site_indices in indices.items():
+        site_request = site_requests[site]
+        for field in _LOG_REQUEST_FIELDS:
+            values = getattr(request, field)
+            getattr(site_request, field).extend(
+                values[index] for index in site_indices if index < len(values)
+            )
+    for waveform in request.waveforms:
+        site_requests[waveform.site].waveforms.append(waveform)
+    # The phases were timed for all of the sites together.
+    for site_request in site_requests.values():
+        site_request.phase_durations.update(request.phase_durations)
+    return list(site_requests.items())
+
+
+def _sanitize(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name) or "unknown"
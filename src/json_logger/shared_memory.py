@@ -0,0 +1,279 @@
+"""Ring buffers in shared memory through which clients on the same host send log requests.
+
+A client on the same host as the logger service opens a ring buffer with the OpenSharedMemory
+call and then writes each serialized LogRequest into it instead of calling Log. One receiver
+thread drains the ring buffers of all clients in bulk, so a request costs the client a memory
+copy instead of a gRPC call.
+
+A ring buffer starts with a header of 16 native-endian 64-bit words:
+
+====  =======================================================  ======
+Word  Field                                                    Writer
+====  =======================================================  ======
+0     MAGIC                                                    server
+1     The number of bytes of records that the ring holds       server
+2     Head: the end of the records that the server has read    server
+3     Tail: the end of the records that the client has written client
+4     Client state: CLIENT_OPEN or CLIENT_CLOSED               client
+5     Server state: SERVER_OPEN, SERVER_CLOSING, SERVER_CLOSED server
+6     Server heartbeat: time.time_ns() of the last drain       server
+7-8   A random token, which the server also returns            server
+====  =======================================================  ======
+
+The records follow the header. Each record is a 32-bit native-endian length, four unused bytes
+and the serialized LogRequest, padded to a multiple of 8 bytes. The head and tail count bytes
+since the ring was created, and a record that reaches the end of the ring continues at its
+start. Each word is written by one side only, with one aligned 64-bit store: the client writes
+a record and then advances the tail, and the server copies the records up to the tail and then
+advances the head.
+
+Before the server closes a ring, for example because the client has been idle, it sets its
+state to SERVER_CLOSING, reads the records written so far and then sets it to SERVER_CLOSED.
+A client that finds the ring closing after writing a record waits until it is closed and sends
+the record again if the head didn't reach it.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional
+
+_logger = logging.getLogger(__name__)
+
+MAGIC = int.from_bytes(b"LOGSHM01", "little")
+HEADER_SIZE = 128
+TOKEN_SIZE = 16
+
+CLIENT_OPEN = 0
+CLIENT_CLOSED = 1
+SERVER_OPEN = 0
+SERVER_CLOSING = 1
+SERVER_CLOSED = 2
+
+DEFAULT_CAPACITY = 4 * 1024 * 1024
+MIN_CAPACITY = 64 * 1024
+MAX_CAPACITY = 256 * 1024 * 1024
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+_MAGIC_WORD = 0
+_CAPACITY_WORD = 1
+_HEAD_WORD = 2
+_TAIL_WORD = 3
+_CLIENT_STATE_WORD = 4
+_SERVER_STATE_WORD = 5
+_HEARTBEAT_WORD = 6
+_TOKEN_OFFSET = 56
+
+_RECORD_HEADER = struct.Struct("=I4x")
+
+
+class SharedMemoryRing:
+    """A ring buffer in shared memory that one client writes serialized log requests into."""
+
+    def __init__(self, capacity: int, log: Callable[[List[bytes]], None]) -> None:
+        """Create the shared memory block of the ring buffer.
+
+        Args:
+            capacity: The number of bytes of records that the ring holds. It must be a multiple
+                of 8.
+            log: Called on the receiver thread with the serialized requests of each drain.
+        """
+        self._capacity = capacity
+        self._log = log
+        self._token = os.urandom(TOKEN_SIZE)
+        self._last_write_time = time.monotonic()
+        self._memory = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + capacity)
+        buffer = self._memory.buf
+        assert buffer is not None
+        self._header = buffer[:HEADER_SIZE].cast("Q")
+        self._data = buffer[HEADER_SIZE : HEADER_SIZE + capacity]
+        buffer[_TOKEN_OFFSET : _TOKEN_OFFSET + TOKEN_SIZE] = self._token
+        self._header[_CAPACITY_WORD] = capacity
+        self._header[_HEARTBEAT_WORD] = time.time_ns()
+        self._header[_MAGIC_WORD] = MAGIC
+
+    @property
+    def name(self) -> str:
+        """The name of the shared memory block."""
+        return self._memory.name
+
+    @property
+    def capacity(self) -> int:
+        """The number of bytes of records that the ring holds."""
+        return self._capacity
+
+    @property
+    def token(self) -> bytes:
+        """The random token in the header."""
+        return self._token
+
+    @property
+    def client_closed(self) -> bool:
+        """Whether the client has stopped writing records."""
+        return self._header[_CLIENT_STATE_WORD] == CLIENT_CLOSED
+
+    @property
+    def idle_time(self) -> float:
+        """The time in seconds since the client last wrote a record."""
+        return time.monotonic() - self._last_write_time
+
+    def heartbeat(self, now: int) -> None:
+        """Tell the client that the server is still draining the ring.
+
+        Args:
+            now: The current time.time_ns().
+        """
+        self._header[_HEARTBEAT_WORD] = now
+
+    def drain(self) -> int:
+        """Copy the records that the client has written and log them.
+
+        Returns:
+            The number of records.
+        """
+        head = self._header[_HEAD_WORD]
+        tail = self._header[_TAIL_WORD]
+        if tail == head:
+            return 0
+        payloads: List[bytes] = []
+        if head < tail <= head + self._capacity:
+            position = head
+            while position < tail:
+                (length,) = _RECORD_HEADER.unpack_from(self._data, position % self._capacity)
+                end = position + _RECORD_HEADER.size + length
+                if end > tail:
+                    _logger.error("Dropped a truncated record in the ring %s.", self.name)
+                    break
+                payloads.append(self._read(position + _RECORD_HEADER.size, length))
+                position = (end + 7) & ~7
+        else:
+            _logger.error("Dropped the records of the ring %s, whose tail is invalid.", self.name)
+        # Free the space before logging, because logging blocks while the writer is backed up.
+        self._header[_HEAD_WORD] = tail
+        self._last_write_time = time.monotonic()
+        if payloads:
+            self._log(payloads)
+        return len(payloads)
+
+    def close(self) -> None:
+        """Log the remaining records and free the shared memory block."""
+        self._header[_SERVER_STATE_WORD] = SERVER_CLOSING
+        try:
+            self.drain()
+        finally:
+            self._header[_SERVER_STATE_WORD] = SERVER_CLOSED
+            self._header.release()
+            self._data.release()
+            self._memory.close()
+            # The client keeps its mapping, so it can still read the server state.
+            self._memory.unlink()
+
+    def _read(self, position: int, length: int) -> bytes:
+        start = position % self._capacity
+        first = min(length, self._capacity - start)
+        data = bytes(self._data[start : start + first])
+        if first < length:
+            data += self._data[: length - first]
+        return data
+
+
+class SharedMemoryReceiver:
+    """Drains the ring buffers of all clients on one background thread.
+
+    The thread polls the rings, more often while records arrive and less often while they are
+    idle, and closes the rings whose client closed them or wrote nothing for a while. Closing
+    the receiver logs the records that are left in the rings.
+    """
+
+    def __init__(
+        self,
+        *,
+        poll_interval: float = 0.001,
+        max_poll_interval: float = 0.02,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ) -> None:
+        """Initialize the receiver.
+
+        Args:
+            poll_interval: The time in seconds between drains while records arrive.
+            max_poll_interval: The time in seconds between drains while the rings are idle.
+            idle_timeout: The time in seconds after which a ring that the client hasn't written
+                to is closed. The client opens a new ring when it writes again.
+        """
+        self._poll_interval = poll_interval
+        self._max_poll_interval = max_poll_interval
+        self._idle_timeout = idle_timeout
+        self._rings: List[SharedMemoryRing] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def open(self, capacity: int, log: Callable[[List[bytes]], None]) -> SharedMemoryRing:
+        """Create a ring buffer for a client and start draining it.
+
+        Args:
+            capacity: The number of bytes of records that the client asked for, or 0 for the
+                default. It is rounded to a multiple of 8 between MIN_CAPACITY and MAX_CAPACITY.
+            log: Called on the receiver thread with the serialized requests of each drain.
+
+        Returns:
+            The ring buffer.
+
+        Raises:
+            RuntimeError: If the receiver is closed.
+        """
+        capacity = min(max(capacity or DEFAULT_CAPACITY, MIN_CAPACITY), MAX_CAPACITY) & ~7
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The shared memory receiver is closed.")
+            ring = SharedMemoryRing(capacity, log)
+            self._rings.append(ring)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="SharedMemoryReceiver", daemon=True
+                )
+                self._thread.start()
+        return ring
+
+    def close(self) -> None:
+        """Stop the receiver thread, log the records left in the rings and close them."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._stop_event.set()
+        if thread is not None:
+            thread.join()
+        for ring in self._rings:
+            self._close_ring(ring)
+        self._rings.clear()
+
+    def _run(self) -> None:
+        interval = self._poll_interval
+        while not self._stop_event.wait(interval):
+            now = time.time_ns()
+            with self._lock:
+                rings = list(self._rings)
+            record_count = 0
+            for ring in rings:
+                ring.heartbeat(now)
+                try:
+                    record_count += ring.drain()
+                except Exception:
+                    _logger.exception("Failed to log the records of the ring %s.", ring.name)
+                if ring.client_closed or ring.idle_time >= self._idle_timeout:
+                    with self._lock:
+                        self._rings.remove(ring)
+                    self._close_ring(ring)
+            interval = (
+                self._poll_interval if record_count else min(interval * 2, self._max_poll_interval)
+            )
+
+    def _close_ring(self, ring: SharedMemoryRing) -> None:
+        try:
+            ring.close()
+        except Exception:
+            _logger.exception("Failed to close the ring %s.", ring.name)
@@ -0,0 +1,644 @@
+"""Storage backends that encode log requests and write them to a log file.
+
+A backend splits the work between the two sides of the record writer. Request handlers call
+:meth:`StorageBackend.encode` to turn one or more requests into a record, so the encoding runs on
+the handler threads. The writer thread calls :meth:`StorageBackend.write` with a batch of those
+records and only does the I/O.
+"""
+
+import abc
+import enum
+import io
+import itertools
+import json
+import os
+import struct
+import time
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from json_logger.segments import open_segment
+from json_logger.stubs.log_measurement_pb2 import LogRequest, Waveform, WaveformDataType
+
+if TYPE_CHECKING:
+    # NumPy is imported on demand, because only the columnar format and waveforms need it and
+    # it takes a while to import.
+    import numpy as np
+
+_T = TypeVar("_T")
+
+PathType = Union[str, "os.PathLike[str]"]
+
+
+class StorageFormat(enum.Enum):
+    """The format of the log file."""
+
+    JSON = "json"
+    """One JSON object per line."""
+
+    COLUMNAR = "columnar"
+    """Typed NumPy column chunks. Read the file with :func:`read_columns`."""
+
+    RAW = "raw"
+    """The serialized requests as received, each with a timestamp header. Read the file with
+    :func:`iter_raw_records`."""
+
+
+class OutputFile(Protocol):
+    """The file operations that the file backends use."""
+
+    def write(self, data: bytes) -> int:
+        """Write data to the file."""
+
+    def flush(self) -> None:
+        """Flush the file."""
+
+    def fileno(self) -> int:
+        """Get the file descriptor."""
+
+    def close(self) -> None:
+        """Close the file."""
+
+
+def _open_append(path: PathType) -> OutputFile:
+    return open(path, mode="ab")
+
+
+class StorageBackend(abc.ABC, Generic[_T]):
+    """Encodes log requests into records and writes batches of records to storage."""
+
+    @abc.abstractmethod
+    def encode(self, requests: Sequence[LogRequest]) -> _T:
+        """Encode log requests into one record that is written as a unit.
+
+        This is called on the request handler threads.
+
+        Args:
+            requests: The log requests to encode.
+
+        Returns:
+            The encoded record.
+        """
+
+    @abc.abstractmethod
+    def size_of(self, record: _T) -> int:
+        """Get the encoded size of a record in bytes."""
+
+    @abc.abstractmethod
+    def open(self) -> None:
+        """Open the storage for writing."""
+
+    @abc.abstractmethod
+    def write(self, records: Sequence[_T]) -> None:
+        """Write a batch of records.
+
+        This is called on the writer thread.
+        """
+
+    @abc.abstractmethod
+    def flush(self) -> None:
+        """Push buffered data to the operating system."""
+
+    @abc.abstractmethod
+    def sync(self) -> None:
+        """Wait for the operating system to write the flushed data to the disk."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Flush and close the storage."""
+
+
+class _FileBackend(StorageBackend[_T]):
+    """A backend that appends to a file."""
+
+    def __init__(
+        self, path: PathType, *, open_file: Callable[[PathType], OutputFile] = _open_append
+    ) -> None:
+        """Initialize the backend.
+
+        Args:
+            path: The log file to append to.
+            open_file: Opens the log file for appending, for example as a segmented file.
+        """
+        self.path = path
+        self._open_file = open_file
+        self._file: Optional[OutputFile] = None
+
+    def open(self) -> None:
+        self._file = self._open_file(self.path)
+
+    def flush(self) -> None:
+        self._get_file().flush()
+
+    def sync(self) -> None:
+        file = self._get_file()
+        os.fsync(file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _get_file(self) -> OutputFile:
+        if self._file is None:
+            raise RuntimeError(f"The log file {self.path} is not open.")
+        return self._file
+
+
+class JsonLinesBackend(_FileBackend[bytes]):
+    """Writes each log request as one line of JSON."""
+
+    def encode(self, requests: Sequence[LogRequest]) -> bytes:
+        """Encode log requests as lines of JSON.
+
+        Raises:
+            ValueError: If the samples of a waveform don't match its data type.
+        """
+        return b"".join(_encode_json_line(request) for request in requests)
+
+    def size_of(self, record: bytes) -> int:
+        """Get the encoded size of a record in bytes."""
+        return len(record)
+
+    def write(self, records: Sequence[bytes]) -> None:
+        """Write a batch of records with one write."""
+        self._get_file().write(b"".join(records))
+
+
+def _encode_json_line(request: LogRequest) -> bytes:
+    data = {
+        "measured_sites": list(request.measured_sites),
+        "measured_pins": list(request.measured_pins),
+        "current_measurements": list(request.current_measurements),
+        "voltage_measurements": list(request.voltage_measurements),
+        "in_compliance": list(request.in_compliance),
+    }
+    if request.waveforms:
+        # The samples are logged by WaveformBackend, so only describe the waveforms here.
+        data["waveforms"] = [
+            {
+                "site": waveform.site,
+                "pin": waveform.pin,
+                "t0": waveform.t0,
+                "dt": waveform.dt,
+                "sample_count": len(waveform_samples(waveform)),
+            }
+            for waveform in request.waveforms
+        ]
+    if request.phase_durations:
+        data["phase_durations"] = dict(request.phase_durations)
+    # Note: The JSON formatting is not strictly followed as this is only a sample example.
+    return json.dumps(data).encode() + b"\n"
+
+
+_COLUMNS = (
+    "measured_sites",
+    "measured_pins",
+    "voltage_measurements",
+    "current_measurements",
+    "in_compliance",
+)
+
+
+class _ColumnarRecord(NamedTuple):
+    field_lengths: "np.ndarray"
+    measured_sites: "np.ndarray"
+    measured_pins: List[str]
+    voltage_measurements: "np.ndarray"
+    current_measurements: "np.ndarray"
+    in_compliance: "np.ndarray"
+
+
+class ColumnarBackend(_FileBackend[_ColumnarRecord]):
+    """Writes each batch of log requests as a chunk of typed NumPy columns.
+
+    Each chunk is a sequence of arrays in NPY format, in this order:
+
+    - ``field_lengths``: uint32 array with one row per log request, holding the length of each
+      repeated field of the request in the order of the columns below.
+    - ``measured_sites``: int32
+    - ``pin_dictionary``: unicode array of the distinct pin names in the chunk.
+    - ``measured_pins``: int32 indices into ``pin_dictionary``.
+    - ``voltage_measurements``: float32
+    - ``current_measurements``: float32
+    - ``in_compliance``: bool
+    """
+
+    def encode(self, requests: Sequence[LogRequest]) -> _ColumnarRecord:
+        """Convert log requests into typed column arrays."""
+        import numpy as np
+
+        field_lengths = np.array(
+            [[len(getattr(request, column)) for column in _COLUMNS] for request in requests],
+            dtype=np.uint32,
+        ).reshape(-1, len(_COLUMNS))
+        return _ColumnarRecord(
+            field_lengths,
+            _concatenate(requests, "measured_sites", np.int32),
+            [pin for request in requests for pin in request.measured_pins],
+            _concatenate(requests, "voltage_measurements", np.float32),
+            _concatenate(requests, "current_measurements", np.float32),
+            _concatenate(requests, "in_compliance", np.bool_),
+        )
+
+    def size_of(self, record: _ColumnarRecord) -> int:
+        """Get the encoded size of a record in bytes."""
+        return (
+            record.field_lengths.nbytes
+            + record.measured_sites.nbytes
+            + 4 * len(record.measured_pins)
+            + record.voltage_measurements.nbytes
+            + record.current_measurements.nbytes
+            + record.in_compliance.nbytes
+        )
+
+    def write(self, records: Sequence[_ColumnarRecord]) -> None:
+        """Write a batch of records as one column chunk with one write."""
+        import numpy as np
+
+        pins = [pin for record in records for pin in record.measured_pins]
+        pin_dictionary, pin_codes = np.unique(np.array(pins, dtype=str), return_inverse=True)
+        arrays = [
+            np.concatenate([record.field_lengths for record in records]),
+            np.concatenate([record.measured_sites for record in records]),
+            pin_dictionary,
+            pin_codes.astype(np.int32),
+            np.concatenate([record.voltage_measurements for record in records]),
+            np.concatenate([record.current_measurements for record in records]),
+            np.concatenate([record.in_compliance for record in records]),
+        ]
+        chunk = io.BytesIO()
+        for array in arrays:
+            np.save(chunk, array, allow_pickle=False)
+        self._get_file().write(chunk.getvalue())
+
+
+def _concatenate(requests: Sequence[LogRequest], column: str, dtype: type) -> "np.ndarray":
+    import numpy as np
+
+    values = itertools.chain.from_iterable(getattr(request, column) for request in requests)
+    return np.fromiter(values, dtype=dtype)
+
+
+_RAW_HEADER = struct.Struct("<dI")
+
+
+class RawRecord(NamedTuple):
+    """A serialized log request read from a log file written by :class:`RawBackend`."""
+
+    timestamp: float
+    """The POSIX time at which the server received the request."""
+
+    payload: bytes
+    """The serialized LogRequest."""
+
+    def decode(self) -> LogRequest:
+        """Deserialize the log request."""
+        return LogRequest.FromString(self.payload)
+
+
+class RawBackend(_FileBackend[bytes]):
+    """Writes the serialized log requests as they were received, without decoding them.
+
+    Each request is written as a header, holding the time at which the server received it as a
+    little-endian float64 and the length of the request as a little-endian uint32, followed by
+    the serialized LogRequest.
+    """
+
+    def encode(self, requests: Sequence[LogRequest]) -> bytes:
+        """Serialize log requests and prefix each with a header."""
+        return self.encode_serialized([request.SerializeToString() for request in requests])
+
+    def encode_serialized(self, payloads: Sequence[bytes]) -> bytes:
+        """Prefix serialized log requests with a header.
+
+        Args:
+            payloads: The serialized LogRequest messages.
+
+        Returns:
+            The encoded record.
+        """
+        timestamp = time.time()
+        return b"".join(_RAW_HEADER.pack(timestamp, len(payload)) + payload for payload in payloads)
+
+    def size_of(self, record: bytes) -> int:
+        """Get the encoded size of a record in bytes."""
+        return len(record)
+
+    def write(self, records: Sequence[bytes]) -> None:
+        """Write a batch of records with one write."""
+        self._get_file().write(b"".join(records))
+
+
+# The sizes of the fixed64 and fixed32 wire types.
+_FIXED_WIRE_TYPE_SIZES = {1: 8, 5: 4}
+
+
+def split_log_batch(data: bytes) -> List[bytes]:
+    """Split a serialized LogBatchRequest into serialized LogRequest messages.
+
+    This walks the protobuf wire format of the batch instead of deserializing the requests.
+
+    Args:
+        data: The serialized LogBatchRequest.
+
+    Returns:
+        The serialized LogRequest messages.
+
+    Raises:
+        ValueError: If the data is not a valid LogBatchRequest.
+    """
+    payloads = []
+    position = 0
+    while position < len(data):
+        tag, position = _read_varint(data, position)
+        field_number, wire_type = tag >> 3, tag & 0x7
+        if wire_type == 0:
+            _, end = _read_varint(data, position)
+        elif wire_type in _FIXED_WIRE_TYPE_SIZES:
+            end = position + _FIXED_WIRE_TYPE_SIZES[wire_type]
+        elif wire_type == 2:
+            length, position = _read_varint(data, position)
+            end = position + length
+        else:
+            raise ValueError(f"Unexpected wire type {wire_type} for field {field_number}.")
+        if end > len(data):
+            raise ValueError("The LogBatchRequest is truncated.")
+        # Field 1 is LogBatchRequest.requests. Skip unknown fields.
+        if field_number == 1 and wire_type == 2:
+            payloads.append(data[position:end])
+        position = end
+    return payloads
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("The LogBatchRequest is truncated.")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+# The NumPy type and the size in bytes of the samples of each waveform data type.
+_WAVEFORM_DTYPES: Dict["WaveformDataType.ValueType", Tuple[str, int]] = {
+    WaveformDataType.WAVEFORM_DATA_TYPE_FLOAT64: ("<f8", 8),
+    WaveformDataType.WAVEFORM_DATA_TYPE_FLOAT32: ("<f4", 4),
+}
+
+_WAVEFORM_HEADER = struct.Struct("<dddiI")
+
+
+class WaveformRecord(NamedTuple):
+    """A waveform read from a waveform file written by :class:`WaveformBackend`."""
+
+    timestamp: float
+    """The POSIX time at which the server received the waveform."""
+
+    site: int
+
+    pin: str
+
+    t0: float
+    """The time of the first sample, in seconds since the epoch."""
+
+    dt: float
+    """The time between samples, in seconds."""
+
+    samples: "np.ndarray"
+
+
+def waveform_samples(waveform: Waveform) -> "np.ndarray":
+    """Get the samples of a waveform as a read-only array that shares the message's buffer.
+
+    Raises:
+        ValueError: If the data type is unknown or the size of the samples is not a multiple of
+            the size of the data type.
+    """
+    import numpy as np
+
+    if waveform.data_type not in _WAVEFORM_DTYPES:
+        raise ValueError(f"Unknown waveform data type {waveform.data_type}.")
+    dtype, itemsize = _WAVEFORM_DTYPES[waveform.data_type]
+    if len(waveform.samples) % itemsize:
+        raise ValueError(
+            f"The waveform samples have {len(waveform.samples)} bytes, which is not a multiple of "
+            f"{itemsize}."
+        )
+    return np.frombuffer(waveform.samples, dtype=dtype)
+
+
+class WaveformBackend(_FileBackend[List[bytes]]):
+    """Writes the waveforms of log requests in binary, next to the log file of the scalars.
+
+    Each waveform is written as a header, holding the time at which the server received it,
+    t0 and dt as little-endian float64, the site as a little-endian int32 and the length of the
+    pin name as a little-endian uint32, followed by the UTF-8 pin name and an NPY array of the
+    samples. The samples are written from the request's buffer without converting them.
+    """
+
+    def encode(self, requests: Sequence[LogRequest]) -> List[bytes]:
+        """Encode the waveforms of log requests.
+
+        Raises:
+            ValueError: If the samples of a waveform don't match its data type.
+        """
+        import numpy as np
+
+        timestamp = time.time()
+        parts = []
+        for request in requests:
+            for waveform in request.waveforms:
+                samples = waveform_samples(waveform)
+                pin = waveform.pin.encode()
+                header = io.BytesIO()
+                np.lib.format.write_array_header_1_0(
+                    header, np.lib.format.header_data_from_array_1_0(samples)
+                )
+                parts.append(
+                    _WAVEFORM_HEADER.pack(
+                        timestamp, waveform.t0, waveform.dt, waveform.site, len(pin)
+                    )
+                    + pin
+                    + header.getvalue()
+                )
+                # The samples are already packed little-endian values, so write the request's
+                # buffer as is.
+                parts.append(waveform.samples)
+        return parts
+
+    def size_of(self, record: List[bytes]) -> int:
+        """Get the encoded size of a record in bytes."""
+        return sum(len(part) for part in record)
+
+    def write(self, records: Sequence[List[bytes]]) -> None:
+        """Write a batch of records with one write.
+
+        Writing the batch at once keeps each header with its samples when the file is
+        segmented, because a segmented file only rotates between writes.
+        """
+        self._get_file().write(b"".join(itertools.chain.from_iterable(records)))
+
+
+def create_backend(
+    storage_format: StorageFormat,
+    path: PathType,
+    *,
+    open_file: Callable[[PathType], OutputFile] = _open_append,
+) -> StorageBackend:
+    """Create the storage backend for a log file format.
+
+    Args:
+        storage_format: The format of the log file.
+        path: The log file to append to.
+        open_file: Opens the log file for appending, for example as a segmented file.
+
+    Returns:
+        The storage backend.
+    """
+    if storage_format == StorageFormat.COLUMNAR:
+        return ColumnarBackend(path, open_file=open_file)
+    if storage_format == StorageFormat.RAW:
+        return RawBackend(path, open_file=open_file)
+    return JsonLinesBackend(path, open_file=open_file)
+
+
+def iter_column_chunks(path: PathType) -> Iterator[Dict[str, "np.ndarray"]]:
+    """Read the column chunks of a log file written by :class:`ColumnarBackend`.
+
+    Args:
+        path: The log file or segment to read. Compressed segments are decompressed.
+
+    Returns:
+        An iterator of column chunks. Each chunk maps ``field_lengths`` and the names of the
+        LogRequest fields to arrays. The pin names are decoded from the pin dictionary.
+    """
+    import numpy as np
+
+    with open_segment(path) as file:
+        while True:
+            try:
+                field_lengths = np.load(file, allow_pickle=False)
+            except EOFError:
+                return
+            measured_sites = np.load(file, allow_pickle=False)
+            pin_dictionary = np.load(file, allow_pickle=False)
+            pin_codes = np.load(file, allow_pickle=False)
+            yield {
+                "field_lengths": field_lengths,
+                "measured_sites": measured_sites,
+                "measured_pins": pin_dictionary[pin_codes],
+                "voltage_measurements": np.load(file, allow_pickle=False),
+                "current_measurements": np.load(file, allow_pickle=False),
+                "in_compliance": np.load(file, allow_pickle=False),
+            }
+
+
+def read_columns(path: PathType) -> Dict[str, "np.ndarray"]:
+    """Read a log file written by :class:`ColumnarBackend` into one array per column.
+
+    Args:
+        path: The log file or segment to read. Compressed segments are decompressed.
+
+    Returns:
+        A dictionary that maps ``field_lengths`` and the names of the LogRequest fields to the
+        concatenated arrays of all chunks.
+    """
+    import numpy as np
+
+    chunks = list(iter_column_chunks(path))
+    if not chunks:
+        return {
+            "field_lengths": np.empty((0, len(_COLUMNS)), dtype=np.uint32),
+            "measured_sites": np.empty(0, dtype=np.int32),
+            "measured_pins": np.empty(0, dtype=str),
+            "voltage_measurements": np.empty(0, dtype=np.float32),
+            "current_measurements": np.empty(0, dtype=np.float32),
+            "in_compliance": np.empty(0, dtype=np.bool_),
+        }
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def iter_raw_records(path: PathType) -> Iterator[RawRecord]:
+    """Read the serialized log requests of a log file written by :class:`RawBackend`.
+
+    The requests are not deserialized until :meth:`RawRecord.decode` is called.
+
+    Args:
+        path: The log file or segment to read. Compressed segments are decompressed.
+
+    Returns:
+        An iterator of records. A record that was cut short, for example because the server
+        stopped while writing it, ends the iteration.
+    """
+    with open_segment(path) as file:
+        while True:
+            header = file.read(_RAW_HEADER.size)
+            if len(header) < _RAW_HEADER.size:
+                return
+            timestamp, length = _RAW_HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                return
+            yield RawRecord(timestamp, payload)
+
+
+def convert_raw_to_json(path: PathType, output_path: PathType) -> int:
+    """Convert a log file written by :class:`RawBackend` to the format of :class:`JsonLinesBackend`.
+
+    Args:
+        path: The log file or segment to read. Compressed segments are decompressed.
+        output_path: The JSON lines file to write.
+
+    Returns:
+        The number of log requests converted.
+
+    Raises:
+        ValueError: If the samples of a waveform don't match its data type.
+    """
+    count = 0
+    with open(output_path, "wb") as output_file:
+        for record in iter_raw_records(path):
+            output_file.write(_encode_json_line(record.decode()))
+            count += 1
+    return count
+
+
+def iter_waveforms(path: PathType) -> Iterator[WaveformRecord]:
+    """Read the waveforms of a waveform file written by :class:`WaveformBackend`.
+
+    Args:
+        path: The waveform file or segment to read. Compressed segments are decompressed.
+
+    Returns:
+        An iterator of waveforms.
+    """
+    import numpy as np
+
+    with open_segment(path) as file:
+        while True:
+            header = file.read(_WAVEFORM_HEADER.size)
+            if len(header) < _WAVEFORM_HEADER.size:
+                return
+            timestamp, t0, dt, site, pin_length = _WAVEFORM_HEADER.unpack(header)
+            pin = file.read(pin_length).decode()
+            samples = np.lib.format.read_array(file, allow_pickle=False)
+            yield WaveformRecord(timestamp, site, pin, t0, dt, samples)
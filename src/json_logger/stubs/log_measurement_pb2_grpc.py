@@ -18,6 +18,41 @@ class LogMeasurementStub(object):
             request_serializer=log__measurement__pb2.LogRequest.SerializeToString,
             response_deserializer=log__measurement__pb2.LogResponse.FromString,
         )
+        self.LogStream = channel.stream_unary(
+            "/logging_service.LogMeasurement/LogStream",
+            request_serializer=log__measurement__pb2.LogRequest.SerializeToString,
+            response_deserializer=log__measurement__pb2.LogStreamResponse.FromString,
+        )
+        self.LogBatch = channel.unary_unary(
+            "/logging_service.LogMeasurement/LogBatch",
+            request_serializer=log__measurement__pb2.LogBatchRequest.SerializeToString,
+            response_deserializer=log__measurement__pb2.LogBatchResponse.FromString,
+        )
+        self.Query = channel.unary_stream(
+            "/logging_service.LogMeasurement/Query",
+            request_serializer=log__measurement__pb2.QueryRequest.SerializeToString,
+            response_deserializer=log__measurement__pb2.QueryResponse.FromString,
+        )
+        self.GetStats = channel.unary_unary(
+            "/logging_service.LogMeasurement/GetStats",
+            request_serializer=log__measurement__pb2.GetStatsRequest.SerializeToString,
+            response_deserializer=log__measurement__pb2.GetStatsResponse.FromString,
+        )
+        self.GetSummary = channel.unary_unary(
+            "/logging_service.LogMeasurement/GetSummary",
+            request_serializer=log__measurement__pb2.GetSummaryRequest.SerializeToString,
+            response_deserializer=log__measurement__pb2.GetSummaryResponse.FromString,
+        )
+        self.OpenSharedMemory = channel.unary_unary(
+            "/logging_service.LogMeasurement/OpenSharedMemory",
+            request_serializer=log__measurement__pb2.OpenSharedMemoryRequest.SerializeToString,
+            response_deserializer=log__measurement__pb2.OpenSharedMemoryResponse.FromString,
+        )
+        self.Subscribe = channel.unary_stream(
+            "/logging_service.LogMeasurement/Subscribe",
+            request_serializer=log__measurement__pb2.SubscribeRequest.SerializeToString,
+            response_deserializer=log__measurement__pb2.SubscribeResponse.FromString,
+        )
 
 
 class LogMeasurementServicer(object):
@@ -29,6 +64,48 @@ class LogMeasurementServicer(object):
         context.set_details("Method not implemented!")
         raise NotImplementedError("Method not implemented!")
 
+    def LogStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def LogBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def Query(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def GetStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def GetSummary(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def OpenSharedMemory(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def Subscribe(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
 
 def add_LogMeasurementServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -37,6 +114,41 @@ def add_LogMeasurementServicer_to_server(servicer, server):
             request_deserializer=log__measurement__pb2.LogRequest.FromString,
             response_serializer=log__measurement__pb2.LogResponse.SerializeToString,
         ),
+        "LogStream": grpc.stream_unary_rpc_method_handler(
+            servicer.LogStream,
+            request_deserializer=log__measurement__pb2.LogRequest.FromString,
+            response_serializer=log__measurement__pb2.LogStreamResponse.SerializeToString,
+        ),
+        "LogBatch": grpc.unary_unary_rpc_method_handler(
+            servicer.LogBatch,
+            request_deserializer=log__measurement__pb2.LogBatchRequest.FromString,
+            response_serializer=log__measurement__pb2.LogBatchResponse.SerializeToString,
+        ),
+        "Query": grpc.unary_stream_rpc_method_handler(
+            servicer.Query,
+            request_deserializer=log__measurement__pb2.QueryRequest.FromString,
+            response_serializer=log__measurement__pb2.QueryResponse.SerializeToString,
+        ),
+        "GetStats": grpc.unary_unary_rpc_method_handler(
+            servicer.GetStats,
+            request_deserializer=log__measurement__pb2.GetStatsRequest.FromString,
+            response_serializer=log__measurement__pb2.GetStatsResponse.SerializeToString,
+        ),
+        "GetSummary": grpc.unary_unary_rpc_method_handler(
+            servicer.GetSummary,
+            request_deserializer=log__measurement__pb2.GetSummaryRequest.FromString,
+            response_serializer=log__measurement__pb2.GetSummaryResponse.SerializeToString,
+        ),
+        "OpenSharedMemory": grpc.unary_unary_rpc_method_handler(
+            servicer.OpenSharedMemory,
+            request_deserializer=log__measurement__pb2.OpenSharedMemoryRequest.FromString,
+            response_serializer=log__measurement__pb2.OpenSharedMemoryResponse.SerializeToString,
+        ),
+        "Subscribe": grpc.unary_stream_rpc_method_handler(
+            servicer.Subscribe,
+            request_deserializer=log__measurement__pb2.SubscribeRequest.FromString,
+            response_serializer=log__measurement__pb2.SubscribeResponse.SerializeToString,
+        ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
         "logging_service.LogMeasurement", rpc_method_handlers
@@ -76,3 +188,206 @@ class LogMeasurement(object):
             timeout,
             metadata,
         )
+
+    @staticmethod
+    def LogStream(
+        request_iterator,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            "/logging_service.LogMeasurement/LogStream",
+            log__measurement__pb2.LogRequest.SerializeToString,
+            log__measurement__pb2.LogStreamResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
+    @staticmethod
+    def LogBatch(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            "/logging_service.LogMeasurement/LogBatch",
+            log__measurement__pb2.LogBatchRequest.SerializeToString,
+            log__measurement__pb2.LogBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
+    @staticmethod
+    def Query(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            "/logging_service.LogMeasurement/Query",
+            log__measurement__pb2.QueryRequest.SerializeToString,
+            log__measurement__pb2.QueryResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
+    @staticmethod
+    def GetStats(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            "/logging_service.LogMeasurement/GetStats",
+            log__measurement__pb2.GetStatsRequest.SerializeToString,
+            log__measurement__pb2.GetStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
+    @staticmethod
+    def GetSummary(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            "/logging_service.LogMeasurement/GetSummary",
+            log__measurement__pb2.GetSummaryRequest.SerializeToString,
+            log__measurement__pb2.GetSummaryResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
+    @staticmethod
+    def OpenSharedMemory(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            "/logging_service.LogMeasurement/OpenSharedMemory",
+            log__measurement__pb2.OpenSharedMemoryRequest.SerializeToString,
+            log__measurement__pb2.OpenSharedMemoryResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
+    @staticmethod
+    def Subscribe(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            "/logging_service.LogMeasurement/Subscribe",
+            log__measurement__pb2.SubscribeRequest.SerializeToString,
+            log__measurement__pb2.SubscribeResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
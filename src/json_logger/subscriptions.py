@@ -0,0 +1,265 @@
+"""Live subscriptions that stream the logged measurements to clients as they are logged."""
+
+import collections
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from json_logger.stubs.log_measurement_pb2 import (
+    LogRequest,
+    SubscribeRequest,
+    SubscribeResponse,
+)
+
+DEFAULT_MAX_RATE = 10.0
+DEFAULT_MAX_POINTS_PER_PIN = 1000
+DEFAULT_MAX_QUEUE_SIZE = 100_000
+
+# Decimation keeps the minimum and the maximum of each slice, so it needs at least one slice.
+_MIN_POINTS_PER_PIN = 2
+
+_Row = Tuple[float, int, str, float, float, bool]
+
+
+class Subscription:
+    """The queue of measurements that match the filters of one subscriber.
+
+    The queue is bounded, so when the subscriber reads more slowly than measurements are logged,
+    its oldest measurements are dropped and counted in its next response. Neither the logging
+    nor the other subscribers wait for it.
+    """
+
+    def __init__(
+        self, request: SubscribeRequest, notify: Callable[[], object], max_queue_size: int
+    ) -> None:
+        """Initialize the subscription.
+
+        Args:
+            request: The filters, rate and decimation that the subscriber asked for.
+            notify: Called when measurements are queued while the queue is empty, and when the
+                subscription is closed. It may be called on any thread.
+            max_queue_size: The maximum number of measurements to queue.
+        """
+        self._sites = frozenset(request.sites)
+        self._pins = frozenset(request.pins)
+        max_rate = request.max_rate if request.max_rate > 0 else DEFAULT_MAX_RATE
+        self.interval = 1.0 / max_rate
+        """The minimum time in seconds between two responses."""
+        self._max_points_per_pin = max(
+            request.max_points_per_pin or DEFAULT_MAX_POINTS_PER_PIN, _MIN_POINTS_PER_PIN
+        )
+        self._notify = notify
+        self._rows: Deque[_Row] = collections.deque(maxlen=max_queue_size)
+        self._dropped_count = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the subscription was closed and won't queue more measurements."""
+        return self._closed
+
+    def offer(self, rows: Sequence[_Row]) -> None:
+        """Queue the measurements that match the filters, dropping the oldest if it is full.
+
+        Args:
+            rows: The logged measurements.
+        """
+        if self._sites or self._pins:
+            rows = [
+                row
+                for row in rows
+                if (not self._sites or row[1] in self._sites)
+                and (not self._pins or row[2] in self._pins)
+            ]
+        if not rows or self._closed:
+            return
+        with self._lock:
+            was_empty = not self._rows
+            maxlen = self._rows.maxlen
+            assert maxlen is not None
+            self._dropped_count += max(len(self._rows) + len(rows) - maxlen, 0)
+            self._rows.extend(rows)
+        if was_empty:
+            self._notify()
+
+    def take(self) -> Optional[SubscribeResponse]:
+        """Take the queued measurements as a response.
+
+        The measurements of a site and pin with more than max_points_per_pin of them are
+        decimated to the minimum and maximum voltage of max_points_per_pin // 2 equal slices.
+
+        Returns:
+            The response, or None if no measurements were queued or dropped since the previous
+            response.
+        """
+        with self._lock:
+            rows = list(self._rows)
+            self._rows.clear()
+            dropped_count = self._dropped_count
+            self._dropped_count = 0
+        if not rows and not dropped_count:
+            return None
+        kept_rows = _decimate(rows, self._max_points_per_pin)
+        response = SubscribeResponse(
+            decimated_count=len(rows) - len(kept_rows), dropped_count=dropped_count
+        )
+        if kept_rows:
+            timestamps, sites, pins, voltages, currents, in_compliance = zip(*kept_rows)
+            response.timestamps.extend(timestamps)
+            response.measured_sites.extend(sites)
+            response.measured_pins.extend(pins)
+            response.voltage_measurements.extend(voltages)
+            response.current_measurements.extend(currents)
+            response.in_compliance.extend(in_compliance)
+        return response
+
+    def close(self) -> None:
+        """Stop queuing measurements and tell the subscriber."""
+        self._closed = True
+        self._notify()
+
+
+class SubscriptionHub:
+    """Publishes each logged measurement once to the subscriptions that match it.
+
+    Publishing costs one check while nobody subscribes. Otherwise, the measurements of each
+    call are converted once and every subscription filters them into its own queue.
+    """
+
+    def __init__(
+        self, max_subscriptions: int, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE
+    ) -> None:
+        """Initialize the hub.
+
+        Args:
+            max_subscriptions: The maximum number of subscriptions at once.
+            max_queue_size: The maximum number of measurements that each subscription queues.
+        """
+        self._max_subscriptions = max_subscriptions
+        self._max_queue_size = max_queue_size
+        # Replaced instead of changed, so that publish() can iterate over it without the lock.
+        self._subscriptions: Tuple[Subscription, ...] = ()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self, request: SubscribeRequest, notify: Callable[[], object]
+    ) -> Optional[Subscription]:
+        """Start queuing the measurements that match the filters of a subscriber.
+
+        Args:
+            request: The filters, rate and decimation that the subscriber asked for.
+            notify: Called when measurements are queued while the queue is empty, and when the
+                subscription is closed. It may be called on any thread.
+
+        Returns:
+            The subscription, or None if there are already max_subscriptions.
+
+        Raises:
+            RuntimeError: If the hub is closed.
+        """
+        subscription = Subscription(request, notify, self._max_queue_size)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The subscription hub is closed.")
+            if len(self._subscriptions) >= self._max_subscriptions:
+                return None
+            self._subscriptions += (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Close a subscription and stop publishing to it.
+
+        Args:
+            subscription: The subscription returned by subscribe().
+        """
+        subscription.close()
+        with self._lock:
+            self._subscriptions = tuple(
+                other for other in self._subscriptions if other is not subscription
+            )
+
+    def publish(self, requests: Sequence[LogRequest]) -> None:
+        """Queue the measurements of log requests for the subscriptions that match them.
+
+        Args:
+            requests: The log requests. A measurement without a site or pin is published as
+                site 0 or pin "", like in the summary.
+        """
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        rows = _to_rows(requests, time.time())
+        for subscription in subscriptions:
+            subscription.offer(rows)
+
+    def close(self) -> None:
+        """Close all subscriptions, which ends their streams, and refuse new ones."""
+        with self._lock:
+            self._closed = True
+            subscriptions = self._subscriptions
+            self._subscriptions = ()
+        for subscription in subscriptions:
+            subscription.close()
+
+
+def _to_rows(requests: Sequence[LogRequest], timestamp: float) -> List[_Row]:
+    return [
+        (
+            timestamp,
+            0 if site is None else site,
+            "" if pin is None else pin,
+            math.nan if voltage is None else voltage,
+            math.nan if current is None else current,
+            bool(in_compliance),
+        )
+        for request in requests
+        for site, pin, voltage, current, in_compliance in itertools.zip_longest(
+            request.measured_sites,
+            request.measured_pins,
+            request.voltage_measurements,
+            request.current_measurements,
+            request.in_compliance,
+        )
+    ]
+
+
+def _decimate(rows: List[_Row], max_points_per_pin: int) -> List[_Row]:
+    groups: Dict[Tuple[int, str], List[int]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault((row[1], row[2]), []).append(index)
+    if all(len(indices) <= max_points_per_pin for indices in groups.values()):
+        return rows
+
+    kept_indices: List[int] = []
+    slice_count = max_points_per_pin // 2
+    for indices in groups.values():
+        if len(indices) <= max_points_per_pin:
+            kept_indices.extend(indices)
+            continue
+        # Keep the measurements with the minimum and maximum voltage of each slice, so that the
+        # peaks of a decimated trace remain visible.
+        for slice_index in range(slice_count):
+            start = len(indices) * slice_index // slice_count
+            end = len(indices) * (slice_index + 1) // slice_count
+            kept_indices.extend(_get_extremes(rows, indices[start:end]))
+    # Restore the order in which the measurements were logged.
+    kept_indices.sort()
+    return [rows[index] for index in kept_indices]
+
+
+def _get_extremes(rows: List[_Row], indices: List[int]) -> List[int]:
+    minimum_index = maximum_index = indices[0]
+    for index in indices:
+        voltage = rows[index][3]
+        # NaN compares false, so a slice of NaN keeps its first measurement.
+        if voltage < rows[minimum_index][3] or math.isnan(rows[minimum_index][3]):
+            minimum_index = index
+        if voltage > rows[maximum_index][3] or math.isnan(rows[maximum_index][3]):
+            maximum_index = index
+    if minimum_index == maximum_index:
+        return [minimum_index]
+    return sorted((minimum_index, maximum_index))
@@ -0,0 +1,373 @@
+"""Running statistics of the logged measurements of each site and pin."""
+
+import collections
+import itertools
+import math
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    AbstractSet,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from json_logger.stubs.log_measurement_pb2 import (
+    GetSummaryRequest,
+    GetSummaryResponse,
+    LogRequest,
+    PinSummary,
+    SummaryWindow,
+)
+from json_logger.stubs.log_measurement_pb2 import (
+    RunningStatistics as RunningStatisticsMessage,
+)
+
+if TYPE_CHECKING:
+    # Import numpy on demand, because the summary is optional.
+    import numpy as np
+
+DEFAULT_MAX_WINDOWS = 60
+
+# Below this many measurements per call, updating the statistics one value at a time is faster
+# than grouping the values with numpy.
+_MIN_VECTORIZED_VALUES = 512
+
+_Key = Tuple[int, str]
+_T = TypeVar("_T")
+
+
+class _Measurements(NamedTuple):
+    keys: List[_Key]
+    voltages: List[float]
+    currents: List[float]
+    in_compliance: List[int]
+
+
+class RunningStatistics:
+    """The count, mean, spread and range of a quantity, updated with groups of values.
+
+    The groups are merged with the parallel form of Welford's algorithm, which keeps the sum of
+    the squared deviations from the mean instead of the sum of the squares, so the variance
+    stays accurate when the mean is large compared to the spread. Merging statistics gives the
+    same result as computing them over all of the values at once, up to rounding.
+    """
+
+    __slots__ = ("count", "mean", "sum_of_squared_deviations", "min", "max")
+
+    def __init__(self) -> None:
+        """Initialize the statistics of no values."""
+        self.count = 0
+        self.mean = 0.0
+        self.sum_of_squared_deviations = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def standard_deviation(self) -> float:
+        """The sample standard deviation, or 0.0 if there are fewer than two values."""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.sum_of_squared_deviations / (self.count - 1))
+
+    def add(
+        self,
+        count: int,
+        mean: float,
+        sum_of_squared_deviations: float,
+        minimum: float,
+        maximum: float,
+    ) -> None:
+        """Merge the statistics of a group of values.
+
+        Args:
+            count: The number of values in the group.
+            mean: The mean of the group.
+            sum_of_squared_deviations: The sum of the squared differences from the group's mean.
+            minimum: The smallest value of the group.
+            maximum: The largest value of the group.
+        """
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.sum_of_squared_deviations += (
+            sum_of_squared_deviations + delta * delta * self.count * count / total
+        )
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def add_value(self, value: float) -> None:
+        """Add one value with Welford's update.
+
+        Args:
+            value: The value to add.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.sum_of_squared_deviations += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningStatistics") -> None:
+        """Merge the statistics of other values.
+
+        Args:
+            other: The statistics to merge.
+        """
+        self.add(other.count, other.mean, other.sum_of_squared_deviations, other.min, other.max)
+
+    def to_message(self) -> RunningStatisticsMessage:
+        """Convert the statistics to their message in GetSummary responses."""
+        if self.count == 0:
+            return RunningStatisticsMessage()
+        return RunningStatisticsMessage(
+            count=self.count,
+            mean=self.mean,
+            sum_of_squared_deviations=self.sum_of_squared_deviations,
+            standard_deviation=self.standard_deviation,
+            min=self.min,
+            max=self.max,
+        )
+
+
+class _PinStatistics:
+    __slots__ = ("voltage", "current", "compliance_count", "in_compliance_count")
+
+    def __init__(self) -> None:
+        self.voltage = RunningStatistics()
+        self.current = RunningStatistics()
+        self.compliance_count = 0
+        self.in_compliance_count = 0
+
+    def merge(self, other: "_PinStatistics") -> None:
+        self.voltage.merge(other.voltage)
+        self.current.merge(other.current)
+        self.compliance_count += other.compliance_count
+        self.in_compliance_count += other.in_compliance_count
+
+    def to_message(self, key: _Key) -> PinSummary:
+        return PinSummary(
+            site=key[0],
+            pin=key[1],
+            voltage=self.voltage.to_message(),
+            current=self.current.to_message(),
+            compliance_count=self.compliance_count,
+            in_compliance_count=self.in_compliance_count,
+            compliance_rate=(
+                self.in_compliance_count / self.compliance_count
+                if self.compliance_count
+                else math.nan
+            ),
+        )
+
+
+class MeasurementSummary:
+    """Keeps running statistics of the voltage, current and compliance of each site and pin.
+
+    The statistics are updated as the requests are logged, so a summary costs time in the
+    number of sites and pins, not in the number of measurements logged. Optionally, the
+    statistics are also kept for each tumbling time window, such as each minute, up to a number
+    of the most recent windows.
+    """
+
+    def __init__(
+        self, window: Optional[float] = None, max_windows: int = DEFAULT_MAX_WINDOWS
+    ) -> None:
+        """Initialize the measurement summary.
+
+        Args:
+            window: The length in seconds of the time windows. If this is None, the statistics
+                are only kept since the logger service started.
+            max_windows: The number of most recent time windows to keep.
+        """
+        self._window = window
+        self._total: Dict[_Key, _PinStatistics] = {}
+        self._windows: Deque[Tuple[float, Dict[_Key, _PinStatistics]]] = collections.deque(
+            maxlen=max_windows
+        )
+        self._lock = threading.Lock()
+
+    def add(self, requests: Sequence[LogRequest]) -> None:
+        """Add the measurements of log requests to the statistics.
+
+        Args:
+            requests: The log requests. A measurement without a site or pin is added to site 0
+                or pin "", like in the index.
+        """
+        measurements = _flatten(requests)
+        if not measurements.keys:
+            return
+        # Group the values of many measurements with numpy outside of the lock, and add the
+        # values of a few measurements one at a time, which is faster.
+        groups = (
+            _group_measurements(measurements)
+            if len(measurements.keys) >= _MIN_VECTORIZED_VALUES
+            else None
+        )
+        with self._lock:
+            targets = [self._total]
+            if self._window is not None:
+                targets.append(self._get_current_window(time.time(), self._window))
+            for statistics in targets:
+                if groups is None:
+                    _add_measurements(statistics, measurements)
+                else:
+                    for key, group in groups.items():
+                        _get_pin_statistics(statistics, key).merge(group)
+
+    def get_summary(self, request: GetSummaryRequest) -> GetSummaryResponse:
+        """Get the statistics of the measurements that were logged.
+
+        Args:
+            request: The sites and pins to summarize and the number of time windows to return.
+
+        Returns:
+            The statistics of each site and pin, ordered by site and pin.
+        """
+        sites = set(request.sites)
+        pins = set(request.pins)
+        with self._lock:
+            response = GetSummaryResponse(pins=_to_pin_summaries(self._total, sites, pins))
+            if self._window is not None:
+                for start_time, statistics in itertools.islice(
+                    reversed(self._windows), request.max_windows
+                ):
+                    response.windows.append(
+                        SummaryWindow(
+                            start_time=start_time,
+                            end_time=start_time + self._window,
+                            pins=_to_pin_summaries(statistics, sites, pins),
+                        )
+                    )
+        return response
+
+    def _get_current_window(self, now: float, window: float) -> Dict[_Key, _PinStatistics]:
+        start_time = math.floor(now / window) * window
+        # Skip the windows in which nothing was logged.
+        if not self._windows or self._windows[-1][0] < start_time:
+            self._windows.append((start_time, {}))
+        return self._windows[-1][1]
+
+
+def _to_pin_summaries(
+    statistics: Dict[_Key, _PinStatistics], sites: AbstractSet[int], pins: AbstractSet[str]
+) -> List[PinSummary]:
+    return [
+        pin_statistics.to_message(key)
+        for key, pin_statistics in sorted(statistics.items())
+        if (not sites or key[0] in sites) and (not pins or key[1] in pins)
+    ]
+
+
+def _flatten(requests: Sequence[LogRequest]) -> _Measurements:
+    sites: List[int] = []
+    pins: List[str] = []
+    voltages: List[float] = []
+    currents: List[float] = []
+    in_compliance: List[int] = []
+    for request in requests:
+        sites.extend(request.measured_sites)
+        pins.extend(request.measured_pins)
+        voltages.extend(request.voltage_measurements)
+        currents.extend(request.current_measurements)
+        in_compliance.extend(request.in_compliance)
+        # Pad the missing values of each measurement like the index does.
+        if not len(sites) == len(pins) == len(voltages) == len(currents) == len(in_compliance):
+            count = max(len(sites), len(pins), len(voltages), len(currents), len(in_compliance))
+            _pad(sites, count, 0)
+            _pad(pins, count, "")
+            _pad(voltages, count, math.nan)
+            _pad(currents, count, math.nan)
+            _pad(in_compliance, count, -1)
+    return _Measurements(list(zip(sites, pins)), voltages, currents, in_compliance)
+
+
+def _get_pin_statistics(statistics: Dict[_Key, _PinStatistics], key: _Key) -> _PinStatistics:
+    pin_statistics = statistics.get(key)
+    if pin_statistics is None:
+        pin_statistics = statistics[key] = _PinStatistics()
+    return pin_statistics
+
+
+def _add_measurements(statistics: Dict[_Key, _PinStatistics], measurements: _Measurements) -> None:
+    for key, voltage, current, compliance in zip(*measurements):
+        pin_statistics = _get_pin_statistics(statistics, key)
+        if math.isfinite(voltage):
+            pin_statistics.voltage.add_value(voltage)
+        if math.isfinite(current):
+            pin_statistics.current.add_value(current)
+        if compliance >= 0:
+            pin_statistics.compliance_count += 1
+            pin_statistics.in_compliance_count += compliance
+
+
+def _group_measurements(measurements: _Measurements) -> Dict[_Key, _PinStatistics]:
+    import numpy as np
+
+    key_codes: Dict[_Key, int] = {}
+    codes = [key_codes.setdefault(key, len(key_codes)) for key in measurements.keys]
+    groups = {key: _PinStatistics() for key in key_codes}
+    code_array = np.array(codes, dtype=np.intp)
+    for attribute, values in (
+        ("voltage", measurements.voltages),
+        ("current", measurements.currents),
+    ):
+        for key, statistics in zip(
+            key_codes, _group_statistics(code_array, np.array(values), len(key_codes))
+        ):
+            getattr(groups[key], attribute).add(*statistics)
+    compliance_array = np.array(measurements.in_compliance, dtype=np.int8)
+    has_compliance = compliance_array >= 0
+    compliance_counts = np.bincount(code_array[has_compliance], minlength=len(key_codes))
+    in_compliance_counts = np.bincount(code_array[compliance_array > 0], minlength=len(key_codes))
+    for key, compliance_count, in_compliance_count in zip(
+        key_codes, compliance_counts.tolist(), in_compliance_counts.tolist()
+    ):
+        groups[key].compliance_count = compliance_count
+        groups[key].in_compliance_count = in_compliance_count
+    return groups
+
+
+def _group_statistics(
+    codes: "np.ndarray", values: "np.ndarray", group_count: int
+) -> Iterable[Tuple[int, float, float, float, float]]:
+    import numpy as np
+
+    finite = np.isfinite(values)
+    codes = codes[finite]
+    values = values[finite]
+    counts = np.bincount(codes, minlength=group_count)
+    means = np.bincount(codes, weights=values, minlength=group_count) / np.maximum(counts, 1)
+    # Sum the squared deviations from the group's mean, not the squares, to keep the precision.
+    deviations = values - means[codes]
+    sums_of_squared_deviations = np.bincount(
+        codes, weights=deviations * deviations, minlength=group_count
+    )
+    minimums = np.full(group_count, math.inf)
+    np.minimum.at(minimums, codes, values)
+    maximums = np.full(group_count, -math.inf)
+    np.maximum.at(maximums, codes, values)
+    return zip(
+        counts.tolist(),
+        means.tolist(),
+        sums_of_squared_deviations.tolist(),
+        minimums.tolist(),
+        maximums.tolist(),
+    )
+
+
+def _pad(values: List[_T], count: int, padding: _T) -> None:
+    values.extend(itertools.repeat(padding, count - len(values)))
@@ -0,0 +1,211 @@
+"""A supervisor that runs the logger service in several worker processes."""
+
+import concurrent.futures
+import functools
+import logging
+import multiprocessing
+import multiprocessing.synchronize
+import queue
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+from json_logger.logger_service import (
+    connect_discovery_service,
+    register_service,
+    start_server,
+)
+from json_logger.sharding import shard_path
+
+if TYPE_CHECKING:
+    from ni_measurement_plugin_sdk_service.discovery import DiscoveryClient
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_STARTUP_TIMEOUT = 60.0
+
+
+def supports_reuse_port() -> bool:
+    """Whether worker processes can share one port, with the kernel spreading connections."""
+    return sys.platform.startswith("linux")
+
+
+def check_worker_options(
+    worker_count: int, *, metrics_port: Optional[int] = None, **server_options: Any
+) -> None:
+    """Check that the options of serve_workers() can be used with several workers.
+
+    Args:
+        worker_count: The number of worker processes.
+        metrics_port: The port on which the first worker serves its metrics.
+        server_options: The other keyword arguments of start_server().
+
+    Raises:
+        ValueError: If the options can't be used with several workers.
+    """
+    if server_options.get("index_path") is not None:
+        raise ValueError(
+            "The measurement index can't be used with several workers, because each worker "
+            "would only query its own measurements."
+        )
+    if server_options.get("summary") or server_options.get("summary_window") is not None:
+        raise ValueError(
+            "The summary can't be used with several workers, because each worker would only "
+            "summarize its own measurements."
+        )
+    if server_options.get("max_subscribers"):
+        raise ValueError(
+            "Subscribers can't be used with several workers, because each worker would only "
+            "stream its own measurements."
+        )
+    if metrics_port == 0 and worker_count > 1:
+        raise ValueError(
+            "The metrics port can't be 0 with several workers, because the workers serve their "
+            "metrics on consecutive ports from it."
+        )
+
+
+def serve_workers(
+    worker_count: int,
+    *,
+    output_path: str = "measurements.json",
+    metrics_port: Optional[int] = None,
+    reuse_port: Optional[bool] = None,
+    run_service: Optional[Callable[[Sequence[str]], None]] = None,
+    startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+    grace: float = 5.0,
+    **server_options: Any,
+) -> None:
+    """Run the logger service in several worker processes, each with its own gRPC server.
+
+    Each worker deserializes, encodes and writes the requests that it receives, so the
+    throughput scales with the number of cores instead of being limited by one interpreter. Each
+    worker writes its own log files, such as measurements.worker0.json.
+
+    If the workers share a port, the kernel spreads the incoming connections across them and the
+    service is registered once. Otherwise, each worker listens on its own port and is registered
+    under the same service class, so the clients are spread across the workers only as far as
+    the discovery service spreads its resolutions. gRPC clients keep their connection, so the
+    load is spread per client process, not per call.
+
+    Args:
+        worker_count: The number of worker processes.
+        output_path: The log file to derive the log files of the workers from.
+        metrics_port: The port on which the first worker serves its metrics. Worker i serves
+            them on metrics_port + i, so it can't be 0. If this is None, the metrics are only
+            available from the GetStats RPC of each worker.
+        reuse_port: Whether the workers share a port with SO_REUSEPORT. By default, they share
+            a port if the platform supports it.
+        run_service: Called with the ports of the workers once they have all started. The
+            workers are drained and stopped when it returns. By default, the workers are
+            registered with the discovery service until the user presses enter. The connection
+            to the discovery service is then opened while the workers start.
+        startup_timeout: The time in seconds to wait for each worker to start.
+        grace: The time in seconds to let in-flight requests finish when stopping the workers.
+        server_options: The other keyword arguments of start_server().
+
+    Raises:
+        ValueError: If the options can't be used with several workers.
+        RuntimeError: If a worker fails to start.
+    """
+    check_worker_options(worker_count, metrics_port=metrics_port, **server_options)
+    if reuse_port is None:
+        reuse_port = supports_reuse_port()
+    if run_service is None:
+        run_service = functools.partial(_run_registered_workers, connect_discovery_service())
+
+    # Spawn the workers instead of forking them, because gRPC doesn't support fork().
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    processes: List[multiprocessing.process.BaseProcess] = []
+    try:
+        ports: List[str] = []
+        for worker_index in range(worker_count):
+            # The first worker picks a free port for the other workers to share.
+            port = int(ports[0]) if reuse_port and ports else 0
+            worker_options: Dict[str, Any] = dict(
+                server_options,
+                output_path=str(shard_path(output_path, f"worker{worker_index}")),
+                metrics_port=None if metrics_port is None else metrics_port + worker_index,
+                port=port,
+                reuse_port=reuse_port,
+                grace=grace,
+            )
+            port_queue: "multiprocessing.Queue[str]" = context.Queue()
+            process = context.Process(
+                target=_run_worker,
+                args=(worker_options, port_queue, stop_event),
+                name=f"LoggerWorker{worker_index}",
+            )
+            process.start()
+            processes.append(process)
+            ports.append(_wait_for_port(process, port_queue, startup_timeout))
+        run_service(ports)
+    finally:
+        stop_event.set()
+        _join_workers(processes, grace + startup_timeout)
+
+
+def _run_worker(
+    server_options: Dict[str, Any],
+    port_queue: "multiprocessing.Queue[str]",
+    stop_event: multiprocessing.synchronize.Event,
+) -> None:
+    start_server(
+        run_service=functools.partial(_run_worker_service, port_queue, stop_event),
+        **server_options,
+    )
+
+
+def _run_worker_service(
+    port_queue: "multiprocessing.Queue[str]",
+    stop_event: multiprocessing.synchronize.Event,
+    port: str,
+) -> None:
+    port_queue.put(port)
+    stop_event.wait()
+
+
+def _wait_for_port(
+    process: multiprocessing.process.BaseProcess,
+    port_queue: "multiprocessing.Queue[str]",
+    timeout: float,
+) -> str:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return port_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            raise RuntimeError(
+                f"The worker {process.name} exited with code {process.exitcode} before it started."
+            )
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"The worker {process.name} didn't start within {timeout} s.")
+
+
+def _join_workers(processes: Sequence[multiprocessing.process.BaseProcess], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    for process in processes:
+        process.join(max(deadline - time.monotonic(), 0.0))
+        if process.is_alive():
+            _logger.warning("The worker %s didn't drain in time. Terminating it.", process.name)
+            process.terminate()
+            process.join()
+        elif process.exitcode != 0:
+            _logger.warning("The worker %s exited with code %s.", process.name, process.exitcode)
+
+
+def _run_registered_workers(
+    discovery_client_future: "concurrent.futures.Future[DiscoveryClient]", ports: Sequence[str]
+) -> None:
+    discovery_client = discovery_client_future.result()
+    # Workers that share a port are registered once.
+    registration_ids = [register_service(discovery_client, port) for port in dict.fromkeys(ports)]
+    try:
+        _ = input("Press enter to stop the server.")
+    finally:
+        # Unregister the workers before draining them, so that no new clients resolve them.
+        for registration_id in registration_ids:
+            discovery_client.unregister_service(registration_id)
@@ -0,0 +1,72 @@
+"""Tests of the group-commit record writer."""
+
+from typing import List, Sequence
+
+import pytest
+
+from json_logger.metrics import WriterMetrics
+from json_logger.record_writer import RecordWriter
+from json_logger.storage import StorageBackend
+from json_logger.stubs.log_measurement_pb2 import LogRequest
+
+
+class _FailingBackend(StorageBackend[bytes]):
+    """A backend that fails on bad records and crashes the writer thread on crash records."""
+
+    def __init__(self) -> None:
+        self.written: List[bytes] = []
+        self.closed = False
+
+    def encode(self, requests: Sequence[LogRequest]) -> bytes:
+        return b"".join(request.SerializeToString() for request in requests)
+
+    def size_of(self, record: bytes) -> int:
+        if record == b"crash":
+            raise RuntimeError("Crashed the writer thread.")
+        return len(record)
+
+    def open(self) -> None:
+        pass
+
+    def write(self, records: Sequence[bytes]) -> None:
+        if b"bad" in records:
+            raise ValueError("Failed to encode the batch.")
+        self.written.extend(records)
+
+    def flush(self) -> None:
+        pass
+
+    def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test___backend_raises___submit___counts_error_and_keeps_writing() -> None:
+    backend = _FailingBackend()
+    metrics = WriterMetrics()
+    writer = RecordWriter(backend, max_batch_records=1, metrics=metrics)
+    writer.start()
+
+    writer.submit(b"bad")
+    writer.submit(b"good")
+    writer.close(timeout=10.0)
+
+    assert metrics.write_errors.value == 1
+    assert backend.written == [b"good"]
+    assert backend.closed
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test___writer_thread_stopped___submit___raises_instead_of_blocking() -> None:
+    backend = _FailingBackend()
+    writer = RecordWriter(backend, max_queue_records=1)
+    writer.start()
+    writer.submit(b"crash")
+    assert writer._thread is not None
+    writer._thread.join(10.0)
+
+    with pytest.raises(RuntimeError, match="thread stopped"):
+        writer.submit(b"good")
+    writer.close(timeout=10.0)
@@ -0,0 +1,107 @@
+"""Tests of the storage backends."""
+
+import json
+import pathlib
+
+import numpy as np
+import pytest
+
+from json_logger.segments import SegmentStore
+from json_logger.storage import (
+    JsonLinesBackend,
+    WaveformBackend,
+    iter_waveforms,
+    split_log_batch,
+)
+from json_logger.stubs.log_measurement_pb2 import (
+    WAVEFORM_DATA_TYPE_FLOAT32,
+    WAVEFORM_DATA_TYPE_FLOAT64,
+    LogBatchRequest,
+    LogRequest,
+    Waveform,
+    WaveformDataType,
+)
+
+
+def _create_waveform(site: int, pin: str, samples: np.ndarray) -> Waveform:
+    data_type = (
+        WAVEFORM_DATA_TYPE_FLOAT32 if samples.dtype == np.float32 else WAVEFORM_DATA_TYPE_FLOAT64
+    )
+    return Waveform(
+        site=site,
+        pin=pin,
+        t0=1.0 + site,
+        dt=1e-3,
+        data_type=data_type,
+        samples=samples.astype(samples.dtype.newbyteorder("<")).tobytes(),
+    )
+
+
+def test___tiny_segments___write_waveforms___reads_every_waveform_back(
+    tmp_path: pathlib.Path,
+) -> None:
+    manifest_path = tmp_path / "manifest.json"
+    store = SegmentStore(manifest_path, max_segment_bytes=1)
+    backend = WaveformBackend(tmp_path / "log.waveforms", open_file=store.open)
+    expected = [
+        [_create_waveform(0, "Pin1", np.arange(5, dtype=np.float64))],
+        [
+            _create_waveform(1, "Pin1", np.linspace(0.0, 1.0, 3, dtype=np.float32)),
+            _create_waveform(1, "Pin2", np.arange(100, dtype=np.float64)),
+        ],
+        [_create_waveform(2, "Pin3", np.zeros(0, dtype=np.float64))],
+    ]
+
+    backend.open()
+    for waveforms in expected:
+        backend.write([backend.encode([LogRequest(waveforms=waveforms)])])
+    backend.close()
+    store.close()
+
+    segments = json.loads(manifest_path.read_text())["segments"]
+    records = [
+        record for segment in segments for record in iter_waveforms(tmp_path / segment["path"])
+    ]
+    assert len(segments) == len(expected)
+    assert [(record.site, record.pin, record.t0, record.dt) for record in records] == [
+        (waveform.site, waveform.pin, waveform.t0, waveform.dt)
+        for waveforms in expected
+        for waveform in waveforms
+    ]
+    for record, waveform in zip(
+        records, [waveform for waveforms in expected for waveform in waveforms]
+    ):
+        assert record.samples.tobytes() == waveform.samples
+
+
+def test___unknown_waveform_data_type___json_lines_encode___raises_value_error(
+    tmp_path: pathlib.Path,
+) -> None:
+    backend = JsonLinesBackend(tmp_path / "log.json")
+    waveform = Waveform(
+        site=0, pin="Pin1", data_type=WaveformDataType.ValueType(99), samples=bytes(8)
+    )
+
+    with pytest.raises(ValueError, match="Unknown waveform data type 99"):
+        backend.encode([LogRequest(waveforms=[waveform])])
+
+
+def test___unknown_fields___split_log_batch___skips_them() -> None:
+    requests = [LogRequest(measured_pins=["Pin1"]), LogRequest(voltage_measurements=[1.5])]
+    batch = LogBatchRequest(requests=requests).SerializeToString()
+    # A varint field 2, a fixed64 field 3 and a fixed32 field 4.
+    unknown_fields = b"\x10\xac\x02" + b"\x19" + bytes(8) + b"\x25" + bytes(4)
+
+    payloads = split_log_batch(unknown_fields + batch + unknown_fields)
+
+    assert [LogRequest.FromString(payload) for payload in payloads] == requests
+
+
+def test___group_wire_type___split_log_batch___raises_value_error() -> None:
+    with pytest.raises(ValueError, match="Unexpected wire type 3"):
+        split_log_batch(b"\x13")
+
+
+def test___truncated_fixed64___split_log_batch___raises_value_error() -> None:
+    with pytest.raises(ValueError, match="truncated"):
+        split_log_batch(b"\x19" + bytes(4))
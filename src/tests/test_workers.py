@@ -0,0 +1,19 @@
+"""Tests of running the logger service in several worker processes."""
+
+from click.testing import CliRunner
+
+from json_logger.logger_service import main
+
+
+def test___metrics_port_0_with_several_workers___main___reports_usage_error() -> None:
+    result = CliRunner().invoke(main, ["--workers", "2", "--metrics-port", "0"])
+
+    assert result.exit_code == 2
+    assert "The metrics port can't be 0 with several workers" in result.output
+
+
+def test___index_with_several_workers___main___reports_usage_error() -> None:
+    result = CliRunner().invoke(main, ["--workers", "2", "--index", "index.db"])
+
+    assert result.exit_code == 2
+    assert "The measurement index can't be used with several workers" in result.output